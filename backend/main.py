@@ -2,34 +2,50 @@
 Blue Carbon Registry - FastAPI Backend
 Main application entry point
 """
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, undefer_group
+from typing import List, Optional, Union
 import uvicorn
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from database import engine, get_db, Base
-from models import Project, Verification, BlockchainTransaction, CarbonCredit, MarketListing
+from database import async_engine, get_async_db, pool_stats, run_migrations
+from models import Project, Verification, BlockchainTransaction, CarbonCredit, MarketListing, AnalysisJob
 from schemas import (
-    ProjectCreate, ProjectResponse, VerificationCreate, VerificationResponse,
+    ProjectCreate, ProjectResponse, ProjectDetailResponse, VerificationCreate, VerificationResponse,
     BlockchainTransactionResponse, CarbonCreditResponse, MarketListingResponse,
-    AnalysisResult, DashboardMetrics
+    AnalysisResult, AnalysisJobResponse, SatelliteEpochResponse, DashboardMetrics, BatchPortfolioRequest
 )
-from services.image_analysis import analyze_satellite_image, analyze_site_image
-from services.carbon_calculator import calculate_carbon_credits
 from services.blockchain_service import deploy_contract, mint_geonft, create_carbon_tokens
 from services.verification_service import create_verification_record, update_verification_status
-from services.marketplace_service import create_market_listing, get_market_statistics
+from services.marketplace_service import (
+    create_market_listing, complete_listing_sale, cancel_market_listing,
+    get_market_statistics, record_credits_tokenized
+)
 from services.aptos_integration import get_aptos_service
-from services.binance_price_service import get_price_service, start_price_updater
+from services.binance_price_service import get_price_service, get_price_scheduler, start_price_updater, close_price_service
+from services.price_stream import get_price_broadcaster, sse_events
+from services.pagination import decode_cursor, next_cursor, NEXT_CURSOR_HEADER
+from services.portfolio_valuation import value_holdings, valuation_rows, iter_valuation_ndjson
+from services.project_import import detect_format, iter_import_ndjson, DEFAULT_BATCH_SIZE
+from services.response_cache import get_response_cache, project_tag
+from services.registry_export import EXPORT_TABLES, EXPORT_FORMATS, export_table
+from services.analytics_engine import get_analytics_engine, start_analytics_engine, parse_aggregates
+from services.analysis_executor import get_analysis_executor, shutdown_analysis_executor
+from services.analysis_jobs import enqueue_job, get_job_runner
+from services.satellite_epochs import list_project_epochs
+from services.metrics_store import get_metrics_store, naive_utc, TREND_METRICS
+from services.image_store import (
+    save_upload, add_project_reference, release_project_image,
+    list_project_images, blob_path, UploadTooLarge
+)
+import io
 import os
 import asyncio
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(
     title="Blue Carbon Registry API",
     description="Backend API for Mangrove Carbon Registration and Trading",
@@ -43,16 +59,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Location"],
 )
 
 # Startup event - Start price updater
 @app.on_event("startup")
 async def startup_event():
-    """Start background tasks on startup"""
+    """Apply database migrations and start background tasks on startup"""
+    # Off by default: deployments migrate once in the release phase (Procfile)
+    if os.getenv("RUN_MIGRATIONS_ON_STARTUP", "false").lower() == "true":
+        run_migrations()
+    
+    # Create the response cache now so its commit listener sees every write,
+    # including those from workers that have not served a cached read yet
+    get_response_cache()
+    
+    # In-memory analytics: register the commit listener now, load in the background
+    if os.getenv("ANALYTICS_ENGINE_ENABLED", "true").lower() == "true":
+        get_analytics_engine()
+        asyncio.create_task(start_analytics_engine())
+    
+    # Analysis jobs queued before a restart are picked up again
+    await get_job_runner().start()
+    
     # Start Binance price updater (updates every 1 second)
     asyncio.create_task(start_price_updater(interval=1))
     print("✅ Binance price updater started (1 second intervals)")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled upstream and database connections and analysis workers on shutdown"""
+    await close_price_service()
+    await get_job_runner().stop()
+    shutdown_analysis_executor()
+    await async_engine.dispose()
+
 # Health check endpoint
 @app.get("/")
 async def root():
@@ -67,6 +108,23 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
+@app.get("/health/db")
+async def database_health():
+    """Connection pool occupancy and counters, for pool sizing"""
+    return pool_stats()
+
+
+@app.get("/health/cache")
+async def cache_health():
+    """Response cache hit/miss/eviction counters"""
+    return get_response_cache().stats()
+
+
+@app.get("/health/analysis")
+async def analysis_health():
+    """Analysis worker pool occupancy, task counters and job queue depth"""
+    return {**get_analysis_executor().stats(), "job_runner": await get_job_runner().stats()}
+
 
 # ==================== PROJECT ENDPOINTS ====================
 
@@ -80,7 +138,7 @@ async def create_project(
     description: str = Form(...),
     latitude: Optional[float] = Form(None),
     longitude: Optional[float] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new carbon credit project"""
     try:
@@ -96,117 +154,223 @@ async def create_project(
             status="draft"
         )
         db.add(project)
-        db.commit()
-        db.refresh(project)
+        await db.commit()
+        await db.refresh(project)
         
         return project
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/api/projects/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: int, db: Session = Depends(get_db)):
-    """Get project details by ID"""
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return project
+@app.post("/api/projects/import")
+async def import_projects_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    batch_size: int = Form(DEFAULT_BATCH_SIZE)
+):
+    """
+    Bulk-import projects from a CSV or NDJSON upload
+    
+    Streams NDJSON progress: one line per rejected row, one per committed
+    batch and a final summary line.
+    """
+    try:
+        fmt = detect_format(file.filename, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The upload is spooled to disk; read it line by line in the worker thread
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    return StreamingResponse(iter_import_ndjson(lines, fmt, batch_size), media_type="application/x-ndjson")
+
+
+PROJECT_EXPANSIONS = {"analysis"}
+
+
+def project_expansions(include: Optional[str]) -> set:
+    """Parse the comma-separated `include` query parameter"""
+    expansions = {name.strip() for name in include.split(",") if name.strip()} if include else set()
+    unknown = expansions - PROJECT_EXPANSIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(unknown))}")
+    return expansions
 
 
-@app.get("/api/projects", response_model=List[ProjectResponse])
+def project_load_options(expansions: set) -> list:
+    """Load only the ProjectResponse columns, plus the analysis blobs when expanded"""
+    options = [load_only(*(getattr(Project, name) for name in ProjectResponse.model_fields), raiseload=True)]
+    if "analysis" in expansions:
+        options.append(undefer_group("analysis"))
+    return options
+
+
+def project_response_schema(expansions: set):
+    return ProjectDetailResponse if "analysis" in expansions else ProjectResponse
+
+
+@app.get("/api/projects/{project_id}", response_model=Union[ProjectDetailResponse, ProjectResponse])
+async def get_project(
+    request: Request,
+    project_id: int,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get project details by ID (`include=analysis` adds the analysis results)"""
+    expansions = project_expansions(include)
+    
+    async def build():
+        project = await db.get(Project, project_id, options=project_load_options(expansions))
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return project_response_schema(expansions).model_validate(project)
+    
+    return await get_response_cache().respond(request, [project_tag(project_id)], build)
+
+
+@app.get("/api/projects", response_model=Union[List[ProjectDetailResponse], List[ProjectResponse]])
 async def list_projects(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all projects with optional filtering"""
-    query = db.query(Project)
+    """
+    List all projects with optional filtering
+    
+    Pass the X-Next-Cursor response header back as `cursor` to page by key;
+    `skip` is still honoured when no cursor is given. `include=analysis`
+    adds the analysis results to each project.
+    """
+    expansions = project_expansions(include)
+    query = select(Project).options(*project_load_options(expansions)).order_by(Project.id)
     if status:
-        query = query.filter(Project.status == status)
-    projects = query.offset(skip).limit(limit).all()
-    return projects
+        query = query.where(Project.status == status)
+    if cursor:
+        try:
+            query = query.where(Project.id > decode_cursor(cursor, "projects")["id"])
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        query = query.offset(skip)
+    projects = (await db.execute(query.limit(limit))).scalars().all()
+    
+    token = next_cursor("projects", projects, limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+    schema = project_response_schema(expansions)
+    return [schema.model_validate(project) for project in projects]
 
 
 # ==================== IMAGE ANALYSIS ENDPOINTS ====================
 
-@app.post("/api/analysis/site-image/{project_id}")
+@app.post("/api/analysis/site-image/{project_id}", status_code=202, response_model=AnalysisJobResponse)
 async def upload_and_analyze_site_image(
     project_id: int,
+    response: Response,
     image: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    priority: int = 0,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Upload site image and perform AI analysis"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    """
+    Upload a site image and queue its AI analysis
+    
+    Returns 202 with the job; poll GET /api/analysis/jobs/{id}. The result
+    is stored in the project's image_analysis_result when the job succeeds.
+    """
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
+    # Stream to the content-addressed store; identical images are kept once
     try:
-        # Save uploaded image
-        upload_dir = "uploads/site_images"
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = f"{upload_dir}/{project_id}_{image.filename}"
-        
-        with open(file_path, "wb") as f:
-            content = await image.read()
-            f.write(content)
-        
-        # Analyze image
-        analysis_result = await analyze_site_image(file_path)
-        
-        # Update project with image path
-        project.site_image_path = file_path
-        project.image_analysis_result = analysis_result
-        db.commit()
-        
-        return {
-            "success": True,
-            "image_path": file_path,
-            "analysis": analysis_result
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        stored = await save_upload(image)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    await add_project_reference(db, project_id, stored, image.filename)
+    project.site_image_path = stored.path
+    job = await enqueue_job(
+        db, project_id, "site_image",
+        payload={"image_path": stored.path, "sha256": stored.sha256, "filename": image.filename},
+        priority=priority
+    )
+    await db.commit()
+    get_job_runner().wake()
+    
+    response.headers["Location"] = f"/api/analysis/jobs/{job.id}"
+    return job
+
+
+@app.get("/api/analysis/site-image/{project_id}")
+async def list_site_images(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Stored site images referenced by a project, newest first"""
+    if not await db.get(Project, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return await list_project_images(db, project_id)
 
 
-@app.post("/api/analysis/satellite/{project_id}")
+@app.delete("/api/analysis/site-image/{project_id}/{sha256}")
+async def delete_site_image(project_id: int, sha256: str, db: AsyncSession = Depends(get_async_db)):
+    """Drop a project's reference to an image; files no project uses are removed by gc-images"""
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        unreferenced = await release_project_image(db, project_id, sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if project.site_image_path == blob_path(sha256):
+        project.site_image_path = None
+    await db.commit()
+    return {"success": True, "unreferenced": unreferenced}
+
+
+@app.post("/api/analysis/satellite/{project_id}", status_code=202, response_model=AnalysisJobResponse)
 async def analyze_satellite_data(
     project_id: int,
-    db: Session = Depends(get_db)
+    response: Response,
+    priority: int = 0,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Analyze satellite data for the project location"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    """
+    Queue satellite analysis for the project location
+    
+    Returns 202 with the job; when it succeeds, acquisitions newer than the
+    project's epoch history are added to it and the project's
+    satellite_analysis_result, estimated_carbon_credits and
+    vegetation_health are updated.
+    """
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    try:
-        # Perform satellite analysis
-        satellite_result = await analyze_satellite_image(
-            latitude=project.latitude,
-            longitude=project.longitude,
-            area=project.area
-        )
-        
-        # Calculate carbon credits
-        carbon_data = calculate_carbon_credits(
-            area=project.area,
-            vegetation_index=satellite_result.get("vegetation_index", 0.78),
-            project_type=project.project_type
-        )
-        
-        # Update project
-        project.satellite_analysis_result = satellite_result
-        project.estimated_carbon_credits = carbon_data["total_carbon_tons"]
-        project.vegetation_health = satellite_result.get("vegetation_health", "Excellent")
-        db.commit()
-        
-        return {
-            "success": True,
-            "satellite_analysis": satellite_result,
-            "carbon_calculation": carbon_data
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Satellite analysis failed: {str(e)}")
+    job = await enqueue_job(db, project_id, "satellite", priority=priority)
+    await db.commit()
+    get_job_runner().wake()
+    
+    response.headers["Location"] = f"/api/analysis/jobs/{job.id}"
+    return job
+
+
+@app.get("/api/analysis/satellite/{project_id}/epochs", response_model=List[SatelliteEpochResponse])
+async def list_satellite_epochs(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Analyzed satellite acquisitions of a project, oldest first, with the change since the previous one"""
+    if not await db.get(Project, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return await list_project_epochs(db, project_id)
+
+
+@app.get("/api/analysis/jobs/{job_id}", response_model=AnalysisJobResponse)
+async def get_analysis_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Status, progress and (once finished) result or error of an analysis job"""
+    job = await db.get(AnalysisJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job
 
 
 # ==================== VERIFICATION ENDPOINTS ====================
@@ -217,14 +381,14 @@ async def create_verification(
     verification_type: str = Form(...),  # 'internal', 'third_party', 'legal'
     verifier_name: str = Form(...),
     notes: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a verification record"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    verification = create_verification_record(
+    verification = await create_verification_record(
         db=db,
         project_id=project_id,
         verification_type=verification_type,
@@ -239,10 +403,10 @@ async def create_verification(
 async def approve_verification(
     verification_id: int,
     notes: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Approve a verification"""
-    verification = update_verification_status(
+    verification = await update_verification_status(
         db=db,
         verification_id=verification_id,
         status="approved",
@@ -250,21 +414,24 @@ async def approve_verification(
     )
     
     # Update project status based on verification type
-    project = db.query(Project).filter(Project.id == verification.project_id).first()
+    project = await db.get(Project, verification.project_id)
     if verification.verification_type == "legal":
         project.status = "verified"
-        db.commit()
+        await db.commit()
     
     return {"success": True, "verification": verification}
 
 
 @app.get("/api/verification/project/{project_id}", response_model=List[VerificationResponse])
-async def get_project_verifications(project_id: int, db: Session = Depends(get_db)):
+async def get_project_verifications(request: Request, project_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get all verifications for a project"""
-    verifications = db.query(Verification).filter(
-        Verification.project_id == project_id
-    ).all()
-    return verifications
+    async def build():
+        verifications = (await db.execute(
+            select(Verification).where(Verification.project_id == project_id)
+        )).scalars().all()
+        return [VerificationResponse.model_validate(verification) for verification in verifications]
+    
+    return await get_response_cache().respond(request, [project_tag(project_id)], build)
 
 
 # ==================== BLOCKCHAIN ENDPOINTS ====================
@@ -272,10 +439,10 @@ async def get_project_verifications(project_id: int, db: Session = Depends(get_d
 @app.post("/api/blockchain/deploy/{project_id}")
 async def deploy_blockchain_contract(
     project_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Deploy smart contract to blockchain"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -308,8 +475,8 @@ async def deploy_blockchain_contract(
         # Update project
         project.blockchain_address = contract_result["contract_address"]
         project.status = "blockchain_registered"
-        db.commit()
-        db.refresh(transaction)
+        await db.commit()
+        await db.refresh(transaction)
         
         return {
             "success": True,
@@ -317,17 +484,17 @@ async def deploy_blockchain_contract(
             "contract_address": contract_result["contract_address"]
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Blockchain deployment failed: {str(e)}")
 
 
 @app.post("/api/blockchain/mint-geonft/{project_id}")
 async def mint_project_geonft(
     project_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mint GeoNFT for the project"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -363,8 +530,8 @@ async def mint_project_geonft(
         
         # Update project
         project.geonft_id = nft_result["nft_id"]
-        db.commit()
-        db.refresh(transaction)
+        await db.commit()
+        await db.refresh(transaction)
         
         return {
             "success": True,
@@ -372,7 +539,7 @@ async def mint_project_geonft(
             "transaction": transaction
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"GeoNFT minting failed: {str(e)}")
 
 
@@ -382,10 +549,10 @@ async def mint_project_geonft(
 async def tokenize_carbon_credits(
     project_id: int,
     unit_price: float = Form(45.0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Tokenize carbon credits as ERC-20 tokens"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -430,8 +597,9 @@ async def tokenize_carbon_credits(
         
         # Update project
         project.status = "tokenized"
-        db.commit()
-        db.refresh(carbon_credit)
+        await record_credits_tokenized(db, carbon_credit.total_credits)
+        await db.commit()
+        await db.refresh(carbon_credit)
         
         return {
             "success": True,
@@ -444,19 +612,22 @@ async def tokenize_carbon_credits(
             }
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Tokenization failed: {str(e)}")
 
 
 @app.get("/api/tokenization/{project_id}", response_model=CarbonCreditResponse)
-async def get_carbon_credits(project_id: int, db: Session = Depends(get_db)):
+async def get_carbon_credits(request: Request, project_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get carbon credit details for a project"""
-    carbon_credit = db.query(CarbonCredit).filter(
-        CarbonCredit.project_id == project_id
-    ).first()
-    if not carbon_credit:
-        raise HTTPException(status_code=404, detail="Carbon credits not found")
-    return carbon_credit
+    async def build():
+        carbon_credit = (await db.execute(
+            select(CarbonCredit).where(CarbonCredit.project_id == project_id)
+        )).scalars().first()
+        if not carbon_credit:
+            raise HTTPException(status_code=404, detail="Carbon credits not found")
+        return CarbonCreditResponse.model_validate(carbon_credit)
+    
+    return await get_response_cache().respond(request, [project_tag(project_id)], build)
 
 
 # ==================== MARKETPLACE ENDPOINTS ====================
@@ -465,17 +636,17 @@ async def get_carbon_credits(project_id: int, db: Session = Depends(get_db)):
 async def list_on_marketplace(
     project_id: int,
     asking_price: Optional[float] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List carbon credits on marketplace"""
-    carbon_credit = db.query(CarbonCredit).filter(
-        CarbonCredit.project_id == project_id
-    ).first()
+    carbon_credit = (await db.execute(
+        select(CarbonCredit).where(CarbonCredit.project_id == project_id)
+    )).scalars().first()
     if not carbon_credit:
         raise HTTPException(status_code=404, detail="Carbon credits not found")
     
     try:
-        listing = create_market_listing(
+        listing = await create_market_listing(
             db=db,
             carbon_credit_id=carbon_credit.id,
             asking_price=asking_price or carbon_credit.unit_price
@@ -486,33 +657,70 @@ async def list_on_marketplace(
             "listing": listing
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.put("/api/marketplace/listings/{listing_id}/sell")
+async def sell_listing(listing_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Complete the sale of an active listing"""
+    try:
+        listing = await complete_listing_sale(db, listing_id)
+    except ValueError as e:
+        await db.rollback()
+        status_code = 404 if "not found" in str(e) else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
+    return {"success": True, "listing": listing}
+
+
+@app.put("/api/marketplace/listings/{listing_id}/cancel")
+async def cancel_listing(listing_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Withdraw an active listing"""
+    try:
+        listing = await cancel_market_listing(db, listing_id)
+    except ValueError as e:
+        await db.rollback()
+        status_code = 404 if "not found" in str(e) else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
+    return {"success": True, "listing": listing}
+
+
 @app.get("/api/marketplace/listings")
 async def get_marketplace_listings(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all marketplace listings"""
-    listings = db.query(MarketListing).filter(
+    """Get all marketplace listings (keyset paging via `cursor`, see list_projects)"""
+    query = select(MarketListing).where(
         MarketListing.status == "active"
-    ).offset(skip).limit(limit).all()
+    ).order_by(MarketListing.id)
+    if cursor:
+        try:
+            query = query.where(MarketListing.id > decode_cursor(cursor, "listings")["id"])
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        query = query.offset(skip)
+    listings = (await db.execute(query.limit(limit))).scalars().all()
     
+    token = next_cursor("listings", listings, limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
     return listings
 
 
 @app.get("/api/marketplace/statistics")
-async def get_marketplace_stats(db: Session = Depends(get_db)):
+async def get_marketplace_stats(db: AsyncSession = Depends(get_async_db)):
     """Get marketplace statistics with real-time Binance pricing"""
-    stats = get_market_statistics(db)
+    stats = await get_market_statistics(db)
     
-    # Get real-time market data from Binance
+    # Real-time market data from the latest Binance snapshot (no upstream I/O)
     try:
         price_service = get_price_service()
-        market_data = await price_service.get_carbon_market_data()
+        market_data = price_service.get_snapshot().to_market_data()
         
         # Update stats with real-time data
         stats.update({
@@ -525,6 +733,7 @@ async def get_marketplace_stats(db: Session = Depends(get_db)):
             "demand_level": market_data["demand_level"],
             "crypto_influence": market_data["crypto_influence"],
             "last_updated": market_data["last_updated"],
+            "snapshot_age_seconds": market_data["snapshot_age_seconds"],
         })
     except Exception as e:
         print(f"⚠️  Binance API error: {e}")
@@ -533,10 +742,10 @@ async def get_marketplace_stats(db: Session = Depends(get_db)):
 
 @app.get("/api/marketplace/live-prices")
 async def get_live_prices():
-    """Get real-time prices from Binance"""
+    """Get real-time prices from the latest Binance snapshot"""
     try:
         price_service = get_price_service()
-        market_data = await price_service.get_carbon_market_data()
+        market_data = price_service.get_snapshot().to_market_data()
         return {
             "success": True,
             "data": market_data
@@ -547,6 +756,67 @@ async def get_live_prices():
             "error": str(e)
         }
 
+@app.get("/api/marketplace/stream")
+async def stream_live_prices(request: Request):
+    """Push live prices as server-sent events, one frame per updater tick"""
+    return StreamingResponse(
+        sse_events(get_price_broadcaster(), request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/marketplace/prices")
+async def websocket_live_prices(websocket: WebSocket):
+    """Push live prices over a WebSocket, one frame per updater tick"""
+    await websocket.accept()
+    broadcaster = get_price_broadcaster()
+    queue = broadcaster.subscribe()
+
+    async def pump():
+        while True:
+            await websocket.send_text(await queue.get())
+
+    sender = asyncio.create_task(pump())
+    try:
+        # Client messages are ignored; receiving is how a disconnect is noticed
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        broadcaster.unsubscribe(queue)
+
+@app.get("/api/marketplace/price-feed")
+async def get_price_feed_status():
+    """Get price feed circuit state, fetch latency and error counters"""
+    status = get_price_scheduler().status()
+    status["snapshot_degraded"] = get_price_service().get_snapshot().degraded
+    return status
+
+@app.get("/api/marketplace/stream/stats")
+async def get_stream_stats():
+    """Get live price stream subscriber and drop counters"""
+    return get_price_broadcaster().stats()
+
+@app.post("/api/marketplace/portfolio-value/batch")
+async def get_batch_portfolio_value(request: BatchPortfolioRequest, stream: bool = False):
+    """Value many holdings against one market snapshot (stream=true returns NDJSON)"""
+    snapshot = get_price_service().get_snapshot()
+    valuation = value_holdings(
+        [holding.model_dump() for holding in request.holdings],
+        snapshot,
+        vintage_multipliers=request.vintage_multipliers,
+        project_type_multipliers=request.project_type_multipliers
+    )
+    if stream:
+        return StreamingResponse(iter_valuation_ndjson(valuation), media_type="application/x-ndjson")
+    return {
+        "success": True,
+        "summary": valuation["summary"],
+        "holdings": valuation_rows(valuation)
+    }
+
 @app.get("/api/marketplace/portfolio-value/{carbon_credits}")
 async def get_portfolio_value(carbon_credits: float):
     """Calculate portfolio value with real-time pricing"""
@@ -564,18 +834,144 @@ async def get_portfolio_value(carbon_credits: float):
         }
 
 
+@app.get("/api/marketplace/candles")
+async def get_price_candles(symbol: str = "CARBON", resolution: int = 60, limit: int = 60):
+    """Get rolling OHLC candles (resolution 60, 300 or 3600 seconds)"""
+    price_service = get_price_service()
+    if symbol not in price_service.candles:
+        raise HTTPException(status_code=404, detail="Symbol not tracked")
+    if resolution not in price_service.candles[symbol].series:
+        raise HTTPException(status_code=400, detail="Unsupported resolution")
+    return {
+        "symbol": symbol,
+        "resolution": resolution,
+        "candles": price_service.get_candles(symbol, resolution, limit)
+    }
+
+
+# ==================== EXPORT ENDPOINTS ====================
+
+@app.get("/api/export/{table}")
+async def export_registry_table(table: str, format: str = "ndjson"):
+    """
+    Stream a full registry table as NDJSON or CSV
+    
+    Tables: projects, verifications, carbon_credits, market_listings,
+    blockchain_transactions
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table: {table}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported format (use ndjson or csv)")
+    return StreamingResponse(
+        export_table(table, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    )
+
+
+# ==================== ANALYTICS ENDPOINTS ====================
+
+@app.get("/api/analytics")
+async def query_analytics(
+    metric: str,
+    aggs: str = "count,sum,avg",
+    group_by: Optional[str] = None,
+    status: Optional[str] = None,
+    project_type: Optional[str] = None,
+    vintage_year: Optional[int] = None,
+    geo_cell: Optional[str] = None
+):
+    """
+    Aggregate a registry metric from the in-memory analytics engine
+    
+    metric: estimated_carbon_credits, area, total_credits, total_value,
+    asking_price or available_amount. aggs: count, sum, avg, min, max, pNN.
+    group_by and the filters: project_type, status, vintage_year, geo_cell
+    ("lat,lon" of the cell's south-west corner).
+    """
+    analytics = get_analytics_engine()
+    if not analytics.loaded:
+        raise HTTPException(status_code=503, detail="Analytics engine is still loading")
+    filters = {
+        name: value
+        for name, value in (("status", status), ("project_type", project_type),
+                            ("vintage_year", vintage_year), ("geo_cell", geo_cell))
+        if value is not None
+    }
+    try:
+        return analytics.query(metric, parse_aggregates(aggs), group_by=group_by, filters=filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/analytics/stats")
+async def analytics_stats():
+    """Analytics engine load state, row counts and memory"""
+    return get_analytics_engine().stats()
+
+
 # ==================== DASHBOARD ENDPOINTS ====================
 
 @app.get("/api/dashboard/{project_id}")
-async def get_project_dashboard(project_id: int, db: Session = Depends(get_db)):
+async def get_project_dashboard(request: Request, project_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get comprehensive dashboard metrics for a project"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    return await get_response_cache().respond(
+        request, [project_tag(project_id)], lambda: build_project_dashboard(project_id, db)
+    )
+
+
+@app.get("/api/dashboard/{project_id}/metrics")
+async def get_project_metrics(
+    request: Request,
+    project_id: int,
+    metrics: str = ",".join(TREND_METRICS),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: str = "auto",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Monitoring time series of a project for the dashboard charts
+    
+    metrics: comma-separated (ndvi, evi, canopy_cover, soil_moisture,
+    biomass_estimate, cloud_coverage, vegetation_coverage, health_score,
+    estimated_carbon_credits). Defaults to the last year. resolution: raw,
+    day, week or auto (raw up to two weeks, daily up to ~13 months, weekly beyond).
+    """
+    # Without an explicit end the window moves with the clock: the URL
+    # does not identify the response, so it is not cached
+    cacheable = end is not None
+    end = naive_utc(end) if end else datetime.utcnow()
+    start = naive_utc(start) if start else end - timedelta(days=365)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    async def build():
+        if not await db.get(Project, project_id):
+            raise HTTPException(status_code=404, detail="Project not found")
+        try:
+            return await asyncio.to_thread(
+                get_metrics_store().query, project_id, [m.strip() for m in metrics.split(",") if m.strip()],
+                start, end, resolution
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if not cacheable:
+        return await build()
+    return await get_response_cache().respond(request, [project_tag(project_id)], build)
+
+
+async def build_project_dashboard(project_id: int, db: AsyncSession) -> dict:
+    """Dashboard metrics straight from the database (cache miss path)"""
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    carbon_credit = db.query(CarbonCredit).filter(
-        CarbonCredit.project_id == project_id
-    ).first()
+    carbon_credit = (await db.execute(
+        select(CarbonCredit).where(CarbonCredit.project_id == project_id)
+    )).scalars().first()
     
     # Calculate metrics
     metrics = {
@@ -602,6 +998,8 @@ async def get_project_dashboard(project_id: int, db: Session = Depends(get_db)):
             "vegetation_health": project.vegetation_health or "Excellent",
             "marine_life": "Recovering"
         },
+        # Weekly rollups of the last year from the metrics store
+        "trends": await asyncio.to_thread(get_metrics_store().trends, project_id),
         "community_benefits": {
             "families_supported": 156,
             "jobs_created": 12,
@@ -0,0 +1,316 @@
+"""
+Blue Carbon Registry - management commands
+
+Usage:
+    python manage.py migrate [--revision head]
+    python manage.py check-query-plans
+    python manage.py rebuild-stats [--dry-run]
+    python manage.py import-projects FILE [--format csv|ndjson] [--batch-size 1000]
+    python manage.py export [TABLE ...] [--format ndjson|csv] [--output-dir .]
+    python manage.py snapshot [TABLE ...] [--full] [--compact]
+    python manage.py snapshot-report [--by project_type,vintage_year,location,status]
+    python manage.py gc-images [--dry-run]
+    python manage.py make-scene LATITUDE LONGITUDE [--size 4096] [--acquired YYYY-MM-DD]
+    python manage.py bench-raster [--sizes 2048,8192] [--tile-pixels 65536,262144,1048576]
+    python manage.py rollup-metrics [PROJECT_ID ...]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import date
+
+from sqlalchemy import select, func, text
+
+from database import engine, SessionLocal, AsyncSessionLocal, async_engine, run_migrations
+from models import Project, Verification, BlockchainTransaction, CarbonCredit, MarketListing
+from services.project_import import detect_format, import_projects, DEFAULT_BATCH_SIZE
+from services.registry_export import EXPORT_TABLES, export_table
+from services import analytics_snapshot
+from services.image_store import collect_garbage
+from services import raster_engine
+from services.metrics_store import get_metrics_store
+
+
+# Hot queries issued by the API and the index each one must use
+HOT_QUERIES = [
+    (
+        "list_projects by status",
+        select(Project.id).where(Project.status == "verified").order_by(Project.id).limit(100),
+        "ix_projects_status_id",
+    ),
+    (
+        "active marketplace listings",
+        select(MarketListing.id).where(MarketListing.status == "active").order_by(MarketListing.id).limit(100),
+        "ix_market_listings_status_id",
+    ),
+    (
+        "active listing average price",
+        select(func.avg(MarketListing.asking_price)).where(MarketListing.status == "active"),
+        "ix_market_listings_status_id",
+    ),
+    (
+        "verifications for project",
+        select(Verification.id).where(Verification.project_id == 1),
+        "ix_verifications_project_id_status",
+    ),
+    (
+        "carbon credits for project",
+        select(CarbonCredit.id).where(CarbonCredit.project_id == 1),
+        "ix_carbon_credits_project_id_status",
+    ),
+    (
+        "blockchain transactions for project",
+        select(BlockchainTransaction.id).where(BlockchainTransaction.project_id == 1),
+        "ix_blockchain_transactions_project_id_status",
+    ),
+]
+
+
+def explain(connection, statement) -> str:
+    """Query plan text for a statement on the current backend"""
+    sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        return "\n".join(str(row[-1]) for row in rows)
+    rows = connection.execute(text(f"EXPLAIN {sql}")).fetchall()
+    return "\n".join(str(row[0]) for row in rows)
+
+
+def check_query_plans() -> int:
+    """Fail (non-zero) if any hot query does not use its expected index"""
+    failures = 0
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            # Small tables would otherwise be sequentially scanned regardless of indexes
+            connection.execute(text("SET enable_seqscan = off"))
+        for name, statement, index_name in HOT_QUERIES:
+            plan = explain(connection, statement)
+            if index_name in plan:
+                print(f"✅ {name}: uses {index_name}")
+            else:
+                failures += 1
+                print(f"❌ {name}: expected {index_name}\n   {plan.replace(chr(10), chr(10) + '   ')}")
+    return 1 if failures else 0
+
+
+def rebuild_stats(apply: bool) -> int:
+    """Recompute marketplace running totals; non-zero in dry-run mode if they drifted"""
+    from services.marketplace_service import rebuild_market_statistics
+
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await rebuild_market_statistics(db, apply=apply)
+        finally:
+            await async_engine.dispose()
+
+    report = asyncio.run(run())
+    for name, value in report["expected"].items():
+        print(f"   {name}: stored={report['stored'][name]} expected={value}")
+    if not report["drift"]:
+        print("✅ Marketplace statistics are consistent")
+        return 0
+    print(f"⚠️ Drift detected: {report['drift']}")
+    if apply:
+        print("✅ Marketplace statistics rebuilt")
+        return 0
+    return 1
+
+
+def import_projects_file(path: str, fmt, batch_size: int) -> int:
+    """Bulk-import projects; non-zero if any row was rejected"""
+    try:
+        fmt = detect_format(path, fmt)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    with open(path, encoding="utf-8-sig", newline="") as lines:
+        for event in import_projects(lines, fmt, batch_size):
+            if "error" in event:
+                print(f"❌ row {event['row']}: {event['error']}")
+            elif "batch" in event:
+                print(f"✅ batch {event['batch']}: {event['inserted']} projects")
+            else:
+                summary = event["summary"]
+                print(f"📦 Imported {summary['inserted']}/{summary['rows']} rows "
+                      f"in {summary['elapsed_seconds']}s ({summary['rows_per_second']} rows/s)")
+    return 1 if summary["failed"] else 0
+
+
+def export_tables(tables, fmt: str, output_dir: str) -> int:
+    """Write each table to <output_dir>/<table>.<fmt>"""
+    unknown = [table for table in tables if table not in EXPORT_TABLES]
+    if unknown:
+        print(f"❌ Unknown table(s): {', '.join(unknown)}")
+        return 2
+    os.makedirs(output_dir, exist_ok=True)
+    for table in tables or EXPORT_TABLES:
+        path = os.path.join(output_dir, f"{table}.{fmt}")
+        with open(path, "w", encoding="utf-8", newline="") as output:
+            for chunk in export_table(table, fmt):
+                output.write(chunk)
+        print(f"✅ {table} -> {path} ({os.path.getsize(path)} bytes)")
+    return 0
+
+
+def snapshot_tables(tables, full: bool, compact: bool) -> int:
+    """Append changed rows to the Arrow analytics snapshot"""
+    unknown = [table for table in tables if table not in analytics_snapshot.SNAPSHOT_TABLES]
+    if unknown:
+        print(f"❌ Unknown table(s): {', '.join(unknown)}")
+        return 2
+    try:
+        for report in analytics_snapshot.snapshot_all(tables, full=full):
+            print(f"✅ {report['table']}: +{report['rows']} rows, {report['parts']} part(s), "
+                  f"high-water mark {report['high_water_mark']}")
+            if compact:
+                compacted = analytics_snapshot.compact_table(report["table"])
+                print(f"   compacted to {compacted['rows']} rows in {compacted['parts']} part(s)")
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+def snapshot_report(group_by: str) -> int:
+    """Print carbon totals grouped by the given columns, read from the snapshot"""
+    try:
+        rows = analytics_snapshot.carbon_totals([key.strip() for key in group_by.split(",") if key.strip()])
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    for row in rows:
+        print(json.dumps(row))
+    return 0
+
+
+def gc_images(apply: bool) -> int:
+    """Delete unreferenced stored images, orphaned files and stale partial uploads"""
+    with SessionLocal() as session:
+        report = collect_garbage(session, apply=apply)
+    verb = "Removed" if apply else "Would remove"
+    print(f"{'✅' if apply else '🔍'} {verb} {report['unreferenced_blobs']} unreferenced blob(s), "
+          f"{report['orphan_files']} orphaned file(s), {report['stale_temp_files']} partial upload(s); "
+          f"{report['bytes_freed']} bytes")
+    return 0
+
+
+def make_scene(latitude: float, longitude: float, size: int, acquired, seed: int) -> int:
+    """Write a synthetic satellite scene centred on a point (development data)"""
+    pixel_degrees = 0.0001
+    scene_id = f"synthetic-{latitude:.4f}-{longitude:.4f}-{acquired or date.today()}"
+    path = raster_engine.write_synthetic_scene(
+        raster_engine.scene_dir(), scene_id,
+        west=longitude - size * pixel_degrees / 2,
+        north=latitude + size * pixel_degrees / 2,
+        width=size, height=size, pixel_degrees=pixel_degrees,
+        acquired=acquired, seed=seed,
+    )
+    print(f"✅ Wrote {size}x{size} scene to {path}")
+    return 0
+
+
+def bench_raster(sizes: str, tile_pixels: str, directory) -> int:
+    """NDVI/EVI throughput on synthetic scenes, in megapixels per second"""
+    results = raster_engine.benchmark(
+        [int(size) for size in sizes.split(",")],
+        [int(tile) for tile in tile_pixels.split(",")],
+        directory,
+    )
+    for result in results:
+        print(f"📊 {result['scene_pixels'] / 1e6:7.1f} MP scene, {result['tile_pixels']:>8} px tiles: "
+              f"{result['seconds']:7.3f}s, {result['megapixels_per_second']:6.1f} MP/s")
+    return 0
+
+
+def rollup_metrics(project_ids) -> int:
+    """Rebuild daily and weekly metric rollups from the raw points"""
+    store = get_metrics_store()
+    for project_id in project_ids or store.project_ids():
+        points = store.rebuild_rollups(project_id)
+        print(f"✅ Project {project_id}: rollups rebuilt from {points} point(s)")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Blue Carbon Registry management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="Apply database migrations")
+    migrate.add_argument("--revision", default="head")
+
+    commands.add_parser("check-query-plans", help="Verify hot queries use their indexes")
+
+    rebuild = commands.add_parser("rebuild-stats", help="Recompute marketplace statistics and report drift")
+    rebuild.add_argument("--dry-run", action="store_true", help="Only report drift, do not rewrite")
+
+    import_parser = commands.add_parser("import-projects", help="Bulk-import projects from CSV or NDJSON")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"])
+    import_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    export = commands.add_parser("export", help="Export registry tables as NDJSON or CSV")
+    export.add_argument("tables", nargs="*", metavar="TABLE", help=f"default: all of {', '.join(EXPORT_TABLES)}")
+    export.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    export.add_argument("--output-dir", default=".")
+
+    snapshot = commands.add_parser("snapshot", help="Write changed rows to the Arrow analytics snapshot")
+    snapshot.add_argument("tables", nargs="*", metavar="TABLE",
+                          help=f"default: all of {', '.join(analytics_snapshot.SNAPSHOT_TABLES)}")
+    snapshot.add_argument("--full", action="store_true", help="Discard existing parts and snapshot everything")
+    snapshot.add_argument("--compact", action="store_true", help="Merge parts into one deduplicated part")
+
+    report = commands.add_parser("snapshot-report", help="Carbon totals from the analytics snapshot")
+    report.add_argument("--by", default="project_type", help=f"comma-separated: {','.join(analytics_snapshot.CARBON_GROUPS)}")
+
+    gc = commands.add_parser("gc-images", help="Delete stored images no project references")
+    gc.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+
+    scene = commands.add_parser("make-scene", help="Write a synthetic satellite scene around a point")
+    scene.add_argument("latitude", type=float)
+    scene.add_argument("longitude", type=float)
+    scene.add_argument("--size", type=int, default=4096, help="pixels per side (10 m pixels)")
+    scene.add_argument("--acquired", type=date.fromisoformat, help="acquisition date (default: today)")
+    scene.add_argument("--seed", type=int, default=0)
+
+    bench = commands.add_parser("bench-raster", help="Benchmark the raster engine on synthetic scenes")
+    bench.add_argument("--sizes", default="2048,8192", help="comma-separated scene sizes (pixels per side)")
+    bench.add_argument("--tile-pixels", default="65536,262144,1048576")
+    bench.add_argument("--dir", help="where to write the temporary scenes (default: system temp)")
+
+    rollup = commands.add_parser("rollup-metrics", help="Rebuild metric rollups from raw points")
+    rollup.add_argument("project_ids", nargs="*", type=int, metavar="PROJECT_ID", help="default: every project with metrics")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        run_migrations(args.revision)
+        print(f"✅ Database migrated to {args.revision}")
+        return 0
+    if args.command == "check-query-plans":
+        return check_query_plans()
+    if args.command == "rebuild-stats":
+        return rebuild_stats(apply=not args.dry_run)
+    if args.command == "import-projects":
+        return import_projects_file(args.path, args.format, args.batch_size)
+    if args.command == "export":
+        return export_tables(args.tables, args.format, args.output_dir)
+    if args.command == "snapshot":
+        return snapshot_tables(args.tables, args.full, args.compact)
+    if args.command == "snapshot-report":
+        return snapshot_report(args.by)
+    if args.command == "gc-images":
+        return gc_images(apply=not args.dry_run)
+    if args.command == "make-scene":
+        return make_scene(args.latitude, args.longitude, args.size, args.acquired, args.seed)
+    if args.command == "bench-raster":
+        return bench_raster(args.sizes, args.tile_pixels, args.dir)
+    if args.command == "rollup-metrics":
+        return rollup_metrics(args.project_ids)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Indexes for hot filter columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_projects_status_id", "projects", ["status", "id"])
+    op.create_index("ix_verifications_project_id_status", "verifications", ["project_id", "status"])
+    op.create_index(
+        "ix_blockchain_transactions_project_id_status",
+        "blockchain_transactions",
+        ["project_id", "status"]
+    )
+    op.create_index("ix_carbon_credits_project_id_status", "carbon_credits", ["project_id", "status"])
+    op.create_index("ix_market_listings_status_id", "market_listings", ["status", "id"])
+    op.create_index("ix_market_listings_carbon_credit_id", "market_listings", ["carbon_credit_id"])
+
+
+def downgrade():
+    op.drop_index("ix_market_listings_carbon_credit_id", table_name="market_listings")
+    op.drop_index("ix_market_listings_status_id", table_name="market_listings")
+    op.drop_index("ix_carbon_credits_project_id_status", table_name="carbon_credits")
+    op.drop_index("ix_blockchain_transactions_project_id_status", table_name="blockchain_transactions")
+    op.drop_index("ix_verifications_project_id_status", table_name="verifications")
+    op.drop_index("ix_projects_status_id", table_name="projects")
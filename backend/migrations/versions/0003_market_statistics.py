@@ -0,0 +1,54 @@
+"""Incrementally maintained marketplace statistics
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "market_statistics",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("active_listings", sa.Integer(), nullable=False),
+        sa.Column("active_price_sum", sa.Float(), nullable=False),
+        sa.Column("total_credits", sa.Float(), nullable=False),
+        sa.Column("total_volume", sa.Float(), nullable=False),
+        sa.Column("total_transactions", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_table(
+        "market_volume_hourly",
+        sa.Column("hour", sa.DateTime(), primary_key=True),
+        sa.Column("volume", sa.Float(), nullable=False),
+        sa.Column("transactions", sa.Integer(), nullable=False),
+    )
+    # Seed the running totals from existing rows; `manage.py rebuild-stats`
+    # recomputes them (including hourly volume) at any time
+    op.execute(
+        """
+        INSERT INTO market_statistics
+            (id, active_listings, active_price_sum, total_credits, total_volume, total_transactions, updated_at)
+        SELECT 1,
+            (SELECT COUNT(*) FROM market_listings WHERE status = 'active'),
+            (SELECT COALESCE(SUM(asking_price), 0) FROM market_listings WHERE status = 'active'),
+            (SELECT COALESCE(SUM(total_credits), 0) FROM carbon_credits),
+            (SELECT COALESCE(SUM(available_amount * asking_price), 0) FROM market_listings WHERE status = 'sold'),
+            (SELECT COUNT(*) FROM market_listings WHERE status = 'sold'),
+            CURRENT_TIMESTAMP
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("market_volume_hourly")
+    op.drop_table("market_statistics")
@@ -0,0 +1,38 @@
+"""updated_at on carbon credits and listings, high-water mark indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("carbon_credits", sa.Column("updated_at", sa.DateTime()))
+    op.add_column("market_listings", sa.Column("updated_at", sa.DateTime()))
+    op.execute("UPDATE carbon_credits SET updated_at = created_at")
+    op.execute("UPDATE market_listings SET updated_at = COALESCE(sold_at, listed_at)")
+
+    op.create_index("ix_projects_updated_at_id", "projects", ["updated_at", "id"])
+    op.create_index("ix_carbon_credits_updated_at_id", "carbon_credits", ["updated_at", "id"])
+    op.create_index("ix_market_listings_updated_at_id", "market_listings", ["updated_at", "id"])
+    op.create_index("ix_blockchain_transactions_created_at_id", "blockchain_transactions", ["created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_blockchain_transactions_created_at_id", table_name="blockchain_transactions")
+    op.drop_index("ix_market_listings_updated_at_id", table_name="market_listings")
+    op.drop_index("ix_carbon_credits_updated_at_id", table_name="carbon_credits")
+    op.drop_index("ix_projects_updated_at_id", table_name="projects")
+    with op.batch_alter_table("market_listings") as batch:
+        batch.drop_column("updated_at")
+    with op.batch_alter_table("carbon_credits") as batch:
+        batch.drop_column("updated_at")
@@ -0,0 +1,48 @@
+"""Content-addressed image storage with per-project references
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "image_blobs",
+        sa.Column("sha256", sa.String(64), primary_key=True),
+        sa.Column("path", sa.String(500), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("content_type", sa.String(100)),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_table(
+        "project_images",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("sha256", sa.String(64), sa.ForeignKey("image_blobs.sha256"), nullable=False),
+        sa.Column("filename", sa.String(255)),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_project_images_id", "project_images", ["id"])
+    op.create_index("ix_project_images_project_id_sha256", "project_images", ["project_id", "sha256"], unique=True)
+    op.create_index("ix_project_images_sha256", "project_images", ["sha256"])
+
+
+def downgrade():
+    op.drop_index("ix_project_images_sha256", table_name="project_images")
+    op.drop_index("ix_project_images_project_id_sha256", table_name="project_images")
+    op.drop_index("ix_project_images_id", table_name="project_images")
+    op.drop_table("project_images")
+    op.drop_table("image_blobs")
@@ -0,0 +1,48 @@
+"""Persistent analysis job queue
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "analysis_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("progress", sa.Float(), nullable=False),
+        sa.Column("stage", sa.String(100)),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.JSON()),
+        sa.Column("result", sa.JSON()),
+        sa.Column("error", sa.Text()),
+        sa.Column("run_after", sa.DateTime()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("started_at", sa.DateTime()),
+        sa.Column("finished_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_analysis_jobs_id", "analysis_jobs", ["id"])
+    op.create_index("ix_analysis_jobs_status_priority_id", "analysis_jobs", ["status", "priority", "id"])
+    op.create_index("ix_analysis_jobs_project_id", "analysis_jobs", ["project_id"])
+
+
+def downgrade():
+    op.drop_index("ix_analysis_jobs_project_id", table_name="analysis_jobs")
+    op.drop_index("ix_analysis_jobs_status_priority_id", table_name="analysis_jobs")
+    op.drop_index("ix_analysis_jobs_id", table_name="analysis_jobs")
+    op.drop_table("analysis_jobs")
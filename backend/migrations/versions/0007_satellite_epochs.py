@@ -0,0 +1,43 @@
+"""Satellite epoch history
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "satellite_epochs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("acquired", sa.Date(), nullable=False),
+        sa.Column("grid", sa.JSON()),
+        sa.Column("raster_path", sa.String(500)),
+        sa.Column("ndvi", sa.Float()),
+        sa.Column("evi", sa.Float()),
+        sa.Column("canopy_cover", sa.Float()),
+        sa.Column("cloud_coverage", sa.Float()),
+        sa.Column("clear_pixels", sa.Integer(), nullable=False),
+        sa.Column("vegetation_increase", sa.Float()),
+        sa.Column("analysis", sa.JSON()),
+        sa.Column("change", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_satellite_epochs_id", "satellite_epochs", ["id"])
+    op.create_index("ix_satellite_epochs_project_id_acquired", "satellite_epochs", ["project_id", "acquired"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_satellite_epochs_project_id_acquired", table_name="satellite_epochs")
+    op.drop_index("ix_satellite_epochs_id", table_name="satellite_epochs")
+    op.drop_table("satellite_epochs")
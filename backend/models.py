@@ -1,8 +1,8 @@
 """
 SQLAlchemy database models
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from database import Base
 
@@ -23,8 +23,10 @@ class Project(Base):
     
     # Image and analysis data
     site_image_path = Column(String(500))
-    image_analysis_result = Column(JSON)
-    satellite_analysis_result = Column(JSON)
+    # Large JSON blobs: only loaded on request (undefer_group("analysis")),
+    # and reading them unloaded raises instead of issuing a hidden query
+    image_analysis_result = deferred(Column(JSON), group="analysis", raiseload=True)
+    satellite_analysis_result = deferred(Column(JSON), group="analysis", raiseload=True)
     
     # Carbon data
     estimated_carbon_credits = Column(Float)
@@ -42,6 +44,13 @@ class Project(Base):
     verifications = relationship("Verification", back_populates="project")
     blockchain_transactions = relationship("BlockchainTransaction", back_populates="project")
     carbon_credits = relationship("CarbonCredit", back_populates="project")
+    
+    __table_args__ = (
+        # list_projects: filter by status, page by id
+        Index("ix_projects_status_id", "status", "id"),
+        # Incremental analytics snapshots scan by high-water mark
+        Index("ix_projects_updated_at_id", "updated_at", "id"),
+    )
 
 
 class Verification(Base):
@@ -58,6 +67,10 @@ class Verification(Base):
     
     # Relationship
     project = relationship("Project", back_populates="verifications")
+    
+    __table_args__ = (
+        Index("ix_verifications_project_id_status", "project_id", "status"),
+    )
 
 
 class BlockchainTransaction(Base):
@@ -76,6 +89,11 @@ class BlockchainTransaction(Base):
     
     # Relationship
     project = relationship("Project", back_populates="blockchain_transactions")
+    
+    __table_args__ = (
+        Index("ix_blockchain_transactions_project_id_status", "project_id", "status"),
+        Index("ix_blockchain_transactions_created_at_id", "created_at", "id"),
+    )
 
 
 class CarbonCredit(Base):
@@ -93,22 +111,142 @@ class CarbonCredit(Base):
     registry = Column(String(100))
     status = Column(String(50), default="active")  # active, retired, sold
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     project = relationship("Project", back_populates="carbon_credits")
     market_listings = relationship("MarketListing", back_populates="carbon_credit")
+    
+    __table_args__ = (
+        Index("ix_carbon_credits_project_id_status", "project_id", "status"),
+        Index("ix_carbon_credits_updated_at_id", "updated_at", "id"),
+    )
 
 
 class MarketListing(Base):
     __tablename__ = "market_listings"
     
     id = Column(Integer, primary_key=True, index=True)
-    carbon_credit_id = Column(Integer, ForeignKey("carbon_credits.id"), nullable=False)
+    carbon_credit_id = Column(Integer, ForeignKey("carbon_credits.id"), nullable=False, index=True)
     asking_price = Column(Float, nullable=False)
     available_amount = Column(Float, nullable=False)
     status = Column(String(50), default="active")  # active, sold, cancelled
     listed_at = Column(DateTime, default=datetime.utcnow)
     sold_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
     carbon_credit = relationship("CarbonCredit", back_populates="market_listings")
+    
+    __table_args__ = (
+        # Listings and statistics filter on status; listings page by id
+        Index("ix_market_listings_status_id", "status", "id"),
+        Index("ix_market_listings_updated_at_id", "updated_at", "id"),
+    )
+
+
+class MarketStatistics(Base):
+    """Single-row running totals for the marketplace, maintained on every write"""
+    __tablename__ = "market_statistics"
+    
+    id = Column(Integer, primary_key=True)
+    active_listings = Column(Integer, nullable=False, default=0)
+    active_price_sum = Column(Float, nullable=False, default=0.0)  # sum of asking_price over active listings
+    total_credits = Column(Float, nullable=False, default=0.0)  # sum of CarbonCredit.total_credits
+    total_volume = Column(Float, nullable=False, default=0.0)  # sold amount * asking price, all time
+    total_transactions = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class MarketVolumeHourly(Base):
+    """Sales volume per hour, used for the rolling 24h volume"""
+    __tablename__ = "market_volume_hourly"
+    
+    hour = Column(DateTime, primary_key=True)  # truncated to the hour (UTC)
+    volume = Column(Float, nullable=False, default=0.0)
+    transactions = Column(Integer, nullable=False, default=0)
+
+
+class ImageBlob(Base):
+    """An uploaded image stored once under the SHA-256 of its content"""
+    __tablename__ = "image_blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String(500), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    content_type = Column(String(100))
+    ref_count = Column(Integer, nullable=False, default=0)  # number of projects referencing it
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ProjectImage(Base):
+    """A project's reference to a stored image"""
+    __tablename__ = "project_images"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    sha256 = Column(String(64), ForeignKey("image_blobs.sha256"), nullable=False)
+    filename = Column(String(255))  # name of the latest upload
+    ref_count = Column(Integer, nullable=False, default=1)  # times this project uploaded it
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    blob = relationship("ImageBlob")
+    
+    __table_args__ = (
+        Index("ix_project_images_project_id_sha256", "project_id", "sha256", unique=True),
+        Index("ix_project_images_sha256", "sha256"),
+    )
+
+
+class AnalysisJob(Base):
+    """A queued site-image or satellite analysis, run by the background job workers"""
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    kind = Column(String(50), nullable=False)  # site_image, satellite
+    status = Column(String(50), nullable=False, default="queued")  # queued, running, succeeded, failed
+    priority = Column(Integer, nullable=False, default=0)  # higher runs first
+    progress = Column(Float, nullable=False, default=0.0)  # 0..1
+    stage = Column(String(100))
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    payload = Column(JSON)
+    result = Column(JSON)
+    error = Column(Text)
+    run_after = Column(DateTime, default=datetime.utcnow)  # retries are delayed by backoff
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # Workers claim the highest-priority due job
+        Index("ix_analysis_jobs_status_priority_id", "status", "priority", "id"),
+        Index("ix_analysis_jobs_project_id", "project_id"),
+    )
+
+
+class SatelliteEpoch(Base):
+    """One analyzed satellite acquisition of a project's footprint"""
+    __tablename__ = "satellite_epochs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    acquired = Column(Date, nullable=False)
+    grid = Column(JSON)  # tile grid of the raster: zoom, x, y, columns, rows
+    raster_path = Column(String(500))  # NDVI raster (.npy, NaN = masked); NULL when fully clouded
+    ndvi = Column(Float)
+    evi = Column(Float)
+    canopy_cover = Column(Float)
+    cloud_coverage = Column(Float)
+    clear_pixels = Column(Integer, nullable=False, default=0)
+    vegetation_increase = Column(Float)  # vs the previous clear epoch
+    analysis = Column(JSON)
+    change = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_satellite_epochs_project_id_acquired", "project_id", "acquired", unique=True),
+    )
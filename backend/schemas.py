@@ -2,8 +2,8 @@
 Pydantic schemas for request/response validation
 """
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, List
+from datetime import date, datetime
 
 
 # Project Schemas
@@ -40,6 +40,12 @@ class ProjectResponse(BaseModel):
         from_attributes = True
 
 
+class ProjectDetailResponse(ProjectResponse):
+    """ProjectResponse plus the analysis blobs (`?include=analysis`)"""
+    image_analysis_result: Optional[Dict[str, Any]]
+    satellite_analysis_result: Optional[Dict[str, Any]]
+
+
 # Verification Schemas
 class VerificationCreate(BaseModel):
     verification_type: str
@@ -111,6 +117,20 @@ class MarketListingResponse(BaseModel):
         from_attributes = True
 
 
+# Portfolio Valuation Schemas
+class PortfolioHolding(BaseModel):
+    carbon_credits: float = Field(..., ge=0)
+    vintage_year: Optional[int] = None
+    project_type: Optional[str] = None
+    holding_id: Optional[str] = None
+
+
+class BatchPortfolioRequest(BaseModel):
+    holdings: List[PortfolioHolding]
+    vintage_multipliers: Dict[int, float] = {}
+    project_type_multipliers: Dict[str, float] = {}
+
+
 # Analysis Schemas
 class AnalysisResult(BaseModel):
     vegetation_index: float
@@ -119,6 +139,43 @@ class AnalysisResult(BaseModel):
     analysis_timestamp: datetime
 
 
+class AnalysisJobResponse(BaseModel):
+    id: int
+    project_id: int
+    kind: str
+    status: str
+    priority: int
+    progress: float
+    stage: Optional[str]
+    attempts: int
+    max_attempts: int
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+
+class SatelliteEpochResponse(BaseModel):
+    id: int
+    project_id: int
+    acquired: date
+    ndvi: Optional[float]
+    evi: Optional[float]
+    canopy_cover: Optional[float]
+    cloud_coverage: Optional[float]
+    clear_pixels: int
+    vegetation_increase: Optional[float]
+    change: Optional[Dict[str, Any]]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class DashboardMetrics(BaseModel):
     project_overview: Dict[str, Any]
     key_metrics: Dict[str, Any]
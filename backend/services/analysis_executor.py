@@ -0,0 +1,303 @@
+"""
+Process-pool executor for CPU-bound analysis
+Runs image and satellite analysis in worker processes so request handlers
+never block the event loop. The queue is bounded (callers are rejected
+instead of piling up), every task has a timeout, timed-out or abandoned
+tasks are cancelled cooperatively, and large result arrays come back
+through shared memory instead of being pickled.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(os.cpu_count() or 1)))
+# Tasks allowed to wait for a worker on top of the ones running
+ANALYSIS_QUEUE_DEPTH = int(os.getenv("ANALYSIS_QUEUE_DEPTH", str(2 * ANALYSIS_WORKERS)))
+ANALYSIS_TASK_TIMEOUT = float(os.getenv("ANALYSIS_TASK_TIMEOUT", "120"))
+
+
+class AnalysisQueueFull(RuntimeError):
+    pass
+
+
+class AnalysisTimeout(TimeoutError):
+    pass
+
+
+class AnalysisCancelled(Exception):
+    pass
+
+
+# ---------- worker side ----------
+
+# One cancel flag per task slot, shared with every worker process
+_cancel_flags = None
+_current_slot: Optional[int] = None
+
+
+def _init_worker(cancel_flags):
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+
+
+def raise_if_cancelled():
+    """Called by analysis code between units of work (tiles, strips)"""
+    if _cancel_flags is not None and _current_slot is not None and _cancel_flags[_current_slot]:
+        raise AnalysisCancelled("Analysis task was cancelled")
+
+
+def _publish_arrays(arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Copy arrays into one new shared memory block; returns its descriptor"""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = -(-offset // 64) * 64  # keep every array 64-byte aligned
+        layout[name] = {"dtype": array.dtype.str, "shape": array.shape, "offset": offset}
+        offset += array.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1), name=f"bcr-{uuid.uuid4().hex[:16]}")
+    try:
+        for name, array in arrays.items():
+            spec = layout[name]
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf, offset=spec["offset"])[...] = array
+    finally:
+        block.close()
+    return {"name": block.name, "arrays": layout}
+
+
+def _run_task(slot: int, function: Callable, args: tuple, kwargs: dict) -> Dict[str, Any]:
+    """
+    Worker entry point. `function` returns a JSON-able result, optionally
+    with a dict of NumPy arrays as a second element.
+    """
+    global _current_slot
+    _current_slot = slot
+    started = time.perf_counter()
+    try:
+        raise_if_cancelled()
+        output = function(*args, **kwargs)
+    finally:
+        _current_slot = None
+    value, arrays = output if isinstance(output, tuple) else (output, None)
+    return {
+        "value": value,
+        "shared": _publish_arrays(arrays) if arrays else None,
+        "seconds": time.perf_counter() - started,
+        "pid": os.getpid(),
+    }
+
+
+# ---------- caller side ----------
+
+class SharedArrays:
+    """
+    Result arrays mapped from a worker's shared memory block (no copy)
+
+    The arrays are views into the block: copy what must outlive close().
+    """
+
+    def __init__(self, descriptor: Dict[str, Any]):
+        self._block = shared_memory.SharedMemory(name=descriptor["name"])
+        self.arrays = {
+            name: np.ndarray(tuple(spec["shape"]), dtype=np.dtype(spec["dtype"]), buffer=self._block.buf, offset=spec["offset"])
+            for name, spec in descriptor["arrays"].items()
+        }
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def close(self):
+        if self._block is None:
+            return
+        self.arrays = {}
+        self._block.close()
+        self._block.unlink()
+        self._block = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _discard_result(done: Future):
+    if not done.cancelled() and done.exception() is None and done.result()["shared"]:
+        SharedArrays(done.result()["shared"]).close()
+
+
+@dataclass
+class AnalysisResult:
+    value: Any
+    arrays: Optional[SharedArrays] = None
+    seconds: float = 0.0
+    worker_pid: Optional[int] = None
+
+    def close(self):
+        if self.arrays is not None:
+            self.arrays.close()
+
+
+@dataclass
+class _Counters:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    cancelled: int = 0
+    pool_restarts: int = 0
+    busy_seconds: float = 0.0
+    by_task: Dict[str, int] = field(default_factory=dict)
+
+
+class AnalysisExecutor:
+    """Bounded process pool with per-task timeouts and cooperative cancellation"""
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS, queue_depth: int = ANALYSIS_QUEUE_DEPTH, timeout: float = ANALYSIS_TASK_TIMEOUT):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_depth)
+        self.timeout = timeout
+        context = multiprocessing.get_context(os.getenv("ANALYSIS_START_METHOD", "spawn"))
+        self._context = context
+        self._cancel_flags = context.RawArray("b", self.capacity)
+        self._free_slots: List[int] = list(range(self.capacity))
+        self._in_flight = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.counters = _Counters()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._context,
+                initializer=_init_worker,
+                initargs=(self._cancel_flags,),
+            )
+        return self._pool
+
+    def _restart_pool(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self.counters.pool_restarts += 1
+
+    async def run(self, function: Callable, *args, timeout: Optional[float] = None, **kwargs) -> AnalysisResult:
+        """
+        Run `function(*args, **kwargs)` in a worker process
+
+        Raises AnalysisQueueFull when every slot is taken, AnalysisTimeout
+        after `timeout` seconds, and propagates the task's own exceptions.
+        If the awaiting coroutine is cancelled, the task is cancelled too.
+        Close the returned result to release its shared memory.
+        """
+        if not self._free_slots:
+            self.counters.rejected += 1
+            raise AnalysisQueueFull(f"Analysis queue is full ({self.capacity} tasks in flight)")
+        slot = self._free_slots.pop()
+        self._cancel_flags[slot] = 0
+        self._in_flight += 1
+        self.counters.submitted += 1
+        name = getattr(function, "__name__", str(function))
+        self.counters.by_task[name] = self.counters.by_task.get(name, 0) + 1
+        loop = asyncio.get_running_loop()
+
+        try:
+            future: Future = self._get_pool().submit(_run_task, slot, function, args, kwargs)
+        except BrokenProcessPool:
+            self._restart_pool()
+            future = self._get_pool().submit(_run_task, slot, function, args, kwargs)
+
+        # The slot is only reused once the worker has let go of it
+        future.add_done_callback(lambda done: loop.call_soon_threadsafe(self._release, slot))
+        try:
+            waiter = asyncio.wrap_future(future)
+            # Abandoned tasks still finish; consume their outcome quietly
+            waiter.add_done_callback(lambda done: done.cancelled() or done.exception())
+            output = await asyncio.wait_for(asyncio.shield(waiter), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self._abandon(slot, future)
+            self.counters.timed_out += 1
+            raise AnalysisTimeout(f"{name} did not finish within {timeout or self.timeout:g}s")
+        except asyncio.CancelledError:
+            self._abandon(slot, future)
+            self.counters.cancelled += 1
+            raise
+        except AnalysisCancelled:
+            self.counters.cancelled += 1
+            raise
+        except BrokenProcessPool:
+            self.counters.failed += 1
+            self._restart_pool()
+            raise
+        except Exception:
+            self.counters.failed += 1
+            raise
+
+        self.counters.completed += 1
+        self.counters.busy_seconds += output["seconds"]
+        arrays = SharedArrays(output["shared"]) if output["shared"] else None
+        return AnalysisResult(value=output["value"], arrays=arrays, seconds=output["seconds"], worker_pid=output["pid"])
+
+    def _abandon(self, slot: int, future: Future):
+        # Queued tasks are dropped; running ones stop at their next check, and
+        # a result that arrives anyway has its shared memory released
+        if not future.cancel():
+            self._cancel_flags[slot] = 1
+            future.add_done_callback(_discard_result)
+
+    def _release(self, slot: int):
+        self._cancel_flags[slot] = 0
+        self._free_slots.append(slot)
+        self._in_flight -= 1
+
+    def shutdown(self):
+        if self._pool is not None:
+            for slot in range(self.capacity):
+                self._cancel_flags[slot] = 1
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        counters = self.counters
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "running": min(self._in_flight, self.workers),
+            "queued": max(0, self._in_flight - self.workers),
+            "task_timeout_seconds": self.timeout,
+            "submitted": counters.submitted,
+            "completed": counters.completed,
+            "failed": counters.failed,
+            "rejected": counters.rejected,
+            "timed_out": counters.timed_out,
+            "cancelled": counters.cancelled,
+            "pool_restarts": counters.pool_restarts,
+            "busy_seconds": round(counters.busy_seconds, 3),
+            "by_task": dict(counters.by_task),
+        }
+
+
+_analysis_executor = None
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """Get or create the analysis executor (worker processes start on first use)"""
+    global _analysis_executor
+    if _analysis_executor is None:
+        _analysis_executor = AnalysisExecutor()
+    return _analysis_executor
+
+
+def shutdown_analysis_executor():
+    global _analysis_executor
+    if _analysis_executor is not None:
+        _analysis_executor.shutdown()
+        _analysis_executor = None
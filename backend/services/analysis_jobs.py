@@ -0,0 +1,340 @@
+"""
+Persistent analysis job queue
+Analysis requests are stored as AnalysisJob rows and picked up by a small
+pool of background workers in priority order. Progress, results and errors
+are written back to the row; failed attempts are retried with exponential
+backoff, and jobs orphaned by a crashed worker are requeued.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from models import AnalysisJob, Project
+from services.analysis_executor import AnalysisQueueFull, ANALYSIS_TASK_TIMEOUT, ANALYSIS_WORKERS
+from services.carbon_calculator import calculate_carbon_credits
+from services.image_analysis import analyze_site_image, analyze_satellite_image
+from services.metrics_store import get_metrics_store
+from services.response_cache import get_response_cache, project_tag
+from services.satellite_epochs import EPOCH_METRICS, update_project_epochs
+
+JOB_KINDS = ("site_image", "satellite")
+JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", str(ANALYSIS_WORKERS)))
+JOB_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("ANALYSIS_JOB_RETRY_BACKOFF", "5"))  # seconds, doubled per attempt
+JOB_POLL_SECONDS = float(os.getenv("ANALYSIS_JOB_POLL_SECONDS", "2"))
+# A running job untouched for this long belongs to a dead worker
+JOB_LEASE_SECONDS = float(os.getenv("ANALYSIS_JOB_LEASE_SECONDS", str(ANALYSIS_TASK_TIMEOUT + 60)))
+JOB_ORPHAN_SWEEP_SECONDS = float(os.getenv("ANALYSIS_JOB_ORPHAN_SWEEP_SECONDS", str(JOB_LEASE_SECONDS / 2)))
+# Executor full: try again shortly without spending an attempt
+QUEUE_FULL_DELAY = 1.0
+
+
+class PermanentJobError(Exception):
+    """Failure that retrying cannot fix"""
+    pass
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    project_id: int,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    priority: int = 0
+) -> AnalysisJob:
+    """Add a job to the queue (caller commits, then wakes the runner)"""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown analysis job kind: {kind}")
+    job = AnalysisJob(
+        project_id=project_id,
+        kind=kind,
+        status="queued",
+        priority=priority,
+        progress=0.0,
+        stage="queued",
+        attempts=0,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        payload=payload or {},
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    await db.flush()
+    return job
+
+
+Report = Callable[[float, str], Awaitable[None]]
+
+
+async def _load_project(db: AsyncSession, project_id: int) -> Project:
+    project = await db.get(Project, project_id)
+    if project is None:
+        raise PermanentJobError("Project not found")
+    return project
+
+
+async def _run_site_image(db: AsyncSession, job: AnalysisJob, report: Report) -> Dict[str, Any]:
+    project = await _load_project(db, job.project_id)
+    image_path = job.payload.get("image_path")
+    if not image_path or not os.path.exists(image_path):
+        raise PermanentJobError("Uploaded image is no longer stored")
+    await report(0.2, "analyzing image")
+    analysis_result = await analyze_site_image(image_path)
+    await report(0.9, "saving results")
+    project.image_analysis_result = analysis_result
+    return {"image_path": image_path, "analysis": analysis_result}
+
+
+async def _run_satellite(db: AsyncSession, job: AnalysisJob, report: Report) -> Dict[str, Any]:
+    project = await _load_project(db, job.project_id)
+    await report(0.2, "analyzing new satellite epochs")
+    # Epochs are committed one by one; those from earlier attempts still count as new
+    satellite_result = await update_project_epochs(db, project, report=report, since=job.created_at)
+    if satellite_result is None:
+        # No imagery covers the project: simulated analysis
+        satellite_result = await analyze_satellite_image(
+            latitude=project.latitude,
+            longitude=project.longitude,
+            area=project.area
+        )
+    await report(0.8, "calculating carbon credits")
+    carbon_data = calculate_carbon_credits(
+        area=project.area,
+        vegetation_index=satellite_result.get("vegetation_index", 0.78),
+        project_type=project.project_type
+    )
+    project.satellite_analysis_result = satellite_result
+    project.estimated_carbon_credits = carbon_data["total_carbon_tons"]
+    project.vegetation_health = satellite_result.get("vegetation_health", "Excellent")
+    return {"satellite_analysis": satellite_result, "carbon_calculation": carbon_data}
+
+
+JOB_HANDLERS = {
+    "site_image": _run_site_image,
+    "satellite": _run_satellite,
+}
+
+SITE_IMAGE_METRICS = ("vegetation_coverage", "health_score")
+SIMULATED_SATELLITE_METRICS = EPOCH_METRICS + ("soil_moisture",)
+
+
+def metric_points(kind: str, result: Dict[str, Any], now: datetime) -> List[Tuple[datetime, str, float]]:
+    """Time-series points recorded from a job's result"""
+    if kind == "site_image":
+        analysis = result["analysis"]
+        return [(now, metric, analysis[metric]) for metric in SITE_IMAGE_METRICS if metric in analysis]
+    satellite_result = result["satellite_analysis"]
+    points = [(now, "estimated_carbon_credits", result["carbon_calculation"]["total_carbon_tons"])]
+    if "new_epochs" in satellite_result:
+        # Imagery: one point per newly analyzed acquisition, at its date
+        for epoch in satellite_result["new_epochs"]:
+            acquired = datetime.fromisoformat(epoch["acquired"])
+            points.extend((acquired, metric, epoch[metric]) for metric in EPOCH_METRICS)
+    else:
+        points.extend(
+            (now, metric, satellite_result[metric])
+            for metric in SIMULATED_SATELLITE_METRICS if metric in satellite_result
+        )
+    return points
+
+
+class AnalysisJobRunner:
+    """Background workers that claim queued jobs and run them"""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = max(1, workers)
+        self._wakeups: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self.counters = {"succeeded": 0, "failed": 0, "retried": 0, "deferred": 0, "requeued_orphans": 0}
+
+    async def start(self):
+        await self.requeue_orphaned()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep_orphans()))
+        print(f"✅ Analysis job runner started ({self.workers} workers)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self):
+        """Signal that a job was enqueued (other processes find it by polling)"""
+        self._wakeups.put_nowait(None)
+
+    async def _worker(self):
+        while True:
+            try:
+                job_id = await self._claim()
+                if job_id is not None:
+                    await self._run(job_id)
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeups.get(), JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Analysis job worker error: {e}")
+                await asyncio.sleep(JOB_POLL_SECONDS)
+
+    async def _sweep_orphans(self):
+        """One sweep per runner (not per worker): a lease lasts JOB_LEASE_SECONDS"""
+        while True:
+            await asyncio.sleep(JOB_ORPHAN_SWEEP_SECONDS)
+            try:
+                await self.requeue_orphaned()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Orphaned job sweep failed: {e}")
+
+    async def _claim(self) -> Optional[int]:
+        """Atomically move the best due job from queued to running"""
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            candidates = (await db.execute(
+                select(AnalysisJob.id)
+                .where(AnalysisJob.status == "queued", AnalysisJob.run_after <= now)
+                .order_by(AnalysisJob.priority.desc(), AnalysisJob.id)
+                .limit(self.workers)
+            )).scalars().all()
+            for job_id in candidates:
+                # Conditional update: only one worker (in any process) wins the row
+                claimed = await db.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == job_id, AnalysisJob.status == "queued")
+                    .values(
+                        status="running",
+                        attempts=AnalysisJob.attempts + 1,
+                        progress=0.05,
+                        stage="started",
+                        started_at=now,
+                        updated_at=now,
+                    )
+                )
+                if claimed.rowcount == 1:
+                    await db.commit()
+                    return job_id
+        return None
+
+    async def _run(self, job_id: int):
+        async with AsyncSessionLocal() as db:
+            job = await db.get(AnalysisJob, job_id)
+
+            async def report(progress: float, stage: str):
+                job.progress = progress
+                job.stage = stage
+                await db.commit()
+
+            try:
+                result = await JOB_HANDLERS[job.kind](db, job, report)
+            except asyncio.CancelledError:
+                # Runner shutting down: hand the job back without spending an attempt
+                await asyncio.shield(self._requeue(db, job_id, delay=0, refund=True, stage="requeued at shutdown"))
+                raise
+            except AnalysisQueueFull:
+                self.counters["deferred"] += 1
+                await self._requeue(db, job_id, delay=QUEUE_FULL_DELAY, refund=True, stage="waiting for a worker")
+            except PermanentJobError as e:
+                await self._fail(db, job_id, str(e))
+            except Exception as e:
+                if job.attempts < job.max_attempts:
+                    self.counters["retried"] += 1
+                    delay = JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+                    await self._requeue(db, job_id, delay=delay, refund=False, stage="retrying", error=str(e))
+                else:
+                    await self._fail(db, job_id, str(e))
+            else:
+                # Project updates and the job's completion commit together
+                job.status = "succeeded"
+                job.progress = 1.0
+                job.stage = "done"
+                job.result = result
+                job.error = None
+                job.finished_at = datetime.utcnow()
+                await db.commit()
+                self.counters["succeeded"] += 1
+                await self._record_metrics(job.project_id, job.kind, result)
+
+    async def _record_metrics(self, project_id: int, kind: str, result: Dict[str, Any]):
+        """Append the job's metrics to the project's time series (best effort)"""
+        try:
+            points = metric_points(kind, result, datetime.utcnow())
+            await asyncio.to_thread(get_metrics_store().append, project_id, points)
+        except Exception as e:
+            print(f"⚠️  Could not record metrics for project {project_id}: {e}")
+            return
+        # Dashboards cached after the commit but before the append would miss the new points
+        get_response_cache().invalidate([project_tag(project_id)])
+
+    async def _requeue(self, db: AsyncSession, job_id: int, delay: float, refund: bool, stage: str, error: Optional[str] = None):
+        await db.rollback()
+        values = {
+            "status": "queued",
+            "stage": stage,
+            "progress": 0.0,
+            "run_after": datetime.utcnow() + timedelta(seconds=delay),
+        }
+        if refund:
+            values["attempts"] = AnalysisJob.attempts - 1
+        if error is not None:
+            values["error"] = error
+        await db.execute(update(AnalysisJob).where(AnalysisJob.id == job_id).values(**values))
+        await db.commit()
+
+    async def _fail(self, db: AsyncSession, job_id: int, error: str):
+        await db.rollback()
+        await db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id)
+            .values(status="failed", stage="failed", error=error, finished_at=datetime.utcnow())
+        )
+        await db.commit()
+        self.counters["failed"] += 1
+
+    async def requeue_orphaned(self):
+        """Requeue running jobs whose worker stopped updating them"""
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+        orphaned = (AnalysisJob.status == "running", AnalysisJob.updated_at < cutoff)
+        async with AsyncSessionLocal() as db:
+            # Read first: the common case (nothing orphaned) takes no write lock
+            if (await db.execute(select(AnalysisJob.id).where(*orphaned).limit(1))).first() is None:
+                return
+            # Jobs that keep killing their worker stop once out of attempts
+            await db.execute(
+                update(AnalysisJob)
+                .where(*orphaned, AnalysisJob.attempts >= AnalysisJob.max_attempts)
+                .values(status="failed", stage="failed", error="Worker lost on every attempt", finished_at=datetime.utcnow())
+            )
+            result = await db.execute(
+                update(AnalysisJob)
+                .where(*orphaned)
+                .values(status="queued", stage="requeued after worker loss", progress=0.0, run_after=datetime.utcnow())
+            )
+            await db.commit()
+        if result.rowcount:
+            self.counters["requeued_orphans"] += result.rowcount
+            print(f"⚠️  Requeued {result.rowcount} orphaned analysis job(s)")
+
+    async def stats(self) -> Dict[str, Any]:
+        async with AsyncSessionLocal() as db:
+            by_status = dict((await db.execute(
+                select(AnalysisJob.status, func.count()).group_by(AnalysisJob.status)
+            )).all())
+        return {"workers": self.workers, "jobs": by_status, **self.counters}
+
+
+_job_runner = None
+
+def get_job_runner() -> AnalysisJobRunner:
+    """Get or create the analysis job runner (started from app startup)"""
+    global _job_runner
+    if _job_runner is None:
+        _job_runner = AnalysisJobRunner()
+    return _job_runner
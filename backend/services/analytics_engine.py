@@ -0,0 +1,585 @@
+"""
+In-memory columnar analytics engine
+Keeps the analytical columns of projects, carbon credits and listings in
+NumPy arrays, loaded once from the database and then updated from commit
+notifications, so grouped sums/counts/averages/percentiles never touch SQL.
+Writes made by other processes (CLI imports, other API workers) are picked
+up by a periodic catch-up on each table's updated_at high-water mark.
+"""
+import asyncio
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from database import engine as db_engine
+from models import Project, CarbonCredit, MarketListing
+from services.change_tracking import Change, on_commit
+
+GEO_CELL_DEGREES = float(os.getenv("ANALYTICS_GEO_CELL_DEGREES", "1.0"))
+LOAD_BATCH_ROWS = 50000
+INITIAL_CAPACITY = 1024
+RESULT_CACHE_SIZE = 256
+# Catch-up with writes from other processes; 0 disables
+CATCHUP_SECONDS = float(os.getenv("ANALYTICS_CATCHUP_SECONDS", "30"))
+# Rows are re-read from this far before the high-water mark, for late commits and clock skew
+CATCHUP_OVERLAP_SECONDS = float(os.getenv("ANALYTICS_CATCHUP_OVERLAP_SECONDS", "60"))
+AGGREGATES = ("sum", "count", "avg", "min", "max")
+PERCENTILE = re.compile(r"^p(\d{1,2}(?:\.\d+)?)$")
+
+
+def geo_cell_key(latitude: Optional[float], longitude: Optional[float]) -> Optional[int]:
+    """Integer key of the GEO_CELL_DEGREES grid cell containing a point"""
+    if latitude is None or longitude is None:
+        return None
+    row = int(math.floor(latitude / GEO_CELL_DEGREES))
+    column = int(math.floor(longitude / GEO_CELL_DEGREES))
+    return (row + 100000) * 1000000 + (column + 100000)
+
+
+def geo_cell_label(key: int) -> str:
+    """South-west corner of a grid cell as "lat,lon" """
+    row, column = divmod(key, 1000000)
+    return f"{(row - 100000) * GEO_CELL_DEGREES:g},{(column - 100000) * GEO_CELL_DEGREES:g}"
+
+
+class ColumnTable:
+    """
+    Growable column store for one table
+
+    Numeric columns are zero-filled values plus a 0/1 presence weight (NULL
+    and deleted rows weigh 0), so grouped sums and counts are two weighted
+    bincounts with no masking. Categorical columns hold bucket numbers
+    (0 = NULL, n = categories[n - 1]) and foreign keys hold ids (-1 = NULL).
+    `version` changes on every write and keys the engine's derived caches.
+    """
+
+    def __init__(self, numeric: List[str], categorical: List[str], keys: List[str]):
+        self.size = 0
+        self.capacity = INITIAL_CAPACITY
+        self.version = 0
+        self.alive = np.zeros(self.capacity, dtype=bool)
+        self.values = {name: np.zeros(self.capacity) for name in numeric}
+        self.present = {name: np.zeros(self.capacity) for name in numeric}
+        self.buckets = {name: np.zeros(self.capacity, dtype=np.intp) for name in categorical}
+        self.keys = {name: np.full(self.capacity, -1, dtype=np.int64) for name in keys}
+        self.categories: Dict[str, list] = {name: [] for name in categorical}
+        self._lookup: Dict[str, Dict[Any, int]] = {name: {} for name in categorical}
+        self.slot_of_id = np.full(INITIAL_CAPACITY, -1, dtype=np.int64)
+
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+
+        def resize(array, fill):
+            grown = np.full(capacity, fill, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            return grown
+
+        self.alive = resize(self.alive, False)
+        self.values = {name: resize(array, 0.0) for name, array in self.values.items()}
+        self.present = {name: resize(array, 0.0) for name, array in self.present.items()}
+        self.buckets = {name: resize(array, 0) for name, array in self.buckets.items()}
+        self.keys = {name: resize(array, -1) for name, array in self.keys.items()}
+        self.capacity = capacity
+
+    def _map_ids(self, max_id: int):
+        if max_id >= len(self.slot_of_id):
+            grown = np.full(max(max_id + 1, len(self.slot_of_id) * 2), -1, dtype=np.int64)
+            grown[:len(self.slot_of_id)] = self.slot_of_id
+            self.slot_of_id = grown
+
+    def bucket(self, name: str, value) -> int:
+        if value is None:
+            return 0
+        lookup = self._lookup[name]
+        bucket = lookup.get(value)
+        if bucket is None:
+            self.categories[name].append(value)
+            bucket = lookup[value] = len(self.categories[name])
+        return bucket
+
+    def slot(self, row_id: int) -> int:
+        return int(self.slot_of_id[row_id]) if 0 <= row_id < len(self.slot_of_id) else -1
+
+    def append_columns(self, ids: np.ndarray, numeric: Dict[str, np.ndarray], categorical: Dict[str, list], keys: Dict[str, np.ndarray]):
+        """Bulk append rows that are not in the table yet (initial load)"""
+        count = len(ids)
+        if not count:
+            return
+        start, end = self.size, self.size + count
+        self._grow(end)
+        self._map_ids(int(ids.max()))
+        self.alive[start:end] = True
+        for name, values in numeric.items():
+            missing = np.isnan(values)
+            self.values[name][start:end] = np.where(missing, 0.0, values)
+            self.present[name][start:end] = ~missing
+        for name, values in categorical.items():
+            self.buckets[name][start:end] = [self.bucket(name, value) for value in values]
+        for name, values in keys.items():
+            self.keys[name][start:end] = values
+        self.slot_of_id[ids] = np.arange(start, end)
+        self.size = end
+        self.version += 1
+
+    def upsert(self, row_id: int, values: Dict[str, Any]):
+        """Insert or update one row; only the columns present in `values` change"""
+        slot = self.slot(row_id)
+        if slot < 0:
+            self._grow(self.size + 1)
+            self._map_ids(row_id)
+            slot = self.size
+            self.size += 1
+            self.slot_of_id[row_id] = slot
+        self.alive[slot] = True
+        for name, value in values.items():
+            if name in self.values:
+                self.values[name][slot] = 0.0 if value is None else float(value)
+                self.present[name][slot] = 0.0 if value is None else 1.0
+            elif name in self.buckets:
+                self.buckets[name][slot] = self.bucket(name, value)
+            elif name in self.keys:
+                self.keys[name][slot] = -1 if value is None else int(value)
+        self.version += 1
+
+    def delete(self, row_id: int):
+        slot = self.slot(row_id)
+        if slot >= 0 and self.alive[slot]:
+            self.alive[slot] = False
+            for present in self.present.values():
+                present[slot] = 0.0
+            self.version += 1
+
+    def numeric_value(self, name: str, slot: int) -> Optional[float]:
+        if slot < 0 or not self.present[name][slot]:
+            return None
+        return float(self.values[name][slot])
+
+    def live_rows(self) -> int:
+        return int(self.alive[:self.size].sum())
+
+    def nbytes(self) -> int:
+        arrays = [self.alive, self.slot_of_id]
+        for columns in (self.values, self.present, self.buckets, self.keys):
+            arrays.extend(columns.values())
+        return sum(array.nbytes for array in arrays)
+
+
+# Table layout: model, columns loaded, and how they are stored
+TABLES: Dict[str, Dict[str, Any]] = {
+    "projects": {
+        "model": Project,
+        "columns": ["id", "project_type", "status", "area", "estimated_carbon_credits", "latitude", "longitude"],
+        "numeric": ["area", "estimated_carbon_credits", "latitude", "longitude"],
+        "categorical": ["project_type", "status", "geo_cell"],
+        "keys": [],
+    },
+    "carbon_credits": {
+        "model": CarbonCredit,
+        "columns": ["id", "project_id", "status", "vintage_year", "total_credits", "total_value"],
+        "numeric": ["total_credits", "total_value"],
+        "categorical": ["status", "vintage_year"],
+        "keys": ["project_id"],
+    },
+    "market_listings": {
+        "model": MarketListing,
+        "columns": ["id", "carbon_credit_id", "status", "asking_price", "available_amount"],
+        "numeric": ["asking_price", "available_amount"],
+        "categorical": ["status"],
+        "keys": ["carbon_credit_id"],
+    },
+}
+
+# metric -> table it lives on
+METRICS = {
+    "estimated_carbon_credits": "projects",
+    "area": "projects",
+    "total_credits": "carbon_credits",
+    "total_value": "carbon_credits",
+    "asking_price": "market_listings",
+    "available_amount": "market_listings",
+}
+
+# (table, dimension) -> path of foreign keys to the table that holds it;
+# "status" is always the fact table's own status
+DIMENSIONS = {
+    "projects": {"project_type": [], "status": [], "geo_cell": []},
+    "carbon_credits": {"status": [], "vintage_year": [], "project_type": ["project_id"], "geo_cell": ["project_id"]},
+    "market_listings": {
+        "status": [],
+        "vintage_year": ["carbon_credit_id"],
+        "project_type": ["carbon_credit_id", "project_id"],
+        "geo_cell": ["carbon_credit_id", "project_id"],
+    },
+}
+KEY_TARGETS = {"project_id": "projects", "carbon_credit_id": "carbon_credits"}
+
+
+def parse_aggregates(aggs: str) -> List[str]:
+    names = [name.strip().lower() for name in aggs.split(",") if name.strip()]
+    for name in names:
+        if name not in AGGREGATES and not PERCENTILE.match(name):
+            raise ValueError(f"Unknown aggregate: {name} (use {', '.join(AGGREGATES)} or pNN)")
+    return names or ["count"]
+
+
+class AnalyticsEngine:
+    """Column stores for the analytical tables plus grouped aggregation"""
+
+    def __init__(self):
+        self.tables = self._empty_tables()
+        self.loaded = False
+        self.load_seconds = None
+        self.changes_applied = 0
+        self.result_cache_hits = 0
+        self.catch_up_rows = 0
+        self.reloads = 0
+        self.synced_at: Optional[datetime] = None
+        # Per table: newest updated_at read from the database
+        self._marks: Dict[str, Optional[datetime]] = {}
+        self._pending: List[Change] = []
+        self._lock = threading.RLock()
+        # Derived arrays/results, each stored with the table versions it was built from
+        self._joined: Dict[Tuple[str, str], Tuple[tuple, np.ndarray]] = {}
+        self._results: Dict[tuple, Tuple[tuple, list]] = {}
+
+    @staticmethod
+    def _empty_tables() -> Dict[str, ColumnTable]:
+        return {name: ColumnTable(spec["numeric"], spec["categorical"], spec["keys"]) for name, spec in TABLES.items()}
+
+    # ---------- loading and maintenance ----------
+
+    def load(self):
+        """Build the column stores from the database (run once, off the event loop)"""
+        started = time.perf_counter()
+        synced_at = datetime.utcnow()
+        tables = self._empty_tables()
+        marks = {}
+        with db_engine.connect() as connection:
+            for name, spec in TABLES.items():
+                model = spec["model"]
+                # Taken first: rows changed while streaming are at or after it
+                marks[name] = connection.scalar(select(func.max(model.updated_at)))
+                statement = select(*(getattr(model, column) for column in spec["columns"])).order_by(model.id)
+                result = connection.execution_options(stream_results=True, yield_per=LOAD_BATCH_ROWS).execute(statement)
+                for partition in result.partitions():
+                    self._append_partition(tables[name], name, spec, partition)
+        with self._lock:
+            self.tables = tables
+            self._joined.clear()
+            self._results.clear()
+            # Replay writes committed while loading; upserts are idempotent
+            pending, self._pending = self._pending, []
+            self.loaded = True
+            self._apply(pending)
+            self._marks = marks
+            self.synced_at = synced_at
+        self.load_seconds = round(time.perf_counter() - started, 3)
+        print(f"📊 Analytics engine loaded {self.row_counts()} in {self.load_seconds}s")
+
+    @staticmethod
+    def _append_partition(table: ColumnTable, name: str, spec: Dict[str, Any], rows):
+        columns = dict(zip(spec["columns"], zip(*rows)))
+        numeric = {column: np.array(columns[column], dtype=np.float64) for column in spec["numeric"]}
+        categorical = {column: columns[column] for column in spec["categorical"] if column in columns}
+        if name == "projects":
+            categorical["geo_cell"] = [
+                geo_cell_key(latitude, longitude)
+                for latitude, longitude in zip(columns["latitude"], columns["longitude"])
+            ]
+        keys = {column: np.array([-1 if value is None else value for value in columns[column]], dtype=np.int64) for column in spec["keys"]}
+        table.append_columns(np.array(columns["id"], dtype=np.int64), numeric, categorical, keys)
+
+    def catch_up(self) -> int:
+        """
+        Apply rows other processes changed since the last load or catch-up
+        (run off the event loop); returns the number of rows re-read
+
+        Rows deleted elsewhere leave no updated_at trace: when a table holds
+        more live rows than the database, it is reloaded instead.
+        """
+        synced_at = datetime.utcnow()
+        changes, marks, deleted = [], {}, False
+        with db_engine.connect() as connection:
+            for name, spec in TABLES.items():
+                model = spec["model"]
+                marks[name] = connection.scalar(select(func.max(model.updated_at)))
+                statement = select(*(getattr(model, column) for column in spec["columns"]))
+                previous = self._marks.get(name)
+                if previous is not None:
+                    statement = statement.where(model.updated_at >= previous - timedelta(seconds=CATCHUP_OVERLAP_SECONDS))
+                for row in connection.execute(statement):
+                    changes.append(Change(name, "update", dict(row._mapping)))
+                database_rows = connection.scalar(select(func.count()).select_from(model))
+                deleted = deleted or self.tables[name].live_rows() > database_rows
+        if deleted:
+            self.reloads += 1
+            self.load()
+            return 0
+        with self._lock:
+            # A local commit racing this read may be overwritten by an older
+            # row here; the row is inside the overlap, so the next pass fixes it
+            self._apply(changes)
+            self._marks = {name: marks[name] or self._marks.get(name) for name in TABLES}
+            self.catch_up_rows += len(changes)
+            self.synced_at = synced_at
+        return len(changes)
+
+    def on_changes(self, changes: List[Change]):
+        """Commit listener"""
+        with self._lock:
+            if not self.loaded:
+                self._pending.extend(change for change in changes if change.table in TABLES)
+                return
+            self._apply(changes)
+
+    def _apply(self, changes: Iterable[Change]):
+        for change in changes:
+            spec = TABLES.get(change.table)
+            row_id = change.values.get("id")
+            if spec is None or row_id is None:
+                continue
+            table = self.tables[change.table]
+            self.changes_applied += 1
+            if change.action == "delete":
+                table.delete(row_id)
+                continue
+            row = {name: change.values[name] for name in spec["columns"] if name != "id" and name in change.values}
+            if change.table == "projects" and ("latitude" in row or "longitude" in row):
+                # Partial updates fall back to the stored coordinate
+                slot = table.slot(row_id)
+                latitude = row["latitude"] if "latitude" in row else table.numeric_value("latitude", slot)
+                longitude = row["longitude"] if "longitude" in row else table.numeric_value("longitude", slot)
+                row["geo_cell"] = geo_cell_key(latitude, longitude)
+            table.upsert(row_id, row)
+
+    # ---------- queries ----------
+
+    def _versions(self, table_name: str, dimensions: Iterable[str]) -> tuple:
+        """Versions of the fact table and of every table its dimensions join to"""
+        names = {table_name}
+        for dimension in dimensions:
+            names.update(KEY_TARGETS[key] for key in DIMENSIONS[table_name].get(dimension, []))
+        return tuple((name, self.tables[name].version) for name in sorted(names))
+
+    def _dimension(self, table_name: str, dimension: str) -> Tuple[np.ndarray, list]:
+        """Bucket numbers of `dimension` for every slot of the fact table, and its labels"""
+        path = DIMENSIONS[table_name].get(dimension)
+        if path is None:
+            raise ValueError(f"Cannot group or filter {table_name} by {dimension}")
+        table = self.tables[table_name]
+        holder = table
+        for key in path:
+            holder = self.tables[KEY_TARGETS[key]]
+        labels = holder.categories[dimension]
+        if dimension == "geo_cell":
+            labels = [geo_cell_label(key) for key in labels]
+        if not path:
+            return table.buckets[dimension][:table.size], labels
+
+        # Follow the foreign keys once; reuse until a table on the path changes
+        versions = self._versions(table_name, [dimension])
+        cached = self._joined.get((table_name, dimension))
+        if cached and cached[0] == versions:
+            return cached[1], labels
+        slots = np.arange(table.size)
+        current = table
+        for key in path:
+            target = self.tables[KEY_TARGETS[key]]
+            foreign = np.where(slots >= 0, current.keys[key][np.maximum(slots, 0)], -1)
+            valid = (foreign >= 0) & (foreign < len(target.slot_of_id))
+            slots = np.where(valid, target.slot_of_id[np.where(valid, foreign, 0)], -1)
+            current = target
+        buckets = np.where(slots >= 0, current.buckets[dimension][np.maximum(slots, 0)], 0)
+        self._joined[(table_name, dimension)] = (versions, buckets)
+        return buckets, labels
+
+    def query(
+        self,
+        metric: str,
+        aggregates: List[str],
+        group_by: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate `metric` over live rows, optionally grouped by one dimension
+        and filtered by equality on dimensions
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric} (use {', '.join(METRICS)})")
+        table_name = METRICS[metric]
+        filters = filters or {}
+        started = time.perf_counter()
+        key = (metric, tuple(aggregates), group_by, tuple(sorted((name, str(value)) for name, value in filters.items())))
+        with self._lock:
+            versions = self._versions(table_name, [group_by or "", *filters])
+            cached = self._results.get(key)
+            if cached and cached[0] == versions:
+                self.result_cache_hits += 1
+                rows = cached[1]
+            else:
+                rows = self._compute(table_name, metric, aggregates, group_by, filters)
+                if len(self._results) >= RESULT_CACHE_SIZE:
+                    self._results.pop(next(iter(self._results)))
+                self._results[key] = (versions, rows)
+        return {
+            "metric": metric,
+            "table": table_name,
+            "group_by": group_by,
+            "filters": filters,
+            "rows": rows,
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def _compute(self, table_name: str, metric: str, aggregates: List[str], group_by: Optional[str], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        table = self.tables[table_name]
+        values = table.values[metric][:table.size]
+        weights = table.present[metric][:table.size]
+        for dimension, expected in filters.items():
+            buckets, labels = self._dimension(table_name, dimension)
+            wanted = [bucket for bucket, label in enumerate(labels, start=1) if str(label) == str(expected)]
+            weights = weights * (buckets == wanted[0] if len(wanted) == 1 else np.isin(buckets, wanted))
+        if group_by:
+            buckets, labels = self._dimension(table_name, group_by)
+            return _grouped(values, weights, buckets, labels, aggregates, group_by)
+        return [_summary(values, weights, aggregates)]
+
+    def row_counts(self) -> Dict[str, int]:
+        return {name: table.live_rows() for name, table in self.tables.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "load_seconds": self.load_seconds,
+            "rows": self.row_counts(),
+            "changes_applied": self.changes_applied,
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+            "catch_up_rows": self.catch_up_rows,
+            "reloads": self.reloads,
+            "pending_changes": len(self._pending),
+            "cached_results": len(self._results),
+            "result_cache_hits": self.result_cache_hits,
+            "geo_cell_degrees": GEO_CELL_DEGREES,
+            "memory_bytes": sum(table.nbytes() for table in self.tables.values()),
+        }
+
+
+def _order_statistics(ordered: np.ndarray, starts: np.ndarray, counts: np.ndarray, names: List[str]) -> Dict[str, np.ndarray]:
+    """min/max/pNN of each run ordered[start:start + count], interpolated like np.percentile"""
+    last = np.maximum(counts - 1, 0)
+    columns = {}
+    for name in names:
+        if not len(ordered):
+            columns[name] = np.full(len(counts), np.nan)
+            continue
+        if name == "min":
+            position = starts.astype(np.float64)
+        elif name == "max":
+            position = (starts + last).astype(np.float64)
+        else:
+            position = starts + last * (float(name[1:]) / 100)
+        low = np.minimum(np.floor(position).astype(np.int64), len(ordered) - 1)
+        high = np.minimum(np.ceil(position).astype(np.int64), len(ordered) - 1)
+        columns[name] = ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+    return columns
+
+
+def _is_order_statistic(name: str) -> bool:
+    return name in ("min", "max") or bool(PERCENTILE.match(name))
+
+
+def _summary(values: np.ndarray, weights: np.ndarray, aggregates: List[str]) -> Dict[str, Any]:
+    count = int(round(weights.sum()))
+    total = float(np.dot(values, weights))
+    order_stats = [name for name in aggregates if _is_order_statistic(name)]
+    if order_stats and count:
+        ordered = np.sort(values[weights > 0])
+        order_columns = _order_statistics(ordered, np.array([0]), np.array([count]), order_stats)
+    row = {}
+    for name in aggregates:
+        if name == "count":
+            row[name] = count
+        elif count == 0:
+            row[name] = None
+        elif name == "sum":
+            row[name] = round(total, 4)
+        elif name == "avg":
+            row[name] = round(total / count, 4)
+        else:
+            row[name] = round(float(order_columns[name][0]), 4)
+    return row
+
+
+def _grouped(values: np.ndarray, weights: np.ndarray, buckets: np.ndarray, labels: list, aggregates: List[str], group_by: str) -> List[Dict[str, Any]]:
+    groups = len(labels) + 1
+    counts = np.bincount(buckets, weights=weights, minlength=groups)
+    columns: Dict[str, np.ndarray] = {"count": counts}
+    if "sum" in aggregates or "avg" in aggregates:
+        columns["sum"] = np.bincount(buckets, weights=values * weights, minlength=groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            columns["avg"] = columns["sum"] / counts
+
+    order_stats = [name for name in aggregates if _is_order_statistic(name)]
+    if order_stats:
+        # Sort by value, then stably by bucket (radix sort when buckets fit in
+        # 16 bits); each bucket is then a contiguous, ordered run
+        selected = weights > 0
+        kept_values, kept_buckets = values[selected], buckets[selected]
+        order = np.argsort(kept_values)
+        sort_keys = kept_buckets[order]
+        if groups <= np.iinfo(np.uint16).max:
+            sort_keys = sort_keys.astype(np.uint16)
+        ordered = kept_values[order[np.argsort(sort_keys, kind="stable")]]
+        run_counts = np.bincount(kept_buckets, minlength=groups)
+        starts = np.concatenate(([0], np.cumsum(run_counts)[:-1]))
+        columns.update(_order_statistics(ordered, starts, run_counts, order_stats))
+
+    rows = []
+    for bucket in np.flatnonzero(counts > 0):
+        row = {group_by: labels[bucket - 1] if bucket else None}
+        for name in aggregates:
+            value = columns[name][bucket]
+            row[name] = int(round(value)) if name == "count" else round(float(value), 4)
+        rows.append(row)
+    return rows
+
+
+_analytics_engine = None
+
+def get_analytics_engine() -> AnalyticsEngine:
+    """Get or create the analytics engine (registers its commit listener)"""
+    global _analytics_engine
+    if _analytics_engine is None:
+        _analytics_engine = AnalyticsEngine()
+        on_commit(_analytics_engine.on_changes)
+    return _analytics_engine
+
+
+async def start_analytics_engine():
+    """
+    Load the column stores in a worker thread (writes committed meanwhile are
+    replayed), then catch up with other processes every CATCHUP_SECONDS
+    """
+    analytics = get_analytics_engine()
+    try:
+        await asyncio.to_thread(analytics.load)
+    except Exception as e:
+        print(f"⚠️  Analytics engine failed to load: {e}")
+        return
+    while CATCHUP_SECONDS > 0:
+        await asyncio.sleep(CATCHUP_SECONDS)
+        try:
+            await asyncio.to_thread(analytics.catch_up)
+        except Exception as e:
+            print(f"⚠️  Analytics catch-up failed: {e}")
@@ -0,0 +1,243 @@
+"""
+Columnar analytics snapshots
+Copies OLTP tables into Arrow IPC files so analytical group-bys run off the
+live database. Each run appends a part file holding only the rows changed
+since the previous run's high-water mark; readers memory-map the parts
+(zero-copy) and keep the newest version of every row.
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import select, and_, or_, Integer, Float, DateTime, JSON
+
+from database import engine, BACKEND_DIR
+from models import Project, CarbonCredit, MarketListing, BlockchainTransaction
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# table -> high-water mark column (rows are appended or updated by it)
+SNAPSHOT_TABLES = {
+    "projects": (Project.__table__, "updated_at"),
+    "carbon_credits": (CarbonCredit.__table__, "updated_at"),
+    "market_listings": (MarketListing.__table__, "updated_at"),
+    "blockchain_transactions": (BlockchainTransaction.__table__, "created_at"),
+}
+MANIFEST_NAME = "manifest.json"
+BATCH_ROWS = 10000
+# Rows stamped within this many seconds of the run may still belong to open
+# transactions; leave them for the next run so none are skipped
+SETTLE_SECONDS = float(os.getenv("ANALYTICS_SNAPSHOT_SETTLE_SECONDS", "5"))
+
+
+def snapshot_dir() -> str:
+    return os.getenv("ANALYTICS_SNAPSHOT_DIR", os.path.join(BACKEND_DIR, "analytics_snapshots"))
+
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for analytics snapshots. Install with: pip install pyarrow")
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    # Strings, text and JSON (stored as JSON text)
+    return pa.string()
+
+
+def arrow_schema(table) -> "pa.Schema":
+    return pa.schema([pa.field(column.name, _arrow_type(column)) for column in table.columns])
+
+
+def _record_batch(table, schema, rows) -> "pa.RecordBatch":
+    columns = list(zip(*rows)) if rows else [[] for _ in table.columns]
+    arrays = []
+    for column, values in zip(table.columns, columns):
+        if isinstance(column.type, JSON):
+            values = [None if value is None else json.dumps(value) for value in values]
+        arrays.append(pa.array(values, type=_arrow_type(column)))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _load_manifest(table_dir: str) -> Dict[str, Any]:
+    path = os.path.join(table_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"high_water_mark": None, "last_id": None, "parts": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _next_part_file(manifest: Dict[str, Any]) -> str:
+    # Part numbers only grow, also across compactions
+    number = manifest.get("next_part", len(manifest["parts"]) + 1)
+    manifest["next_part"] = number + 1
+    return f"part-{number:05d}.arrow"
+
+
+def _save_manifest(table_dir: str, manifest: Dict[str, Any]):
+    path = os.path.join(table_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def snapshot_table(name: str, full: bool = False) -> Dict[str, Any]:
+    """
+    Append rows changed since the last run as a new part file
+
+    full=True drops existing parts and snapshots the whole table.
+    """
+    _require_pyarrow()
+    table, mark_name = SNAPSHOT_TABLES[name]
+    mark, row_id = table.c[mark_name], table.c.id
+    table_dir = os.path.join(snapshot_dir(), name)
+    os.makedirs(table_dir, exist_ok=True)
+
+    manifest = _load_manifest(table_dir)
+    if full:
+        for part in manifest["parts"]:
+            path = os.path.join(table_dir, part["file"])
+            if os.path.exists(path):
+                os.remove(path)
+        manifest = {"high_water_mark": None, "last_id": None, "parts": [], "next_part": manifest.get("next_part", 1)}
+
+    cutoff = datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+    statement = select(table).where(mark <= cutoff).order_by(mark, row_id)
+    if manifest["high_water_mark"]:
+        # (mark, id) is a total order, so rows sharing the previous mark are
+        # neither skipped nor copied twice
+        previous = datetime.fromisoformat(manifest["high_water_mark"])
+        statement = statement.where(or_(mark > previous, and_(mark == previous, row_id > manifest["last_id"])))
+
+    started = time.perf_counter()
+    schema = arrow_schema(table)
+    part_file = _next_part_file(manifest)
+    part_path = os.path.join(table_dir, part_file)
+    rows_written, last_row = 0, None
+    mark_index = list(table.columns.keys()).index(mark_name)
+
+    with engine.connect() as connection, pa.OSFile(part_path + ".tmp", "wb") as sink:
+        with ipc.new_file(sink, schema) as writer:
+            result = connection.execution_options(stream_results=True, yield_per=BATCH_ROWS).execute(statement)
+            for partition in result.partitions():
+                writer.write_batch(_record_batch(table, schema, partition))
+                rows_written += len(partition)
+                last_row = partition[-1]
+
+    if not rows_written:
+        os.remove(part_path + ".tmp")
+        _save_manifest(table_dir, manifest)
+        return {"table": name, "rows": 0, "parts": len(manifest["parts"]), "high_water_mark": manifest["high_water_mark"]}
+
+    os.replace(part_path + ".tmp", part_path)
+    manifest["high_water_mark"] = last_row[mark_index].isoformat()
+    manifest["last_id"] = last_row.id
+    manifest["parts"].append({
+        "file": part_file,
+        "rows": rows_written,
+        "high_water_mark": manifest["high_water_mark"],
+        "created_at": datetime.utcnow().isoformat(),
+    })
+    _save_manifest(table_dir, manifest)
+    return {
+        "table": name,
+        "rows": rows_written,
+        "parts": len(manifest["parts"]),
+        "high_water_mark": manifest["high_water_mark"],
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def read_table(name: str) -> "pa.Table":
+    """
+    Current snapshot of a table: every part memory-mapped (zero-copy),
+    concatenated, keeping only the newest version of each row
+    """
+    _require_pyarrow()
+    table, _ = SNAPSHOT_TABLES[name]
+    table_dir = os.path.join(snapshot_dir(), name)
+    parts = [
+        ipc.open_file(pa.memory_map(os.path.join(table_dir, part["file"]))).read_all()
+        for part in _load_manifest(table_dir)["parts"]
+    ]
+    if not parts:
+        return arrow_schema(table).empty_table()
+    combined = pa.concat_tables(parts)
+    if len(parts) == 1:
+        return combined
+    # Later parts hold later versions: keep the last occurrence of each id
+    positions = pa.array(range(len(combined)), type=pa.int64())
+    latest = combined.append_column("_position", positions).group_by("id").aggregate([("_position", "max")])
+    keep = pc.sort_indices(latest["_position_max"])
+    return combined.take(pc.take(latest["_position_max"], keep))
+
+
+def compact_table(name: str) -> Dict[str, Any]:
+    """Rewrite a table's parts as a single deduplicated part"""
+    _require_pyarrow()
+    table_dir = os.path.join(snapshot_dir(), name)
+    manifest = _load_manifest(table_dir)
+    if len(manifest["parts"]) <= 1:
+        return {"table": name, "rows": sum(part["rows"] for part in manifest["parts"]), "parts": len(manifest["parts"])}
+
+    current = read_table(name)
+    part_file = _next_part_file(manifest)
+    with pa.OSFile(os.path.join(table_dir, part_file), "wb") as sink:
+        with ipc.new_file(sink, current.schema) as writer:
+            writer.write_table(current, max_chunksize=BATCH_ROWS)
+    old_parts = manifest["parts"]
+    manifest["parts"] = [{
+        "file": part_file,
+        "rows": current.num_rows,
+        "high_water_mark": manifest["high_water_mark"],
+        "created_at": datetime.utcnow().isoformat(),
+    }]
+    _save_manifest(table_dir, manifest)
+    for part in old_parts:
+        os.remove(os.path.join(table_dir, part["file"]))
+    return {"table": name, "rows": current.num_rows, "parts": 1}
+
+
+CARBON_GROUPS = ("project_type", "vintage_year", "location", "status")
+
+
+def carbon_totals(group_by: List[str]) -> List[Dict[str, Any]]:
+    """
+    Carbon credit totals grouped by project/credit attributes, from the snapshot
+
+    Groups: project_type, vintage_year, location (region), status (credit status)
+    """
+    _require_pyarrow()
+    unknown = set(group_by) - set(CARBON_GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown group(s): {', '.join(sorted(unknown))}")
+    credits = read_table("carbon_credits").select(
+        ["project_id", "total_credits", "available_credits", "retired_credits", "total_value", "vintage_year", "status"]
+    )
+    projects = read_table("projects").select(["id", "project_type", "location"])
+    joined = credits.join(projects, keys="project_id", right_keys="id")
+    totals = joined.group_by(list(group_by)).aggregate([
+        ("total_credits", "sum"),
+        ("available_credits", "sum"),
+        ("retired_credits", "sum"),
+        ("total_value", "sum"),
+        ("project_id", "count_distinct"),
+    ])
+    return totals.sort_by([(key, "ascending") for key in group_by]).to_pylist()
+
+
+def snapshot_all(tables: Optional[List[str]] = None, full: bool = False) -> List[Dict[str, Any]]:
+    return [snapshot_table(name, full=full) for name in (tables or SNAPSHOT_TABLES)]
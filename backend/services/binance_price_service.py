@@ -2,28 +2,156 @@
 Binance API Integration for Real-Time Carbon Credit Pricing
 Uses Binance API to get cryptocurrency prices and apply to carbon credits
 """
-import requests
+import httpx
 import asyncio
-from typing import Dict, Any, Optional
+import json
+import time
+from dataclasses import dataclass, fields, replace
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
 from datetime import datetime
 import os
 
+from .price_candles import CandleStore
+from .price_stream import get_price_broadcaster
+from .price_scheduler import PriceFeedScheduler
+
+# Connection pool shared by every request the service makes; keep-alive
+# connections are reused across ticks instead of re-doing TCP/TLS each call
+HTTP_MAX_CONNECTIONS = int(os.getenv("BINANCE_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("BINANCE_MAX_KEEPALIVE", "10"))
+HTTP_TIMEOUT = float(os.getenv("BINANCE_TIMEOUT", "5"))
+
+DEFAULT_SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "APTUSDT"]
+
+# BTC level at which carbon trades at its base price; also the fallback BTC price
+REFERENCE_BTC_PRICE = 43000.0
+CORRELATION_FACTOR = 0.2
+CARBON_SYMBOL = "CARBON"
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Immutable carbon market view built once per updater tick"""
+    current_price: float
+    price_change_24h: float
+    price_change_percent: float
+    high_24h: float
+    low_24h: float
+    open_24h: float
+    history_seconds: float
+    market_sentiment: str
+    demand_level: str
+    btc_price: float
+    btc_change_percent: float
+    prices: Mapping[str, float]
+    taken_at: datetime
+    taken_at_ts: float
+    degraded: bool = False
+    degraded_reason: Optional[str] = None
+
+    def age_seconds(self) -> float:
+        """Seconds since the snapshot was built"""
+        return round(max(0.0, time.time() - self.taken_at_ts), 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain serializable form, used to share snapshots across processes"""
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data["prices"] = dict(self.prices)
+        data["taken_at"] = self.taken_at.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MarketSnapshot":
+        data = dict(data)
+        data["prices"] = MappingProxyType(dict(data["prices"]))
+        data["taken_at"] = datetime.fromisoformat(data["taken_at"])
+        return cls(**data)
+
+    def to_market_data(self) -> Dict[str, Any]:
+        """Render as the market data payload returned by the API"""
+        return {
+            "current_price": self.current_price,
+            "price_change_24h": self.price_change_24h,
+            "price_change_percent": self.price_change_percent,
+            "high_24h": self.high_24h,
+            "low_24h": self.low_24h,
+            "open_24h": self.open_24h,
+            "history_seconds": self.history_seconds,
+            "market_sentiment": self.market_sentiment,
+            "demand_level": self.demand_level,
+            "crypto_influence": {
+                "btc_price": self.btc_price,
+                "btc_change_percent": self.btc_change_percent,
+                "correlation_factor": CORRELATION_FACTOR
+            },
+            "last_updated": self.taken_at.isoformat(),
+            "snapshot_age_seconds": self.age_seconds(),
+            "degraded": self.degraded
+        }
+
+
+def _build_transport() -> Optional[httpx.AsyncBaseTransport]:
+    """Select the upstream transport (BINANCE_UPSTREAM=local uses the offline stand-in)"""
+    if os.getenv("BINANCE_UPSTREAM", "binance").lower() == "local":
+        from .local_price_upstream import LocalPriceUpstream
+        return LocalPriceUpstream(latency=float(os.getenv("BINANCE_LOCAL_LATENCY", "0"))).transport()
+    return None
+
+
 class BinancePriceService:
     """Service to fetch real-time prices from Binance and calculate carbon credit values"""
     
-    def __init__(self):
-        self.base_url = "https://api.binance.com/api/v3"
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        timeout: float = HTTP_TIMEOUT
+    ):
+        self.base_url = base_url or os.getenv("BINANCE_BASE_URL", "https://api.binance.com/api/v3")
         self.base_carbon_price = 45.0  # Base price in USD
         self.price_cache = {}
         self.last_update = None
-        
-    async def get_crypto_price(self, symbol: str = "BTCUSDT") -> Optional[float]:
+        self.timeout = timeout
+        self._transport = transport if transport is not None else _build_transport()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._snapshot: Optional[MarketSnapshot] = None
+        self.candles = {"BTCUSDT": CandleStore(), CARBON_SYMBOL: CandleStore()}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                transport=self._transport,
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 2.0)),
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=30.0
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_crypto_price(
+        self,
+        symbol: str = "BTCUSDT",
+        timeout: Optional[float] = None
+    ) -> Optional[float]:
         """Get current cryptocurrency price from Binance"""
         try:
-            url = f"{self.base_url}/ticker/price"
-            params = {"symbol": symbol}
-            
-            response = requests.get(url, params=params, timeout=5)
+            response = await self.client.get(
+                "/ticker/price",
+                params={"symbol": symbol},
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+            )
             response.raise_for_status()
             
             data = response.json()
@@ -37,120 +165,163 @@ class BinancePriceService:
             print(f"❌ Failed to fetch {symbol} price: {e}")
             return self.price_cache.get(symbol)
     
-    async def get_multiple_prices(self, symbols: list = None) -> Dict[str, float]:
-        """Get multiple cryptocurrency prices"""
+    async def get_multiple_prices(
+        self,
+        symbols: list = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, float]:
+        """Get multiple cryptocurrency prices concurrently"""
         if symbols is None:
-            symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "APTUSDT"]
+            symbols = DEFAULT_SYMBOLS
         
-        try:
-            url = f"{self.base_url}/ticker/price"
-            response = requests.get(url, timeout=5)
-            response.raise_for_status()
-            
-            all_prices = response.json()
-            
-            # Filter for requested symbols
-            filtered_prices = {}
-            for item in all_prices:
-                if item["symbol"] in symbols:
-                    filtered_prices[item["symbol"]] = float(item["price"])
-            
-            # Update cache
-            self.price_cache.update(filtered_prices)
-            self.last_update = datetime.utcnow()
-            
-            return filtered_prices
-        except Exception as e:
-            print(f"❌ Failed to fetch multiple prices: {e}")
-            return {symbol: self.price_cache.get(symbol, 0) for symbol in symbols}
+        # Fan out one request per symbol over the shared pool; each call
+        # already falls back to the cached price on failure
+        prices = await asyncio.gather(
+            *(self.get_crypto_price(symbol, timeout=timeout) for symbol in symbols)
+        )
+        return {symbol: price or 0 for symbol, price in zip(symbols, prices)}
+
+    async def fetch_prices(self, symbols: list, timeout: Optional[float] = None) -> Dict[str, float]:
+        """Fetch exactly the given symbols in one request; raises on any failure"""
+        response = await self.client.get(
+            "/ticker/price",
+            params={"symbols": json.dumps(symbols, separators=(",", ":"))},
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+        )
+        response.raise_for_status()
+        prices = {item["symbol"]: float(item["price"]) for item in response.json()}
+        
+        self.price_cache.update(prices)
+        self.last_update = datetime.utcnow()
+        return prices
+
+    def carbon_price_for(self, btc_price: float) -> float:
+        """Carbon credit price implied by the BTC price (20% correlation to the reference level)"""
+        btc_deviation = (btc_price - REFERENCE_BTC_PRICE) / REFERENCE_BTC_PRICE * 100
+        return self.base_carbon_price * (1 + btc_deviation * CORRELATION_FACTOR / 100)
+
+    def record_prices(self, prices: Dict[str, float], ts: Optional[float] = None):
+        """Feed fetched prices into the rolling candle store"""
+        btc_price = prices.get("BTCUSDT")
+        if not btc_price:
+            return
+        ts = ts if ts is not None else time.time()
+        self.candles["BTCUSDT"].record(btc_price, ts)
+        self.candles[CARBON_SYMBOL].record(self.carbon_price_for(btc_price), ts)
+
+    def get_candles(self, symbol: str, resolution: int, limit: Optional[int] = None) -> list:
+        """OHLC candles for a tracked symbol"""
+        return self.candles[symbol].candles(resolution, limit)
+
+    def build_snapshot(self, prices: Dict[str, float]) -> "MarketSnapshot":
+        """Compute carbon market data from prices and the candle store (no I/O)"""
+        btc_price = prices.get("BTCUSDT") or REFERENCE_BTC_PRICE
+        current_carbon_price = self.carbon_price_for(btc_price)
+        
+        # 24h open/high/low come from the rolling candles; before any tick has
+        # been recorded there is no history, so the window is flat
+        btc_window = self.candles["BTCUSDT"].window_24h()
+        carbon_window = self.candles[CARBON_SYMBOL].window_24h()
+        btc_change_percent = btc_window["change_percent"] if btc_window else 0.0
+        if carbon_window:
+            carbon_price_change = carbon_window["change"]
+            carbon_change_percent = carbon_window["change_percent"]
+            high_24h = carbon_window["high"]
+            low_24h = carbon_window["low"]
+            open_24h = carbon_window["open"]
+            window_seconds = carbon_window["window_seconds"]
+        else:
+            carbon_price_change = carbon_change_percent = 0.0
+            high_24h = low_24h = open_24h = current_carbon_price
+            window_seconds = 0.0
+        
+        sentiment, demand_level = _market_sentiment(carbon_change_percent)
+        
+        taken_at = datetime.utcnow()
+        return MarketSnapshot(
+            current_price=round(current_carbon_price, 2),
+            price_change_24h=round(carbon_price_change, 2),
+            price_change_percent=round(carbon_change_percent, 2),
+            high_24h=round(high_24h, 2),
+            low_24h=round(low_24h, 2),
+            open_24h=round(open_24h, 2),
+            history_seconds=window_seconds,
+            market_sentiment=sentiment,
+            demand_level=demand_level,
+            btc_price=btc_price,
+            btc_change_percent=round(btc_change_percent, 2),
+            prices=MappingProxyType(dict(prices)),
+            taken_at=taken_at,
+            taken_at_ts=time.time(),
+        )
+
+    async def refresh_snapshot(self) -> "MarketSnapshot":
+        """Fetch prices once and atomically publish a new market snapshot"""
+        prices = await self.get_multiple_prices()
+        return self.apply_prices(prices)
+
+    def apply_prices(self, prices: Dict[str, float]) -> "MarketSnapshot":
+        """Record freshly fetched prices and publish the resulting snapshot"""
+        self.record_prices(prices)
+        snapshot = self.build_snapshot(prices)
+        self.publish_snapshot(snapshot)
+        return snapshot
+
+    def publish_degraded(self, reason: str) -> "MarketSnapshot":
+        """Re-publish the last good snapshot flagged as degraded (keeps its original timestamp)"""
+        snapshot = replace(self.get_snapshot(), degraded=True, degraded_reason=reason)
+        self.publish_snapshot(snapshot)
+        return snapshot
+
+    def publish_snapshot(self, snapshot: "MarketSnapshot"):
+        """Make a snapshot visible to request handlers"""
+        # Single reference assignment: readers see either the old or the new
+        # snapshot, never a partially built one
+        self._snapshot = snapshot
+
+    def get_snapshot(self) -> "MarketSnapshot":
+        """Latest published snapshot; built from cached prices if none exists yet"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.build_snapshot(dict(self.price_cache))
+            self._snapshot = snapshot
+        return snapshot
 
     async def get_carbon_market_data(self) -> Dict[str, Any]:
         """Get carbon credit market data with crypto correlation"""
-        try:
-            # Get BTC price for correlation
-            btc_price = await self.get_crypto_price("BTCUSDT")
-            
-            if not btc_price:
-                btc_price = 43000.0  # Fallback price
-            
-            # Calculate price change (mock for demo)
-            btc_change_percent = (btc_price - 43000) / 43000 * 100
-            
-            # Apply 20% correlation to carbon price
-            carbon_price_change = btc_change_percent * 0.2
-            current_carbon_price = self.base_carbon_price * (1 + carbon_price_change / 100)
-            
-            # Calculate 24h high/low
-            high_24h = current_carbon_price * 1.05
-            low_24h = current_carbon_price * 0.95
-            
-            # Determine market sentiment
-            if carbon_price_change > 2:
-                sentiment = "Bullish"
-                demand_level = "High"
-            elif carbon_price_change > 0:
-                sentiment = "Positive"
-                demand_level = "Medium"
-            elif carbon_price_change > -2:
-                sentiment = "Neutral"
-                demand_level = "Medium"
-            else:
-                sentiment = "Bearish"
-                demand_level = "Low"
-            
-            return {
-                "current_price": round(current_carbon_price, 2),
-                "price_change_24h": round(carbon_price_change, 2),
-                "price_change_percent": round(carbon_price_change, 2),
-                "high_24h": round(high_24h, 2),
-                "low_24h": round(low_24h, 2),
-                "market_sentiment": sentiment,
-                "demand_level": demand_level,
-                "crypto_influence": {
-                    "btc_price": btc_price,
-                    "btc_change_percent": round(btc_change_percent, 2),
-                    "correlation_factor": 0.2
-                },
-                "last_updated": datetime.utcnow().isoformat()
-            }
-        except Exception as e:
-            print(f"❌ Failed to get carbon market data: {e}")
-            # Return fallback data
-            return {
-                "current_price": self.base_carbon_price,
-                "price_change_24h": 0.0,
-                "price_change_percent": 0.0,
-                "high_24h": self.base_carbon_price * 1.05,
-                "low_24h": self.base_carbon_price * 0.95,
-                "market_sentiment": "Neutral",
-                "demand_level": "Medium",
-                "crypto_influence": {
-                    "btc_price": 43000.0,
-                    "btc_change_percent": 0.0,
-                    "correlation_factor": 0.2
-                },
-                "last_updated": datetime.utcnow().isoformat()
-            }
+        return self.get_snapshot().to_market_data()
 
     async def calculate_portfolio_value(self, carbon_credits: float) -> Dict[str, Any]:
         """Calculate portfolio value with real-time pricing"""
-        market_data = await self.get_carbon_market_data()
-        current_price = market_data["current_price"]
+        snapshot = self.get_snapshot()
+        current_price = snapshot.current_price
         
         total_value = carbon_credits * current_price
-        daily_change = total_value * (market_data["price_change_percent"] / 100)
+        daily_change = total_value * (snapshot.price_change_percent / 100)
         
         return {
             "carbon_credits": carbon_credits,
             "current_price": current_price,
             "total_value": round(total_value, 2),
             "daily_change": round(daily_change, 2),
-            "daily_change_percent": market_data["price_change_percent"],
-            "market_sentiment": market_data["market_sentiment"],
-            "last_updated": market_data["last_updated"]
+            "daily_change_percent": snapshot.price_change_percent,
+            "market_sentiment": snapshot.market_sentiment,
+            "last_updated": snapshot.taken_at.isoformat(),
+            "snapshot_age_seconds": snapshot.age_seconds()
         }
 
 
+def _market_sentiment(carbon_price_change: float) -> Tuple[str, str]:
+    """Map a carbon price change (%) to market sentiment and demand level"""
+    if carbon_price_change > 2:
+        return "Bullish", "High"
+    elif carbon_price_change > 0:
+        return "Positive", "Medium"
+    elif carbon_price_change > -2:
+        return "Neutral", "Medium"
+    return "Bearish", "Low"
+
+
 # Global service instance
 _price_service = None
 
@@ -161,15 +332,80 @@ def get_price_service() -> BinancePriceService:
         _price_service = BinancePriceService()
     return _price_service
 
-async def start_price_updater(interval: int = 1):
-    """Start background price updater"""
+_price_scheduler = None
+
+def get_price_scheduler(interval: float = 1) -> PriceFeedScheduler:
+    """Get or create the price feed scheduler"""
+    global _price_scheduler
+    if _price_scheduler is None:
+        _price_scheduler = PriceFeedScheduler(get_price_service(), interval=interval)
+    return _price_scheduler
+
+async def start_price_updater(interval: int = 1, mode: Optional[str] = None):
+    """
+    Start background price updater that publishes a market snapshot per tick
+
+    mode "local" (default): this process fetches prices itself.
+    mode "shared": processes elect one leader through a file lock; the leader
+    fetches and writes the snapshot to a memory-mapped segment, the others
+    read it from there and take over if the leader dies.
+    """
+    mode = (mode or os.getenv("PRICE_UPDATER_MODE", "local")).lower()
+    if mode == "shared":
+        await _run_shared_updater(interval)
+        return
+
+    scheduler = get_price_scheduler(interval)
+    broadcaster = get_price_broadcaster()
+    await scheduler.run(on_snapshot=lambda snapshot: broadcaster.publish(snapshot.to_market_data()))
+
+
+async def _run_shared_updater(interval: int):
+    """Leader/follower loop for multi-worker deployments"""
+    from .shared_snapshot import SharedSnapshotSegment, LeaderLock, shared_dir
+
     service = get_price_service()
+    scheduler = get_price_scheduler(interval)
+    broadcaster = get_price_broadcaster()
+    directory = shared_dir()
+    segment = SharedSnapshotSegment(os.path.join(directory, "market_snapshot.bin"))
+    lock = LeaderLock(os.path.join(directory, "price_updater.lock"))
+    last_seq = 0
     
-    while True:
-        try:
-            await service.get_multiple_prices()
-            print(f"💹 Updated crypto prices at {datetime.utcnow().strftime('%H:%M:%S')}")
-        except Exception as e:
-            print(f"⚠️  Price update failed: {e}")
-        
-        await asyncio.sleep(interval)
+    try:
+        while True:
+            try:
+                was_leader = lock.is_leader
+                if lock.try_acquire():
+                    if not was_leader:
+                        print(f"👑 Price updater leader elected (pid {os.getpid()})")
+                    snapshot = await scheduler.tick()
+                    segment.write(snapshot.to_dict())
+                    last_seq = segment.sequence()
+                    broadcaster.publish(snapshot.to_market_data())
+                    delay = scheduler.next_delay()
+                else:
+                    seq, payload = segment.read()
+                    if payload is not None and seq != last_seq:
+                        last_seq = seq
+                        snapshot = MarketSnapshot.from_dict(payload)
+                        # Keep local candles warm so a follower promoted to
+                        # leader continues the 24h window
+                        service.record_prices(dict(snapshot.prices), snapshot.taken_at_ts)
+                        service.publish_snapshot(snapshot)
+                        broadcaster.publish(snapshot.to_market_data())
+                    delay = interval
+            except Exception as e:
+                print(f"⚠️  Price update failed: {e}")
+                delay = interval
+            
+            await asyncio.sleep(delay)
+    finally:
+        lock.release()
+        segment.close()
+
+
+async def close_price_service():
+    """Release the shared HTTP connection pool"""
+    if _price_service is not None:
+        await _price_service.aclose()
@@ -0,0 +1,96 @@
+"""
+Commit-driven change notifications
+Collects the rows each ORM session writes and hands them to registered
+listeners once the transaction commits (nothing is reported on rollback)
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+PENDING_KEY = "pending_changes"
+
+
+@dataclass(frozen=True)
+class Change:
+    """One row written by a committed transaction"""
+    table: str
+    action: str  # insert, update, delete
+    values: Dict[str, Any]  # column attributes loaded at flush time
+
+
+CommitListener = Callable[[List[Change]], None]
+
+_listeners: List[CommitListener] = []
+
+
+def on_commit(listener: CommitListener) -> CommitListener:
+    """Register a listener called with the changes of every committed session"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+    return listener
+
+
+def remove_listener(listener: CommitListener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _column_values(instance) -> Dict[str, Any]:
+    state = inspect(instance)
+    loaded = state.dict
+    return {
+        attr.key: loaded[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in loaded
+    }
+
+
+def _capture(instances, action: str) -> List[Change]:
+    return [
+        Change(instance.__table__.name, action, _column_values(instance))
+        for instance in instances
+        if hasattr(instance, "__table__")
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session, flush_context):
+    # Primary keys are assigned by now, so new rows report their ids
+    pending = session.info.setdefault(PENDING_KEY, [])
+    pending.extend(_capture(session.new, "insert"))
+    pending.extend(_capture(session.dirty, "update"))
+    pending.extend(_capture(session.deleted, "delete"))
+
+
+def track_updates(session: Session, instances):
+    """Report rows changed by Core UPDATE statements with the session's commit (reload them first)"""
+    session.info.setdefault(PENDING_KEY, []).extend(_capture(instances, "update"))
+
+
+def _dispatch_changes(changes: List[Change]):
+    for listener in list(_listeners):
+        try:
+            listener(changes)
+        except Exception as e:
+            # A failing listener must not break the request that committed
+            print(f"⚠️  Commit listener {getattr(listener, '__name__', listener)} failed: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session):
+    changes = session.info.pop(PENDING_KEY, None)
+    if changes:
+        _dispatch_changes(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def notify(changes: List[Change]):
+    """Report rows written outside an ORM session (Core bulk statements) after they commit"""
+    if changes:
+        _dispatch_changes(changes)
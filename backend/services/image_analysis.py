@@ -1,25 +1,19 @@
 """
 Image analysis service using AI/ML for vegetation and carbon assessment
+
+The analysis runs in the analysis executor's worker processes; the async
+functions below only submit it.
 """
 import random
 from datetime import datetime
 from typing import Dict, Any
-import os
 
+from services.analysis_executor import get_analysis_executor, raise_if_cancelled
+from services.raster_engine import analyze_location, vegetation_health
 
-async def analyze_site_image(image_path: str) -> Dict[str, Any]:
-    """
-    Analyze uploaded site image using computer vision
-    In production, this would use TensorFlow/PyTorch models
-    """
-    # Simulate AI analysis
-    # In production, you would:
-    # 1. Load pre-trained model (ResNet, EfficientNet, etc.)
-    # 2. Preprocess image
-    # 3. Run inference
-    # 4. Extract features (vegetation coverage, tree density, etc.)
-    
-    analysis_result = {
+
+def _simulated_site_analysis() -> Dict[str, Any]:
+    return {
         "vegetation_coverage": round(random.uniform(0.65, 0.85), 2),
         "tree_density": round(random.uniform(100, 300), 0),
         "health_score": round(random.uniform(0.75, 0.95), 2),
@@ -28,41 +22,13 @@ async def analyze_site_image(image_path: str) -> Dict[str, Any]:
         "image_quality": "High",
         "analysis_timestamp": datetime.utcnow().isoformat()
     }
-    
-    return analysis_result
 
 
-async def analyze_satellite_image(latitude: float, longitude: float, area: float) -> Dict[str, Any]:
-    """
-    Analyze satellite imagery for the given coordinates
-    In production, this would integrate with:
-    - Google Earth Engine API
-    - Sentinel Hub API
-    - NASA MODIS data
-    """
-    # Simulate satellite data analysis
-    # In production, you would:
-    # 1. Fetch satellite imagery from APIs (Sentinel-2, Landsat, etc.)
-    # 2. Calculate NDVI (Normalized Difference Vegetation Index)
-    # 3. Calculate EVI (Enhanced Vegetation Index)
-    # 4. Detect land cover changes
-    # 5. Estimate biomass
-    
+def _simulated_satellite_analysis(area: float) -> Dict[str, Any]:
     vegetation_index = round(random.uniform(0.70, 0.85), 2)
-    
-    # Determine vegetation health based on NDVI
-    if vegetation_index >= 0.75:
-        vegetation_health = "Excellent"
-    elif vegetation_index >= 0.60:
-        vegetation_health = "Good"
-    elif vegetation_index >= 0.40:
-        vegetation_health = "Fair"
-    else:
-        vegetation_health = "Poor"
-    
-    satellite_result = {
+    return {
         "vegetation_index": vegetation_index,
-        "vegetation_health": vegetation_health,
+        "vegetation_health": vegetation_health(vegetation_index),
         "ndvi": vegetation_index,
         "evi": round(vegetation_index * 1.1, 2),
         "biomass_estimate": round(area * random.uniform(80, 150), 2),  # tons per hectare
@@ -74,9 +40,52 @@ async def analyze_satellite_image(latitude: float, longitude: float, area: float
         },
         "last_updated": datetime.utcnow().isoformat(),
         "data_source": "Sentinel-2",
-        "cloud_coverage": round(random.uniform(0.05, 0.20), 2)
+        "cloud_coverage": round(random.uniform(0.05, 0.20), 2),
+        "analysis_method": "simulated"
     }
-    
+
+
+def site_image_task(image_path: str) -> Dict[str, Any]:
+    """Vegetation analysis of a site photo (runs in a worker process)"""
+    # In production, you would:
+    # 1. Load pre-trained model (ResNet, EfficientNet, etc.)
+    # 2. Preprocess image
+    # 3. Run inference
+    # 4. Extract features (vegetation coverage, tree density, etc.)
+    raise_if_cancelled()
+    return _simulated_site_analysis()
+
+
+async def analyze_site_image(image_path: str) -> Dict[str, Any]:
+    """
+    Analyze uploaded site image using computer vision
+    In production, this would use TensorFlow/PyTorch models
+    """
+    result = await get_analysis_executor().run(site_image_task, image_path)
+    return result.value
+
+
+async def analyze_satellite_image(latitude: float, longitude: float, area: float) -> Dict[str, Any]:
+    """Analyze satellite imagery for the given coordinates in a worker process"""
+    result = await get_analysis_executor().run(satellite_task, latitude, longitude, area)
+    return result.value
+
+
+def satellite_task(latitude: float, longitude: float, area: float) -> Dict[str, Any]:
+    """
+    Analyze satellite imagery for the given coordinates (runs in a worker process)
+
+    Vegetation indices come from the most recent imagery of the project
+    footprint, read through the tile cache (see services.raster_engine);
+    without any, the analysis is simulated. Production tile providers:
+    - Google Earth Engine API
+    - Sentinel Hub API
+    - NASA MODIS data
+    """
+    satellite_result = analyze_location(latitude, longitude, area)
+    if satellite_result is None:
+        return _simulated_satellite_analysis(area)
+    # Change detection needs the project's epoch history (services.satellite_epochs)
     return satellite_result
 
 
@@ -0,0 +1,219 @@
+"""
+Content-addressed image storage
+Uploads are streamed to disk in chunks and hashed (SHA-256) as they arrive;
+each distinct image is stored once under its hash and shared by every
+project that uploads it. Reference counts decide when an image is no longer
+used; its file is then deleted by `manage.py gc-images` after a grace
+period, never by the request that released it.
+"""
+import hashlib
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+import aiofiles
+import aiofiles.os
+from fastapi import UploadFile
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import BACKEND_DIR
+from models import ImageBlob, ProjectImage
+
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", str(2 * 1024 ** 3)))
+# Partial uploads older than this are removed by `manage.py gc-images`
+STALE_TEMP_SECONDS = 3600
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+@dataclass
+class StoredUpload:
+    sha256: str
+    path: str
+    size_bytes: int
+    content_type: Optional[str]
+
+
+def image_store_dir() -> str:
+    return os.getenv("IMAGE_STORE_DIR", os.path.join(BACKEND_DIR, "uploads", "site_images"))
+
+
+def blob_path(sha256: str) -> str:
+    # Two-level fan-out keeps directories small
+    return os.path.join(image_store_dir(), sha256[:2], sha256)
+
+
+def _temp_dir() -> str:
+    return os.path.join(image_store_dir(), "tmp")
+
+
+async def save_upload(upload: UploadFile, chunk_bytes: int = UPLOAD_CHUNK_BYTES) -> StoredUpload:
+    """
+    Stream an upload into the store, hashing it on the way
+
+    Only one chunk is held in memory. Identical uploads share one file: the
+    new copy replaces the stored one, which also restores it if a
+    concurrent release left it unreferenced and refreshes its mtime for the
+    gc-images grace period.
+    """
+    os.makedirs(_temp_dir(), exist_ok=True)
+    temp_path = os.path.join(_temp_dir(), uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            while chunk := await upload.read(chunk_bytes):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge(f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+                digest.update(chunk)
+                await f.write(chunk)
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic: concurrent uploads of the same content both land on one file
+        await aiofiles.os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return StoredUpload(sha256=sha256, path=path, size_bytes=size, content_type=upload.content_type)
+
+
+async def add_project_reference(
+    db: AsyncSession,
+    project_id: int,
+    stored: StoredUpload,
+    filename: Optional[str]
+) -> ProjectImage:
+    """
+    Record that a project uploaded a stored image (caller commits)
+
+    The blob's ref_count counts referencing projects; the project's own
+    ref_count counts how often it uploaded the same content.
+    """
+    reference = (await db.execute(
+        select(ProjectImage).where(ProjectImage.project_id == project_id, ProjectImage.sha256 == stored.sha256)
+    )).scalar_one_or_none()
+    if reference is None:
+        await _add_blob_reference(db, stored)
+        reference = ProjectImage(project_id=project_id, sha256=stored.sha256, filename=filename, ref_count=1)
+        db.add(reference)
+    else:
+        reference.ref_count += 1
+        reference.filename = filename
+    await db.flush()
+    return reference
+
+
+async def _add_blob_reference(db: AsyncSession, stored: StoredUpload):
+    """Count one more project on the blob, creating its row if there is none"""
+    while True:
+        # A blob seen earlier in this session may have been released and
+        # deleted since: only the UPDATE's rowcount says whether it exists
+        updated = await db.execute(
+            update(ImageBlob).where(ImageBlob.sha256 == stored.sha256).values(ref_count=ImageBlob.ref_count + 1)
+        )
+        if updated.rowcount:
+            return
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(ImageBlob).values(
+                    sha256=stored.sha256,
+                    path=stored.path,
+                    size_bytes=stored.size_bytes,
+                    content_type=stored.content_type,
+                    ref_count=1,
+                ))
+            return
+        except IntegrityError:
+            # A concurrent upload of the same content created the row first
+            continue
+
+
+async def release_project_image(db: AsyncSession, project_id: int, sha256: str) -> bool:
+    """
+    Drop a project's reference to an image (caller commits)
+
+    Returns True when no project references the image any more; its file
+    is left for `manage.py gc-images`, as an upload of the same content may
+    be about to reference it again.
+    """
+    reference = (await db.execute(
+        select(ProjectImage).where(ProjectImage.project_id == project_id, ProjectImage.sha256 == sha256)
+    )).scalar_one_or_none()
+    if reference is None:
+        raise ValueError("Image not found for this project")
+    await db.delete(reference)
+    await db.execute(
+        update(ImageBlob).where(ImageBlob.sha256 == sha256).values(ref_count=ImageBlob.ref_count - 1)
+    )
+    blob = await db.get(ImageBlob, sha256, populate_existing=True)
+    if blob is not None and blob.ref_count <= 0:
+        await db.delete(blob)
+        return True
+    return False
+
+
+async def list_project_images(db: AsyncSession, project_id: int) -> List[Dict[str, Any]]:
+    rows = (await db.execute(
+        select(ProjectImage, ImageBlob)
+        .join(ImageBlob, ImageBlob.sha256 == ProjectImage.sha256)
+        .where(ProjectImage.project_id == project_id)
+        .order_by(ProjectImage.updated_at.desc())
+    )).all()
+    return [
+        {
+            "sha256": reference.sha256,
+            "filename": reference.filename,
+            "path": blob.path,
+            "size_bytes": blob.size_bytes,
+            "content_type": blob.content_type,
+            "uploads": reference.ref_count,
+            "shared_with_projects": blob.ref_count,
+            "updated_at": reference.updated_at,
+        }
+        for reference, blob in rows
+    ]
+
+
+def collect_garbage(session, apply: bool = True) -> Dict[str, int]:
+    """
+    Remove unreferenced blobs, files no blob row points at and partial
+    uploads (sync session; used by `manage.py gc-images`). Files younger than
+    STALE_TEMP_SECONDS are skipped, as their upload may still be committing.
+    """
+    store = image_store_dir()
+    report = {"orphan_files": 0, "unreferenced_blobs": 0, "stale_temp_files": 0, "bytes_freed": 0}
+
+    unreferenced = session.execute(select(ImageBlob).where(ImageBlob.ref_count <= 0)).scalars().all()
+    for blob in unreferenced:
+        report["unreferenced_blobs"] += 1
+        if apply:
+            session.delete(blob)
+    if apply:
+        session.commit()
+
+    known = set(session.execute(select(ImageBlob.sha256)).scalars())
+    if not os.path.isdir(store):
+        return report
+    now = time.time()
+    for entry in os.scandir(store):
+        if not entry.is_dir():
+            continue
+        temp = entry.path == _temp_dir()
+        for item in os.scandir(entry.path):
+            if (not temp and item.name in known) or now - item.stat().st_mtime < STALE_TEMP_SECONDS:
+                continue
+            report["stale_temp_files" if temp else "orphan_files"] += 1
+            report["bytes_freed"] += item.stat().st_size
+            if apply:
+                os.remove(item.path)
+    return report
@@ -0,0 +1,79 @@
+"""
+Local stand-in for the Binance ticker API
+Lets the price service run, be tested and be benchmarked without network access
+"""
+import asyncio
+import json
+import random
+from typing import Dict, Optional
+
+import httpx
+
+
+DEFAULT_PRICES = {
+    "BTCUSDT": 43000.0,
+    "ETHUSDT": 2300.0,
+    "BNBUSDT": 310.0,
+    "APTUSDT": 9.5,
+}
+
+
+class LocalPriceUpstream:
+    """
+    In-process fake of the Binance `/ticker/price` endpoint
+
+    Prices follow a small random walk so consumers see movement. An optional
+    artificial latency makes it usable for concurrency benchmarks.
+    """
+
+    def __init__(
+        self,
+        prices: Optional[Dict[str, float]] = None,
+        latency: float = 0.0,
+        volatility: float = 0.001,
+        seed: Optional[int] = None
+    ):
+        self.prices = dict(prices or DEFAULT_PRICES)
+        self.latency = latency
+        self.volatility = volatility
+        self.request_count = 0
+        self._random = random.Random(seed)
+
+    def _next_price(self, symbol: str) -> float:
+        price = self.prices[symbol]
+        price *= 1 + self._random.uniform(-self.volatility, self.volatility)
+        self.prices[symbol] = price
+        return price
+
+    def _ticker(self, symbol: str) -> Dict[str, str]:
+        return {"symbol": symbol, "price": f"{self._next_price(symbol):.8f}"}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """Serve a single ticker request"""
+        self.request_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if not request.url.path.endswith("/ticker/price"):
+            return httpx.Response(404, json={"code": -1, "msg": "Not found"})
+
+        symbol = request.url.params.get("symbol")
+        symbols = request.url.params.get("symbols")
+
+        if symbol:
+            if symbol not in self.prices:
+                return httpx.Response(400, json={"code": -1121, "msg": "Invalid symbol."})
+            return httpx.Response(200, json=self._ticker(symbol))
+
+        if symbols:
+            requested = json.loads(symbols)
+            unknown = [s for s in requested if s not in self.prices]
+            if unknown:
+                return httpx.Response(400, json={"code": -1121, "msg": "Invalid symbol."})
+            return httpx.Response(200, json=[self._ticker(s) for s in requested])
+
+        return httpx.Response(200, json=[self._ticker(s) for s in self.prices])
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        """Build an httpx transport that routes requests to this stand-in"""
+        return httpx.MockTransport(self.handle)
@@ -0,0 +1,71 @@
+"""
+Local stand-in for a satellite tile service
+Serves tiles cut on demand from the scenes in SATELLITE_SCENE_DIR, so the
+tile cache and the analysis pipeline run without network access.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.raster_engine import Scene, list_scenes
+from services.tile_cache import TILE_REFLECTANCE_SCALE, TILE_SIZE, TileKey, tile_pixel_centers
+
+
+class LocalSceneTileProvider:
+    """Nearest-neighbour resampling of local scenes onto the tile grid"""
+
+    name = "local"
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._scenes: Dict[date, List[Scene]] = {}
+        self.request_count = 0
+
+    def _refresh(self):
+        scenes: Dict[date, List[Scene]] = {}
+        for scene in list_scenes(self.directory):
+            scenes.setdefault(scene.acquired, []).append(scene)
+        self._scenes = scenes
+
+    def acquisitions(self, west: float, south: float, east: float, north: float) -> List[date]:
+        # Rescan so scenes added while the worker runs are picked up
+        self._refresh()
+        return sorted(
+            (
+                acquired for acquired, scenes in self._scenes.items()
+                if any(s.west < east and s.east > west and s.south < north and s.north > south for s in scenes)
+            ),
+            reverse=True,
+        )
+
+    def fetch(self, key: TileKey) -> Optional[np.ndarray]:
+        self.request_count += 1
+        if key.acquired not in self._scenes:
+            self._refresh()
+        latitudes, longitudes = tile_pixel_centers(key.x, key.y, key.zoom)
+        tile, filled = None, None
+        for scene in self._scenes.get(key.acquired, []):
+            rows = np.floor((scene.north - latitudes) / scene.pixel_height).astype(np.intp)
+            columns = np.floor((longitudes - scene.west) / scene.pixel_width).astype(np.intp)
+            row_inside = np.flatnonzero((rows >= 0) & (rows < scene.height))
+            column_inside = np.flatnonzero((columns >= 0) & (columns < scene.width))
+            if not row_inside.size or not column_inside.size:
+                continue
+            if scene.has_band(key.band):
+                # Only the sampled pixels are read from the memory-mapped band
+                values = scene.band(key.band)[np.ix_(rows[row_inside], columns[column_inside])]
+                if key.band != "cloud" and scene.reflectance_scale != TILE_REFLECTANCE_SCALE:
+                    values = np.clip(values * (TILE_REFLECTANCE_SCALE / scene.reflectance_scale), 0, 65535)
+            elif key.band == "cloud":
+                values = 0  # scene has no cloud mask: treat as clear
+            else:
+                continue
+            if tile is None:
+                tile = np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.uint16)
+                filled = np.zeros((TILE_SIZE, TILE_SIZE), dtype=bool)
+            # Overlapping scenes of one day: every band of a pixel comes from the first scene covering it
+            region = np.ix_(row_inside, column_inside)
+            tile[region] = np.where(filled[region], tile[region], values)
+            filled[region] = True
+        return tile
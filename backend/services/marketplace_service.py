@@ -1,24 +1,68 @@
 """
 Marketplace service for carbon credit trading
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from models import MarketListing, CarbonCredit, Project
-from datetime import datetime
+from sqlalchemy import case, func, select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import MarketListing, CarbonCredit, Project, MarketStatistics, MarketVolumeHourly
+from services.change_tracking import track_updates
+from datetime import datetime, timedelta
 from typing import Dict, Any
 
+STATS_ROW_ID = 1
 
-def create_market_listing(
-    db: Session,
+
+async def _bump_statistics(db: AsyncSession, **deltas):
+    """
+    Apply deltas to the running totals inside the caller's transaction
+
+    Uses `column = column + delta` so concurrent writers never lose updates.
+    """
+    values = {
+        name: getattr(MarketStatistics, name) + delta
+        for name, delta in deltas.items()
+    }
+    values["updated_at"] = datetime.utcnow()
+    result = await db.execute(
+        update(MarketStatistics).where(MarketStatistics.id == STATS_ROW_ID).values(**values)
+    )
+    if result.rowcount == 0:
+        # First write on an empty database
+        db.add(MarketStatistics(
+            id=STATS_ROW_ID,
+            active_listings=deltas.get("active_listings", 0),
+            active_price_sum=deltas.get("active_price_sum", 0.0),
+            total_credits=deltas.get("total_credits", 0.0),
+            total_volume=deltas.get("total_volume", 0.0),
+            total_transactions=deltas.get("total_transactions", 0),
+        ))
+
+
+async def _record_hourly_volume(db: AsyncSession, sold_at: datetime, volume: float):
+    hour = sold_at.replace(minute=0, second=0, microsecond=0)
+    result = await db.execute(
+        update(MarketVolumeHourly).where(MarketVolumeHourly.hour == hour).values(
+            volume=MarketVolumeHourly.volume + volume,
+            transactions=MarketVolumeHourly.transactions + 1
+        )
+    )
+    if result.rowcount == 0:
+        db.add(MarketVolumeHourly(hour=hour, volume=volume, transactions=1))
+
+
+async def record_credits_tokenized(db: AsyncSession, total_credits: float):
+    """Account for newly tokenized credits (call before the tokenization commit)"""
+    await _bump_statistics(db, total_credits=total_credits)
+
+
+async def create_market_listing(
+    db: AsyncSession,
     carbon_credit_id: int,
     asking_price: float
 ) -> MarketListing:
     """
     Create a new marketplace listing
     """
-    carbon_credit = db.query(CarbonCredit).filter(
-        CarbonCredit.id == carbon_credit_id
-    ).first()
+    carbon_credit = await db.get(CarbonCredit, carbon_credit_id)
     
     if not carbon_credit:
         raise ValueError("Carbon credit not found")
@@ -34,33 +78,97 @@ def create_market_listing(
     )
     
     db.add(listing)
-    db.commit()
-    db.refresh(listing)
+    await _bump_statistics(db, active_listings=1, active_price_sum=asking_price)
+    await db.commit()
+    await db.refresh(listing)
     return listing
 
 
-def get_market_statistics(db: Session) -> Dict[str, Any]:
+async def _close_active_listing(db: AsyncSession, listing_id: int, status: str, **values) -> MarketListing:
     """
-    Get marketplace statistics
+    Move a listing out of "active" (caller commits)
+
+    The transition is a conditional UPDATE, so of two concurrent requests on
+    the same listing only one changes it and applies the statistics deltas.
     """
-    # Get active listings
-    active_listings = db.query(MarketListing).filter(
-        MarketListing.status == "active"
-    ).count()
+    result = await db.execute(
+        update(MarketListing)
+        .where(MarketListing.id == listing_id, MarketListing.status == "active")
+        .values(status=status, **values)
+        .execution_options(synchronize_session=False)
+    )
+    listing = (await db.execute(
+        select(MarketListing).where(MarketListing.id == listing_id).execution_options(populate_existing=True)
+    )).scalar_one_or_none()
+    if result.rowcount != 1:
+        if listing is None:
+            raise ValueError("Listing not found")
+        raise ValueError(f"Listing is already {listing.status}")
+    track_updates(db.sync_session, [listing])
+    return listing
+
+
+async def complete_listing_sale(db: AsyncSession, listing_id: int) -> MarketListing:
+    """
+    Mark an active listing as sold and move its credits out of the available pool
+    """
+    listing = await _close_active_listing(db, listing_id, "sold", sold_at=datetime.utcnow())
     
-    # Calculate average price
-    avg_price = db.query(func.avg(MarketListing.asking_price)).filter(
-        MarketListing.status == "active"
-    ).scalar() or 45.0
+    remaining = CarbonCredit.available_credits - listing.available_amount
+    await db.execute(
+        update(CarbonCredit)
+        .where(CarbonCredit.id == listing.carbon_credit_id)
+        .values(available_credits=case((remaining < 0, 0.0), else_=remaining))
+        .execution_options(synchronize_session=False)
+    )
+    carbon_credit = (await db.execute(
+        select(CarbonCredit).where(CarbonCredit.id == listing.carbon_credit_id).execution_options(populate_existing=True)
+    )).scalar_one()
+    track_updates(db.sync_session, [carbon_credit])
+    
+    volume = listing.available_amount * listing.asking_price
+    await _bump_statistics(
+        db,
+        active_listings=-1,
+        active_price_sum=-listing.asking_price,
+        total_volume=volume,
+        total_transactions=1
+    )
+    await _record_hourly_volume(db, listing.sold_at, volume)
+    await db.commit()
+    await db.refresh(listing)
+    return listing
+
+
+async def cancel_market_listing(db: AsyncSession, listing_id: int) -> MarketListing:
+    """
+    Withdraw an active listing from the marketplace
+    """
+    listing = await _close_active_listing(db, listing_id, "cancelled")
+    await _bump_statistics(db, active_listings=-1, active_price_sum=-listing.asking_price)
+    await db.commit()
+    await db.refresh(listing)
+    return listing
+
+
+async def get_market_statistics(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Get marketplace statistics from the running totals
+    """
+    stats = await db.get(MarketStatistics, STATS_ROW_ID)
+    active_listings = stats.active_listings if stats else 0
+    total_credits = stats.total_credits if stats else 0.0
     
-    # Calculate total volume (mock data for now)
-    total_volume = 12450.0
+    # Calculate average price
+    avg_price = stats.active_price_sum / active_listings if active_listings else 45.0
     
-    # Total transactions
-    total_transactions = 1247
+    # Rolling 24h volume from at most 25 hourly buckets
+    since = (datetime.utcnow() - timedelta(hours=24)).replace(minute=0, second=0, microsecond=0)
+    volume_24h = await db.scalar(
+        select(func.coalesce(func.sum(MarketVolumeHourly.volume), 0.0)).where(MarketVolumeHourly.hour >= since)
+    )
     
     # Market cap
-    total_credits = db.query(func.sum(CarbonCredit.total_credits)).scalar() or 0
     market_cap = total_credits * avg_price
     
     # Market demand calculation
@@ -71,8 +179,9 @@ def get_market_statistics(db: Session) -> Dict[str, Any]:
         "price_change_24h": 0.00,
         "market_demand": demand_percentage,
         "demand_level": "High" if demand_percentage > 70 else "Medium",
-        "volume_24h": total_volume,
-        "total_transactions": total_transactions,
+        "volume_24h": round(volume_24h, 2),
+        "total_volume": round(stats.total_volume, 2) if stats else 0.0,
+        "total_transactions": stats.total_transactions if stats else 0,
         "average_price": round(avg_price, 2),
         "market_cap": round(market_cap, 2),
         "active_listings": active_listings,
@@ -80,8 +189,70 @@ def get_market_statistics(db: Session) -> Dict[str, Any]:
     }
 
 
+async def rebuild_market_statistics(db: AsyncSession, apply: bool = True) -> Dict[str, Any]:
+    """
+    Recompute the running totals from the source tables and report drift
+
+    Returns {"expected": ..., "stored": ..., "drift": {field: stored - expected}}.
+    With apply=True the stored row and hourly buckets are replaced.
+    """
+    active = (await db.execute(
+        select(func.count(MarketListing.id), func.coalesce(func.sum(MarketListing.asking_price), 0.0))
+        .where(MarketListing.status == "active")
+    )).one()
+    sold = (await db.execute(
+        select(
+            func.count(MarketListing.id),
+            func.coalesce(func.sum(MarketListing.available_amount * MarketListing.asking_price), 0.0)
+        ).where(MarketListing.status == "sold")
+    )).one()
+    total_credits = await db.scalar(select(func.coalesce(func.sum(CarbonCredit.total_credits), 0.0)))
+    
+    expected = {
+        "active_listings": active[0],
+        "active_price_sum": float(active[1]),
+        "total_credits": float(total_credits),
+        "total_volume": float(sold[1]),
+        "total_transactions": sold[0],
+    }
+    stats = await db.get(MarketStatistics, STATS_ROW_ID)
+    stored = {name: getattr(stats, name) if stats else 0 for name in expected}
+    drift = {
+        name: round(stored[name] - expected[name], 6)
+        for name in expected
+        if abs(stored[name] - expected[name]) > 1e-6
+    }
+    
+    if apply:
+        if stats is None:
+            stats = MarketStatistics(id=STATS_ROW_ID)
+            db.add(stats)
+        for name, value in expected.items():
+            setattr(stats, name, value)
+        stats.updated_at = datetime.utcnow()
+        
+        await db.execute(delete(MarketVolumeHourly))
+        buckets = {}
+        sales = await db.execute(
+            select(MarketListing.sold_at, MarketListing.available_amount * MarketListing.asking_price)
+            .where(MarketListing.status == "sold", MarketListing.sold_at.is_not(None))
+        )
+        for sold_at, volume in sales:
+            hour = sold_at.replace(minute=0, second=0, microsecond=0)
+            bucket = buckets.setdefault(hour, [0.0, 0])
+            bucket[0] += volume
+            bucket[1] += 1
+        db.add_all(
+            MarketVolumeHourly(hour=hour, volume=volume, transactions=count)
+            for hour, (volume, count) in buckets.items()
+        )
+        await db.commit()
+    
+    return {"expected": expected, "stored": stored, "drift": drift}
+
+
 def calculate_market_interest(
-    db: Session,
+    db: AsyncSession,
     listing_id: int
 ) -> Dict[str, Any]:
     """
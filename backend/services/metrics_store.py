@@ -0,0 +1,334 @@
+"""
+Per-project monitoring time series
+Metric values recorded by analyses (NDVI, canopy cover, soil moisture,
+carbon estimates...) are appended as fixed-size binary records to one file
+per project and month, and folded into daily and weekly rollups (count,
+sum, min, max, last) as they arrive. Range queries read the coarsest
+rollup that fits the requested span, so a multi-year chart never touches
+raw points.
+
+Layout under METRICS_STORE_DIR:
+
+    <project_id>/<YYYY-MM>/points.bin   raw points (append-only)
+    <project_id>/<YYYY-MM>/daily.npy    daily rollups of that month
+    <project_id>/weekly-<YYYY>.npy      weekly rollups of weeks starting in that year
+"""
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from database import BACKEND_DIR
+
+try:
+    import fcntl
+except ImportError:  # single-process deployments only
+    fcntl = None
+
+# Stored ids: never renumber, only add
+METRICS = {
+    "ndvi": 1,
+    "evi": 2,
+    "canopy_cover": 3,
+    "soil_moisture": 4,
+    "biomass_estimate": 5,
+    "cloud_coverage": 6,
+    "vegetation_coverage": 7,
+    "health_score": 8,
+    "estimated_carbon_credits": 9,
+}
+METRIC_NAMES = {metric_id: name for name, metric_id in METRICS.items()}
+# Charted on the project dashboard
+TREND_METRICS = ("ndvi", "canopy_cover", "soil_moisture", "health_score", "estimated_carbon_credits")
+RESOLUTIONS = ("auto", "raw", "day", "week")
+# resolution="auto" picks raw points up to RAW_MAX_DAYS, daily rollups up to DAILY_MAX_DAYS
+RAW_MAX_DAYS = 14
+DAILY_MAX_DAYS = 400
+
+POINT_DTYPE = np.dtype([("t", "<i8"), ("metric", "<u2"), ("value", "<f8")])
+ROLLUP_DTYPE = np.dtype([
+    ("bucket", "<i4"),  # day number (days since 1970-01-01); Monday of the week for weekly rollups
+    ("metric", "<u2"),
+    ("count", "<u4"),
+    ("sum", "<f8"),
+    ("min", "<f8"),
+    ("max", "<f8"),
+    ("last", "<f8"),
+    ("last_t", "<i8"),
+])
+_EPOCH = datetime(1970, 1, 1)
+
+
+def metrics_store_dir() -> str:
+    return os.getenv("METRICS_STORE_DIR", os.path.join(BACKEND_DIR, "metrics_store"))
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; aware datetimes are converted"""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _seconds(moment: datetime) -> int:
+    return int((naive_utc(moment) - _EPOCH).total_seconds())
+
+
+def _day_number(moment: date) -> int:
+    return (moment - _EPOCH.date()).days
+
+
+def _bucket_date(bucket: int) -> date:
+    return _EPOCH.date() + timedelta(days=int(bucket))
+
+
+def _months(start: date, end: date) -> List[str]:
+    months, year, month = [], start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _combine(rows: np.ndarray) -> np.ndarray:
+    """Merge rollup rows sharing (bucket, metric); keeps them sorted by that key"""
+    if not len(rows):
+        return rows
+    key = rows["bucket"].astype(np.int64) << 16 | rows["metric"]
+    order = np.lexsort((rows["last_t"], key))
+    rows, key = rows[order], key[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends = np.r_[starts[1:], len(rows)] - 1
+    merged = rows[starts].copy()
+    merged["count"] = np.add.reduceat(rows["count"], starts)
+    merged["sum"] = np.add.reduceat(rows["sum"], starts)
+    merged["min"] = np.minimum.reduceat(rows["min"], starts)
+    merged["max"] = np.maximum.reduceat(rows["max"], starts)
+    merged["last"] = rows["last"][ends]
+    merged["last_t"] = rows["last_t"][ends]
+    return merged
+
+
+def _rollup_rows(points: np.ndarray, buckets: np.ndarray) -> np.ndarray:
+    rows = np.zeros(len(points), dtype=ROLLUP_DTYPE)
+    rows["bucket"] = buckets
+    rows["metric"] = points["metric"]
+    rows["count"] = 1
+    for field in ("sum", "min", "max", "last"):
+        rows[field] = points["value"]
+    rows["last_t"] = points["t"]
+    return _combine(rows)
+
+
+def _load(path: str, dtype: np.dtype) -> np.ndarray:
+    try:
+        return np.load(path)
+    except FileNotFoundError:
+        return np.zeros(0, dtype=dtype)
+
+
+def _save(path: str, array: np.ndarray):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class MetricsStore:
+    """Append-only, array-backed time series per project (sync file I/O)"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or metrics_store_dir()
+
+    def _project_dir(self, project_id: int) -> str:
+        return os.path.join(self.directory, str(int(project_id)))
+
+    @contextmanager
+    def _locked(self, project_id: int):
+        """Serialize writers of one project across processes"""
+        project_dir = self._project_dir(project_id)
+        os.makedirs(project_dir, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(project_dir, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def project_ids(self) -> List[int]:
+        try:
+            return sorted(int(entry.name) for entry in os.scandir(self.directory) if entry.name.isdigit())
+        except FileNotFoundError:
+            return []
+
+    def append(self, project_id: int, points: Iterable[Tuple[datetime, str, float]]) -> int:
+        """Record (timestamp, metric, value) points and update the rollups; returns the count"""
+        records = []
+        for moment, metric, value in points:
+            if metric not in METRICS:
+                raise ValueError(f"Unknown metric: {metric}")
+            if value is None:
+                continue
+            records.append((_seconds(moment), METRICS[metric], float(value)))
+        if not records:
+            return 0
+        points_array = np.array(records, dtype=POINT_DTYPE)
+        days = (points_array["t"] // 86400).astype(np.int32)
+        # 1970-01-01 was a Thursday: Monday-based weeks start 3 days later
+        mondays = days - (days + 3) % 7
+        month_keys = np.array([_bucket_date(day).strftime("%Y-%m") for day in days])
+        week_years = np.array([_bucket_date(monday).year for monday in mondays])
+        project_dir = self._project_dir(project_id)
+
+        with self._locked(project_id):
+            for month in np.unique(month_keys):
+                selected = month_keys == month
+                month_dir = os.path.join(project_dir, month)
+                os.makedirs(month_dir, exist_ok=True)
+                # Raw points first: rollups can always be rebuilt from them
+                with open(os.path.join(month_dir, "points.bin"), "ab") as f:
+                    points_array[selected].tofile(f)
+                daily_path = os.path.join(month_dir, "daily.npy")
+                new_rows = _rollup_rows(points_array[selected], days[selected])
+                _save(daily_path, _combine(np.concatenate([_load(daily_path, ROLLUP_DTYPE), new_rows])))
+            for year in np.unique(week_years):
+                selected = week_years == year
+                weekly_path = os.path.join(project_dir, f"weekly-{year:04d}.npy")
+                new_rows = _rollup_rows(points_array[selected], mondays[selected])
+                _save(weekly_path, _combine(np.concatenate([_load(weekly_path, ROLLUP_DTYPE), new_rows])))
+        return len(points_array)
+
+    def rebuild_rollups(self, project_id: int) -> int:
+        """Recompute every rollup of a project from its raw points; returns the point count"""
+        project_dir = self._project_dir(project_id)
+        if not os.path.isdir(project_dir):
+            return 0
+        with self._locked(project_id):
+            weekly = []
+            total = 0
+            for entry in sorted(os.scandir(project_dir), key=lambda e: e.name):
+                if entry.name.startswith("weekly-"):
+                    os.remove(entry.path)
+                    continue
+                raw_path = os.path.join(entry.path, "points.bin")
+                if not entry.is_dir() or not os.path.exists(raw_path):
+                    continue
+                points_array = np.fromfile(raw_path, dtype=POINT_DTYPE)
+                total += len(points_array)
+                days = (points_array["t"] // 86400).astype(np.int32)
+                _save(os.path.join(entry.path, "daily.npy"), _rollup_rows(points_array, days))
+                weekly.append(_rollup_rows(points_array, days - (days + 3) % 7))
+            if weekly:
+                rows = _combine(np.concatenate(weekly))
+                years = np.array([_bucket_date(bucket).year for bucket in rows["bucket"]])
+                for year in np.unique(years):
+                    _save(os.path.join(project_dir, f"weekly-{year:04d}.npy"), rows[years == year])
+        return total
+
+    def _read_raw(self, project_id: int, metric_ids: np.ndarray, start: datetime, end: datetime) -> np.ndarray:
+        parts = []
+        for month in _months(start.date(), end.date()):
+            path = os.path.join(self._project_dir(project_id), month, "points.bin")
+            if os.path.exists(path):
+                points = np.fromfile(path, dtype=POINT_DTYPE)
+                keep = (points["t"] >= _seconds(start)) & (points["t"] <= _seconds(end)) & np.isin(points["metric"], metric_ids)
+                parts.append(points[keep])
+        points = np.concatenate(parts) if parts else np.zeros(0, dtype=POINT_DTYPE)
+        return points[np.argsort(points["t"], kind="stable")]
+
+    def _read_rollups(self, project_id: int, metric_ids: np.ndarray, start: datetime, end: datetime, resolution: str) -> np.ndarray:
+        project_dir = self._project_dir(project_id)
+        first, last = _day_number(start.date()), _day_number(end.date())
+        if resolution == "day":
+            paths = [os.path.join(project_dir, month, "daily.npy") for month in _months(start.date(), end.date())]
+        else:
+            # The week containing `start` may begin in the previous year
+            first -= (first + 3) % 7
+            paths = [os.path.join(project_dir, f"weekly-{year:04d}.npy") for year in range(_bucket_date(first).year, end.year + 1)]
+        parts = [_load(path, ROLLUP_DTYPE) for path in paths if os.path.exists(path)]
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=ROLLUP_DTYPE)
+        keep = (rows["bucket"] >= first) & (rows["bucket"] <= last) & np.isin(rows["metric"], metric_ids)
+        return rows[keep]
+
+    def query(
+        self,
+        project_id: int,
+        metrics: List[str],
+        start: datetime,
+        end: datetime,
+        resolution: str = "auto"
+    ) -> Dict[str, Any]:
+        """
+        Series for each metric between `start` and `end`
+
+        Raw points come back as {"t", "value"}; rollups as {"t" (bucket
+        start), "count", "mean", "min", "max", "last"}.
+        """
+        unknown = [metric for metric in metrics if metric not in METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metric(s): {', '.join(unknown)}")
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+        start, end = naive_utc(start), naive_utc(end)
+        if resolution == "auto":
+            days = (end - start).days
+            resolution = "raw" if days <= RAW_MAX_DAYS else "day" if days <= DAILY_MAX_DAYS else "week"
+        metric_ids = np.array([METRICS[metric] for metric in metrics], dtype=np.uint16)
+        series: Dict[str, List[Dict[str, Any]]] = {metric: [] for metric in metrics}
+
+        if resolution == "raw":
+            points = self._read_raw(project_id, metric_ids, start, end)
+            for t, metric_id, value in zip(points["t"].tolist(), points["metric"].tolist(), points["value"].tolist()):
+                series[METRIC_NAMES[metric_id]].append({"t": (_EPOCH + timedelta(seconds=t)).isoformat(), "value": value})
+        else:
+            rows = self._read_rollups(project_id, metric_ids, start, end, resolution)
+            means = rows["sum"] / np.maximum(rows["count"], 1)
+            for row, mean in zip(rows.tolist(), means.tolist()):
+                bucket, metric_id, count, _, minimum, maximum, last, _ = row
+                series[METRIC_NAMES[metric_id]].append({
+                    "t": _bucket_date(bucket).isoformat(),
+                    "count": count,
+                    "mean": round(mean, 6),
+                    "min": minimum,
+                    "max": maximum,
+                    "last": last,
+                })
+        return {"resolution": resolution, "start": start.isoformat(), "end": end.isoformat(), "series": series}
+
+    def trends(self, project_id: int, metrics: Iterable[str] = TREND_METRICS, weeks: int = 52) -> Dict[str, Any]:
+        """Weekly means over the last `weeks` weeks with latest value and change, for the dashboard"""
+        end = datetime.utcnow()
+        result = self.query(project_id, list(metrics), end - timedelta(weeks=weeks), end, resolution="week")
+        trends = {}
+        for metric, points in result["series"].items():
+            if not points:
+                continue
+            trends[metric] = {
+                "latest": points[-1]["last"],
+                "change": round(points[-1]["mean"] - points[0]["mean"], 6),
+                "since": points[0]["t"],
+                "weekly_means": [point["mean"] for point in points],
+            }
+        return trends
+
+
+_metrics_store = None
+
+def get_metrics_store() -> MetricsStore:
+    """Get or create the metrics store"""
+    global _metrics_store
+    if _metrics_store is None:
+        _metrics_store = MetricsStore()
+    return _metrics_store
@@ -0,0 +1,38 @@
+"""
+Keyset (cursor) pagination helpers
+Cursors are opaque URL-safe tokens that carry the sort key of the last row
+on the previous page, so each page is an index seek instead of an OFFSET scan
+"""
+import base64
+import json
+from typing import Dict, Any, Optional
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(kind: str, **keys) -> str:
+    """Build an opaque cursor for a result set ("projects", "listings", ...)"""
+    payload = json.dumps({"k": kind, **keys}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(token: str, kind: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if invalid"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, dict) or payload.pop("k", None) != kind:
+        raise ValueError("Cursor does not belong to this listing")
+    # Compared against integer keys: anything else would not seek correctly
+    if type(payload.get("id")) is not int:
+        raise ValueError("Invalid cursor")
+    return payload
+
+
+def next_cursor(kind: str, rows: list, limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this was the last page"""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(kind, id=rows[-1].id)
@@ -0,0 +1,102 @@
+"""
+Bulk portfolio valuation
+Values many carbon credit holdings against a single market snapshot in one
+vectorized NumPy pass
+"""
+import json
+from typing import Dict, Any, Iterator, List, Optional
+
+import numpy as np
+
+
+def _multiplier_column(keys: list, multipliers: Dict[Any, float]) -> np.ndarray:
+    """Per-holding multiplier; looks up each distinct key once instead of once per row"""
+    if not multipliers:
+        return np.ones(len(keys))
+    # None is mapped to a sentinel so np.unique can sort the column
+    column = np.array(["" if k is None else str(k) for k in keys])
+    unique, inverse = np.unique(column, return_inverse=True)
+    lookup = {str(k): float(v) for k, v in multipliers.items()}
+    table = np.array([lookup.get(key, 1.0) for key in unique])
+    return table[inverse]
+
+
+def value_holdings(
+    holdings: List[Dict[str, Any]],
+    snapshot,
+    vintage_multipliers: Optional[Dict[int, float]] = None,
+    project_type_multipliers: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Value holdings against a market snapshot
+
+    Each holding has `carbon_credits` and optional `vintage_year`,
+    `project_type` and `holding_id`. The unit price of a holding is the
+    snapshot price scaled by its vintage and project-type multipliers.
+    """
+    credits = np.fromiter((h["carbon_credits"] for h in holdings), dtype=np.float64, count=len(holdings))
+    multiplier = (
+        _multiplier_column([h.get("vintage_year") for h in holdings], vintage_multipliers or {})
+        * _multiplier_column([h.get("project_type") for h in holdings], project_type_multipliers or {})
+    )
+
+    unit_price = snapshot.current_price * multiplier
+    total_value = credits * unit_price
+    daily_change = total_value * (snapshot.price_change_percent / 100)
+
+    return {
+        "holding_ids": [h.get("holding_id") for h in holdings],
+        "carbon_credits": credits,
+        "unit_price": np.round(unit_price, 4),
+        "total_value": np.round(total_value, 2),
+        "daily_change": np.round(daily_change, 2),
+        "summary": {
+            "holdings": len(holdings),
+            "total_credits": round(float(credits.sum()), 4),
+            "total_value": round(float(total_value.sum()), 2),
+            "daily_change": round(float(daily_change.sum()), 2),
+            "daily_change_percent": snapshot.price_change_percent,
+            "current_price": snapshot.current_price,
+            "market_sentiment": snapshot.market_sentiment,
+            "last_updated": snapshot.taken_at.isoformat(),
+            "snapshot_age_seconds": snapshot.age_seconds(),
+            "degraded": snapshot.degraded,
+        },
+    }
+
+
+def valuation_rows(valuation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per-holding result rows"""
+    columns = zip(
+        valuation["holding_ids"],
+        valuation["carbon_credits"].tolist(),
+        valuation["unit_price"].tolist(),
+        valuation["total_value"].tolist(),
+        valuation["daily_change"].tolist(),
+    )
+    return [
+        {
+            "holding_id": holding_id,
+            "carbon_credits": credits,
+            "unit_price": unit_price,
+            "total_value": total_value,
+            "daily_change": daily_change,
+        }
+        for holding_id, credits, unit_price, total_value, daily_change in columns
+    ]
+
+
+def iter_valuation_ndjson(valuation: Dict[str, Any], chunk_rows: int = 5000) -> Iterator[str]:
+    """NDJSON stream: one line per holding, emitted in chunks, then a summary line"""
+    ids = valuation["holding_ids"]
+    for start in range(0, len(ids), chunk_rows):
+        end = start + chunk_rows
+        chunk = {
+            "holding_ids": ids[start:end],
+            "carbon_credits": valuation["carbon_credits"][start:end],
+            "unit_price": valuation["unit_price"][start:end],
+            "total_value": valuation["total_value"][start:end],
+            "daily_change": valuation["daily_change"][start:end],
+        }
+        yield "".join(json.dumps(row) + "\n" for row in valuation_rows(chunk))
+    yield json.dumps({"summary": valuation["summary"]}) + "\n"
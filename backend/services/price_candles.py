@@ -0,0 +1,170 @@
+"""
+Rolling OHLC candle store for live prices
+Keeps a bounded ring buffer of raw ticks and rolls them up incrementally into
+1m/5m/1h candles so 24h open/high/low/change are constant-time reads
+"""
+import time
+from array import array
+from typing import Dict, Any, Optional
+
+DAY_SECONDS = 24 * 60 * 60
+
+# resolution (seconds) -> number of candles kept
+DEFAULT_RESOLUTIONS = {
+    60: 24 * 60,       # 1m candles, 24 hours
+    300: 2 * 24 * 12,  # 5m candles, 48 hours
+    3600: 7 * 24,      # 1h candles, 7 days
+}
+
+
+class TickRing:
+    """Fixed-capacity ring buffer of (timestamp, price) ticks"""
+
+    def __init__(self, capacity: int = 3600):
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.prices = array("d", bytes(8 * capacity))
+        self.head = 0  # next write position
+        self.count = 0
+
+    def append(self, ts: float, price: float):
+        self.timestamps[self.head] = ts
+        self.prices[self.head] = price
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self) -> Optional[tuple]:
+        if not self.count:
+            return None
+        i = (self.head - 1) % self.capacity
+        return self.timestamps[i], self.prices[i]
+
+
+class CandleSeries:
+    """Ring of OHLC candles at a single resolution, updated tick by tick"""
+
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.starts = array("d", bytes(8 * capacity))
+        self.opens = array("d", bytes(8 * capacity))
+        self.highs = array("d", bytes(8 * capacity))
+        self.lows = array("d", bytes(8 * capacity))
+        self.closes = array("d", bytes(8 * capacity))
+        self.current = -1  # index of the open (latest) candle
+        self.count = 0
+
+    def update(self, ts: float, price: float) -> bool:
+        """Fold a tick into the current candle; returns True when a new candle opened"""
+        bucket = ts - ts % self.resolution
+        i = self.current
+        if i >= 0 and self.starts[i] == bucket:
+            if price > self.highs[i]:
+                self.highs[i] = price
+            if price < self.lows[i]:
+                self.lows[i] = price
+            self.closes[i] = price
+            return False
+        if i >= 0 and bucket < self.starts[i]:
+            # Out-of-order tick for an older bucket; ignore rather than rewrite history
+            return False
+
+        i = (i + 1) % self.capacity
+        self.current = i
+        self.count = min(self.count + 1, self.capacity)
+        self.starts[i] = bucket
+        self.opens[i] = self.highs[i] = self.lows[i] = self.closes[i] = price
+        return True
+
+    def candles(self, limit: Optional[int] = None) -> list:
+        """Most recent candles, oldest first"""
+        n = self.count if limit is None else min(limit, self.count)
+        result = []
+        for k in range(n - 1, -1, -1):
+            i = (self.current - k) % self.capacity
+            result.append({
+                "start": self.starts[i],
+                "open": self.opens[i],
+                "high": self.highs[i],
+                "low": self.lows[i],
+                "close": self.closes[i],
+            })
+        return result
+
+
+class CandleStore:
+    """
+    Tick ring plus 1m/5m/1h candle series for one symbol
+
+    The 24h window is tracked on the hourly series: the aggregate of the closed
+    candles inside the window is refreshed only when an hourly candle rolls
+    over, and each tick only combines it with the open candle.
+    """
+
+    def __init__(self, tick_capacity: int = 3600, resolutions: Optional[Dict[int, int]] = None):
+        self.ticks = TickRing(tick_capacity)
+        self.series = {
+            resolution: CandleSeries(resolution, capacity)
+            for resolution, capacity in (resolutions or DEFAULT_RESOLUTIONS).items()
+        }
+        self.window_series = self.series[max(self.series)]
+        self._window_open: Optional[float] = None
+        self._window_start: Optional[float] = None
+        self._closed_high = float("-inf")
+        self._closed_low = float("inf")
+        self._first_ts: Optional[float] = None
+
+    def record(self, price: float, ts: Optional[float] = None):
+        """Add a price tick"""
+        if ts is None:
+            ts = time.time()
+        if self._first_ts is None:
+            self._first_ts = ts
+        self.ticks.append(ts, price)
+        for series in self.series.values():
+            rolled = series.update(ts, price)
+            if rolled and series is self.window_series:
+                self._roll_window()
+
+    def _roll_window(self):
+        """Recompute the closed-candle aggregate for the 24h window (once per hourly candle)"""
+        series = self.window_series
+        keep = max(1, DAY_SECONDS // series.resolution)
+        cutoff = series.starts[series.current] - (keep - 1) * series.resolution
+
+        self._closed_high = float("-inf")
+        self._closed_low = float("inf")
+        self._window_open = series.opens[series.current]
+        self._window_start = series.starts[series.current]
+        for k in range(1, min(keep, series.count)):
+            i = (series.current - k) % series.capacity
+            if series.starts[i] < cutoff:
+                break
+            self._closed_high = max(self._closed_high, series.highs[i])
+            self._closed_low = min(self._closed_low, series.lows[i])
+            self._window_open = series.opens[i]
+            self._window_start = series.starts[i]
+
+    def window_24h(self) -> Optional[Dict[str, Any]]:
+        """Open/high/low/close and change over the trailing 24h (or the history available)"""
+        series = self.window_series
+        if series.current < 0:
+            return None
+        i = series.current
+        close = series.closes[i]
+        open_ = self._window_open
+        change = close - open_
+        last_ts = self.ticks.last()[0]
+        return {
+            "open": open_,
+            "high": max(self._closed_high, series.highs[i]),
+            "low": min(self._closed_low, series.lows[i]),
+            "close": close,
+            "change": change,
+            "change_percent": change / open_ * 100 if open_ else 0.0,
+            "window_seconds": round(last_ts - max(self._window_start, self._first_ts), 3),
+        }
+
+    def candles(self, resolution: int, limit: Optional[int] = None) -> list:
+        """Candles for a resolution in seconds (60, 300 or 3600)"""
+        return self.series[resolution].candles(limit)
@@ -0,0 +1,193 @@
+"""
+Price feed scheduler
+Polls only the symbols the market snapshot needs, backs off exponentially with
+jitter on failures and trips a circuit breaker that serves the last good
+snapshot (marked degraded) while the upstream is unhealthy
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Dict, Any, Optional, Callable
+
+FEED_SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "APTUSDT"]
+FEED_TIMEOUT = float(os.getenv("PRICE_FEED_TIMEOUT", "3"))
+FEED_MAX_BACKOFF = float(os.getenv("PRICE_FEED_MAX_BACKOFF", "60"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("PRICE_FEED_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("PRICE_FEED_BREAKER_RESET", "30"))
+# 2^16 intervals is far past any max backoff; a larger exponent would overflow float
+MAX_BACKOFF_EXPONENT = 16
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls for `reset_timeout` seconds, then lets a single trial call
+    through (half-open) to decide whether to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class FeedMetrics:
+    """Fetch latency and error counters for the price feed"""
+
+    def __init__(self):
+        self.fetches = 0
+        self.errors = 0
+        self.rejected = 0
+        self.consecutive_failures = 0
+        self.last_latency_ms: Optional[float] = None
+        self.avg_latency_ms: Optional[float] = None
+        self.max_latency_ms = 0.0
+        self.last_error: Optional[str] = None
+        self.last_success_at: Optional[float] = None
+
+    def record_success(self, latency_ms: float):
+        self.fetches += 1
+        self.consecutive_failures = 0
+        self.last_latency_ms = round(latency_ms, 2)
+        # Exponentially weighted so the average tracks recent behaviour
+        if self.avg_latency_ms is None:
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms = 0.9 * self.avg_latency_ms + 0.1 * latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self.last_success_at = time.time()
+
+    def record_failure(self, error: Exception):
+        self.fetches += 1
+        self.errors += 1
+        self.consecutive_failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "rejected_by_breaker": self.rejected,
+            "consecutive_failures": self.consecutive_failures,
+            "last_latency_ms": self.last_latency_ms,
+            "avg_latency_ms": round(self.avg_latency_ms, 2) if self.avg_latency_ms is not None else None,
+            "max_latency_ms": round(self.max_latency_ms, 2),
+            "last_error": self.last_error,
+            "last_success_at": self.last_success_at,
+        }
+
+
+class PriceFeedScheduler:
+    """Drives the price service: one fetch per tick, adaptive delay between ticks"""
+
+    def __init__(
+        self,
+        service,
+        interval: float = 1,
+        symbols: Optional[list] = None,
+        timeout: float = FEED_TIMEOUT,
+        max_backoff: float = FEED_MAX_BACKOFF,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.service = service
+        self.interval = interval
+        self.symbols = symbols or FEED_SYMBOLS
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = FeedMetrics()
+
+    async def tick(self):
+        """Fetch once and publish a snapshot; degraded if the fetch is skipped or fails"""
+        if not self.breaker.allow():
+            self.metrics.rejected += 1
+            return self.service.publish_degraded("circuit breaker open")
+
+        state_before = self.breaker.state
+        started = time.perf_counter()
+        try:
+            prices = await self.service.fetch_prices(self.symbols, timeout=self.timeout)
+        except Exception as e:
+            self.metrics.record_failure(e)
+            self.breaker.record_failure()
+            if self.breaker.state == CircuitBreaker.OPEN and state_before != CircuitBreaker.OPEN:
+                print(f"⚠️  Price feed circuit opened after {self.breaker.failures} failures: {e}")
+            return self.service.publish_degraded(self.metrics.last_error)
+
+        self.metrics.record_success((time.perf_counter() - started) * 1000)
+        self.breaker.record_success()
+        if state_before != CircuitBreaker.CLOSED:
+            print("✅ Price feed recovered, circuit closed")
+        return self.service.apply_prices(prices)
+
+    def max_delay(self) -> float:
+        """Upper bound of the next delay: exponential in consecutive failures, capped"""
+        failures = self.metrics.consecutive_failures
+        if failures == 0:
+            return self.interval
+        return min(self.max_backoff, self.interval * (2 ** min(failures, MAX_BACKOFF_EXPONENT)))
+
+    def next_delay(self) -> float:
+        """Regular interval when healthy, exponential backoff with full jitter after failures"""
+        if self.metrics.consecutive_failures == 0:
+            return self.interval
+        return random.uniform(self.interval, self.max_delay())
+
+    async def run(self, on_snapshot: Optional[Callable] = None):
+        while True:
+            delay = self.max_backoff
+            try:
+                snapshot = await self.tick()
+                if on_snapshot is not None:
+                    on_snapshot(snapshot)
+                delay = self.next_delay()
+            except Exception as e:
+                print(f"⚠️  Price update failed: {e}")
+            await asyncio.sleep(delay)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "symbols": self.symbols,
+            "interval": self.interval,
+            "max_delay": self.max_delay(),
+            "circuit": {
+                "state": self.breaker.state,
+                "failures": self.breaker.failures,
+                "times_opened": self.breaker.times_opened,
+            },
+            "metrics": self.metrics.as_dict(),
+        }
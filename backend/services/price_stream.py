@@ -0,0 +1,92 @@
+"""
+Push-based live price streaming
+The price updater publishes each new market snapshot once; every connected
+client (SSE or WebSocket) receives it through its own bounded queue
+"""
+import asyncio
+import json
+import os
+from typing import Dict, Any, Optional, Set
+
+STREAM_QUEUE_SIZE = int(os.getenv("PRICE_STREAM_QUEUE_SIZE", "2"))
+STREAM_HEARTBEAT = float(os.getenv("PRICE_STREAM_HEARTBEAT", "15"))
+
+
+class PriceBroadcaster:
+    """
+    Fan out serialized snapshots to subscribers
+
+    Each subscriber owns a small queue. When a slow consumer's queue is full
+    the oldest frame is dropped, so it always catches up to the latest price
+    instead of replaying a backlog.
+    """
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._latest: Optional[str] = None
+        self.frames_published = 0
+        self.frames_dropped = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a new subscriber, primed with the latest frame"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._latest is not None:
+            queue.put_nowait(self._latest)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, market_data: Dict[str, Any]):
+        """Serialize once and enqueue for every subscriber without blocking"""
+        frame = json.dumps(market_data)
+        self._latest = frame
+        self.frames_published += 1
+        for queue in self._subscribers:
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                    self.frames_dropped += 1
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(frame)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "queue_size": self.queue_size,
+            "frames_published": self.frames_published,
+            "frames_dropped": self.frames_dropped,
+        }
+
+
+async def sse_events(broadcaster: PriceBroadcaster, request):
+    """Server-sent event stream for one client; ends when the client disconnects"""
+    queue = broadcaster.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: price\ndata: {frame}\n\n"
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+# Global broadcaster instance
+_broadcaster = None
+
+def get_price_broadcaster() -> PriceBroadcaster:
+    """Get or create the broadcaster instance"""
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = PriceBroadcaster()
+    return _broadcaster
@@ -0,0 +1,172 @@
+"""
+Bulk project import
+Streams CSV or NDJSON rows, validates each one with ProjectCreate and inserts
+valid rows in batches. Only one batch is held in memory at a time.
+"""
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import engine
+from models import Project
+from schemas import ProjectCreate
+from services.change_tracking import Change, notify
+
+FORMATS = ("csv", "ndjson")
+DEFAULT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+MAX_BATCH_SIZE = 10000
+
+# Same fallback location as POST /api/projects
+DEFAULT_LATITUDE = 28.6139
+DEFAULT_LONGITUDE = 77.2090
+
+
+def detect_format(filename: Optional[str], fmt: Optional[str] = None) -> str:
+    """Resolve the input format from an explicit value or the file extension"""
+    if fmt:
+        fmt = fmt.lower()
+    elif filename:
+        extension = os.path.splitext(filename)[1].lower().lstrip(".")
+        fmt = {"jsonl": "ndjson", "json": "ndjson"}.get(extension, extension)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt or 'unknown'} (use csv or ndjson)")
+    return fmt
+
+
+def parse_rows(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, raw row) pairs; unparseable rows are yielded as ValueError"""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Empty cells mean "not provided" (e.g. optional coordinates)
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError("Expected a JSON object")
+            continue
+        yield line_number, row
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def validate_row(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values for a Project row; raises ValueError when the row is invalid"""
+    try:
+        data = ProjectCreate.model_validate(raw)
+    except ValidationError as e:
+        raise ValueError(_validation_message(e))
+    return {
+        "project_type": data.project_type,
+        "location": data.location,
+        "area": data.area,
+        "start_date": datetime.fromisoformat(data.start_date),
+        "end_date": datetime.fromisoformat(data.end_date),
+        "description": data.description,
+        "latitude": data.latitude if data.latitude is not None else DEFAULT_LATITUDE,
+        "longitude": data.longitude if data.longitude is not None else DEFAULT_LONGITUDE,
+        "status": "draft",
+    }
+
+
+def _insert_rows(connection, rows: List[Dict[str, Any]]) -> List[Change]:
+    ids = connection.execute(
+        insert(Project).returning(Project.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    return [Change("projects", "insert", {**values, "id": row_id}) for values, row_id in zip(rows, ids)]
+
+
+def _insert_batch(rows: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Insert one batch in a single transaction; returns per-row errors"""
+    try:
+        with engine.begin() as connection:
+            changes = _insert_rows(connection, [values for _, values in rows])
+        notify(changes)
+        return []
+    except SQLAlchemyError:
+        pass
+    # Isolate the rows the database rejected instead of dropping the batch
+    errors = []
+    for line_number, values in rows:
+        try:
+            with engine.begin() as connection:
+                changes = _insert_rows(connection, [values])
+            notify(changes)
+        except SQLAlchemyError as e:
+            errors.append({"row": line_number, "error": str(e.orig if hasattr(e, "orig") else e)})
+    return errors
+
+
+def import_projects(
+    lines: Iterable[str],
+    fmt: str,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Import projects from CSV/NDJSON lines
+
+    Yields {"row", "error"} for every rejected row, {"batch", "inserted"}
+    after each committed batch and finally {"summary": {...}}.
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    started = time.perf_counter()
+    totals = {"rows": 0, "inserted": 0, "failed": 0, "batches": 0}
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    def flush():
+        errors = _insert_batch(batch)
+        totals["batches"] += 1
+        totals["inserted"] += len(batch) - len(errors)
+        totals["failed"] += len(errors)
+        result = errors + [{"batch": totals["batches"], "inserted": len(batch) - len(errors)}]
+        batch.clear()
+        return result
+
+    try:
+        for line_number, raw in parse_rows(lines, fmt):
+            totals["rows"] += 1
+            try:
+                if isinstance(raw, ValueError):
+                    raise raw
+                batch.append((line_number, validate_row(raw)))
+            except ValueError as e:
+                totals["failed"] += 1
+                yield {"row": line_number, "error": str(e)}
+                continue
+            if len(batch) >= batch_size:
+                yield from flush()
+    except (csv.Error, UnicodeDecodeError) as e:
+        # Unreadable input: keep what was already imported and stop
+        yield {"row": totals["rows"] + 1, "error": f"Unreadable input: {e}"}
+    if batch:
+        yield from flush()
+
+    elapsed = time.perf_counter() - started
+    totals["elapsed_seconds"] = round(elapsed, 3)
+    totals["rows_per_second"] = round(totals["rows"] / elapsed, 1) if elapsed else None
+    yield {"summary": totals}
+
+
+def iter_import_ndjson(lines: Iterable[str], fmt: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """import_projects as an NDJSON response body"""
+    for event in import_projects(lines, fmt, batch_size):
+        yield json.dumps(event) + "\n"
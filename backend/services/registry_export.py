@@ -0,0 +1,83 @@
+"""
+Streaming registry export
+Reads each table through a server-side cursor in fixed-size partitions and
+renders NDJSON or CSV chunk by chunk, so memory use does not grow with the
+table and the first bytes are sent before the query finishes
+"""
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Iterator
+
+from sqlalchemy import select
+
+from database import engine
+from models import Project, Verification, CarbonCredit, MarketListing, BlockchainTransaction
+
+EXPORT_TABLES = {
+    "projects": Project.__table__,
+    "verifications": Verification.__table__,
+    "carbon_credits": CarbonCredit.__table__,
+    "market_listings": MarketListing.__table__,
+    "blockchain_transactions": BlockchainTransaction.__table__,
+}
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+DEFAULT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _csv_value(value: Any):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def iter_partitions(table_name: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[list]:
+    """Yield the rows of a table in id order, `chunk_rows` at a time"""
+    table = EXPORT_TABLES[table_name]
+    statement = select(table).order_by(table.c.id)
+    with engine.connect() as connection:
+        # stream_results/yield_per use a server-side cursor where the driver
+        # supports one (named cursors on PostgreSQL); SQLite steps natively
+        result = connection.execution_options(stream_results=True, yield_per=chunk_rows).execute(statement)
+        for partition in result.partitions():
+            yield partition
+
+
+def export_table(table_name: str, fmt: str = "ndjson", chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[str]:
+    """Render a table as NDJSON or CSV text chunks (one chunk per partition)"""
+    if table_name not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table: {table_name}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt} (use ndjson or csv)")
+    columns = [column.name for column in EXPORT_TABLES[table_name].columns]
+
+    if fmt == "ndjson":
+        for partition in iter_partitions(table_name, chunk_rows):
+            yield "".join(
+                json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+                for row in partition
+            )
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # Header first, so clients see bytes before the first partition is read
+    yield buffer.getvalue()
+    for partition in iter_partitions(table_name, chunk_rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in partition)
+        yield buffer.getvalue()
@@ -0,0 +1,225 @@
+"""
+Read-through response cache with ETag support
+Rendered JSON bodies are cached under the request path and tagged with the
+project they describe. Committed writes to that project's rows bump the
+tag's version, which invalidates every entry built against the old version.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from services.change_tracking import Change, on_commit
+
+# table -> column holding the project id the row belongs to
+PROJECT_TAG_COLUMNS = {
+    "projects": "id",
+    "carbon_credits": "project_id",
+    "verifications": "project_id",
+}
+
+
+def project_tag(project_id) -> str:
+    return f"project:{project_id}"
+
+
+class LocalCacheBackend:
+    """
+    In-process LRU store with per-entry expiry
+
+    Also the stand-in for a shared backend: same interface, but invalidations
+    are only seen by this process.
+    """
+
+    name = "local"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._tag_versions: Dict[str, int] = {}
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def tag_versions(self, tags: List[str]) -> List[int]:
+        return [self._tag_versions.get(tag, 0) for tag in tags]
+
+    def bump_tags(self, tags: Iterable[str]):
+        for tag in tags:
+            self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """
+    Redis-backed store shared by every worker (requires the `redis` package)
+
+    Expiry and memory eviction are left to Redis; tag versions are counters,
+    so a commit in one worker invalidates the entries of all of them.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "bcr:cache:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._client.set(self._prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+    def tag_versions(self, tags: List[str]) -> List[int]:
+        if not tags:
+            return []
+        values = self._client.mget([self._prefix + "tag:" + tag for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump_tags(self, tags: Iterable[str]):
+        pipeline = self._client.pipeline()
+        for tag in tags:
+            pipeline.incr(self._prefix + "tag:" + tag)
+        pipeline.execute()
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+class ResponseCache:
+    """Caches JSON responses per URL, invalidated by project tags"""
+
+    def __init__(self, backend, ttl: float = 60.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.counters = {"hits": 0, "misses": 0, "stale": 0, "not_modified": 0, "invalidations": 0}
+
+    async def respond(
+        self,
+        request: Request,
+        tags: List[str],
+        build: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """
+        Serve `build()`'s result from cache, or build and store it
+
+        Exceptions from `build` (e.g. a 404 HTTPException) propagate and
+        nothing is cached.
+        """
+        key = request.url.path + ("?" + request.url.query if request.url.query else "")
+        entry = self._lookup(key, tags)
+        if entry is None:
+            versions = self.backend.tag_versions(tags)
+            body = json.dumps(jsonable_encoder(await build()), separators=(",", ":")).encode()
+            entry = {"body": body.decode(), "etag": _etag(body), "versions": versions}
+            # A commit that landed while building bumped the versions; the
+            # body may predate it, so serve it once without storing it
+            if self.backend.tag_versions(tags) == versions:
+                self.backend.set(key, entry, self.ttl)
+            cache_status = "MISS"
+        else:
+            cache_status = "HIT"
+
+        headers = {"ETag": entry["etag"], "Cache-Control": "no-cache", "X-Cache": cache_status}
+        if _etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+            self.counters["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+    def _lookup(self, key: str, tags: List[str]) -> Optional[Dict[str, Any]]:
+        entry = self.backend.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        if entry["versions"] != self.backend.tag_versions(tags):
+            self.counters["stale"] += 1
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return entry
+
+    def invalidate(self, tags: Iterable[str]):
+        tags = set(tags)
+        if tags:
+            self.backend.bump_tags(tags)
+            self.counters["invalidations"] += len(tags)
+
+    def on_changes(self, changes: List[Change]):
+        """Commit listener: invalidate the projects touched by the transaction"""
+        tags = set()
+        for change in changes:
+            column = PROJECT_TAG_COLUMNS.get(change.table)
+            if column and change.values.get(column) is not None:
+                tags.add(project_tag(change.values[column]))
+        self.invalidate(tags)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl,
+            "entries": self.backend.size(),
+            "evictions": self.backend.evictions,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else None,
+            **self.counters,
+        }
+
+
+def _create_backend():
+    backend = os.getenv("RESPONSE_CACHE_BACKEND", "local")
+    if backend == "redis":
+        try:
+            return RedisCacheBackend(os.getenv("RESPONSE_CACHE_URL", "redis://localhost:6379/0"))
+        except ImportError:
+            print("⚠️  redis package not installed, falling back to the local response cache")
+    return LocalCacheBackend(max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")))
+
+
+_response_cache = None
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the response cache singleton (registers its commit listener)"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(_create_backend(), ttl=float(os.getenv("RESPONSE_CACHE_TTL", "60")))
+        on_commit(_response_cache.on_changes)
+    return _response_cache
@@ -0,0 +1,237 @@
+"""
+Satellite epoch history and change detection
+Every acquisition analyzed for a project is kept as an epoch: a summary row
+(SatelliteEpoch) plus the NDVI raster of the project footprint, stored as
+.npy with NaN wherever the pixel was clouded or outside the footprint.
+Change detection is a per-pixel diff against the previous epoch over the
+pixels clear in both; only acquisitions newer than the stored history are
+analyzed, one executor task per acquisition, so each epoch's delta is
+computed once.
+"""
+import os
+import uuid
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import BACKEND_DIR
+from models import Project, SatelliteEpoch
+from services.analysis_executor import get_analysis_executor, raise_if_cancelled
+from services.raster_engine import analyze_acquisition, tile_footprint
+from services.tile_cache import get_tile_cache
+
+# A pixel has gained (lost) vegetation when its NDVI rose (fell) by at least this
+CHANGE_NDVI_THRESHOLD = float(os.getenv("SATELLITE_CHANGE_NDVI_THRESHOLD", "0.1"))
+# Acquisitions analyzed for a project without history
+EPOCH_BACKFILL = int(os.getenv("SATELLITE_EPOCH_BACKFILL", "6"))
+EPOCH_METRICS = ("ndvi", "evi", "canopy_cover", "cloud_coverage", "biomass_estimate")
+
+
+def epoch_dir() -> str:
+    return os.getenv("SATELLITE_EPOCH_DIR", os.path.join(BACKEND_DIR, "satellite_epochs"))
+
+
+def epoch_raster_path(project_id: int, acquired: date) -> str:
+    return os.path.join(epoch_dir(), str(project_id), f"{acquired.isoformat()}.npy")
+
+
+def diff_epochs(before: np.ndarray, after: np.ndarray, threshold: float = CHANGE_NDVI_THRESHOLD) -> Dict[str, Any]:
+    """Per-pixel NDVI change over the pixels clear (non-NaN) in both rasters"""
+    change = after.astype(np.float32) - before.astype(np.float32)
+    compared = ~np.isnan(change)
+    compared_pixels = int(np.count_nonzero(compared))
+    if not compared_pixels:
+        return {"compared_pixels": 0, "mean_ndvi_change": None, "gained_fraction": None,
+                "lost_fraction": None, "vegetation_increase": None}
+    change = change[compared]
+    gained = int(np.count_nonzero(change >= threshold)) / compared_pixels
+    lost = int(np.count_nonzero(change <= -threshold)) / compared_pixels
+    return {
+        "compared_pixels": compared_pixels,
+        "mean_ndvi_change": round(float(change.mean(dtype=np.float64)), 4),
+        "gained_fraction": round(gained, 4),
+        "lost_fraction": round(lost, 4),
+        # Net share of the comparable footprint that greened
+        "vegetation_increase": round(gained - lost, 4),
+    }
+
+
+def _save_raster(path: str, raster: np.ndarray):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            np.save(f, raster)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def new_acquisitions_task(latitude: float, longitude: float, area: float, latest_acquired: Optional[str]) -> List[str]:
+    """Acquisitions of the footprint newer than `latest_acquired`, oldest first (runs in a worker process)"""
+    footprint = tile_footprint(latitude, longitude, area)
+    acquisitions = sorted(get_tile_cache().provider.acquisitions(*footprint.bounds))
+    if latest_acquired is None:
+        new = acquisitions[-EPOCH_BACKFILL:]
+    else:
+        new = [acquired for acquired in acquisitions if acquired > date.fromisoformat(latest_acquired)]
+    return [acquired.isoformat() for acquired in new]
+
+
+def epoch_task(
+    project_id: int,
+    latitude: float,
+    longitude: float,
+    area: float,
+    acquired: str,
+    baseline: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Analyze one acquisition (runs in a worker process)
+
+    `baseline` is the newest stored epoch with a raster ({"acquired",
+    "raster_path", "grid"}). The raster is written before returning, at a
+    path that is deterministic, so a retried job overwrites it.
+    """
+    raise_if_cancelled()
+    cache = get_tile_cache()
+    footprint = tile_footprint(latitude, longitude, area)
+    acquired_date = date.fromisoformat(acquired)
+    ndvi = np.full(footprint.shape, np.nan, dtype=np.float32)
+    analysis = analyze_acquisition(footprint, acquired_date, area, cache, ndvi_out=ndvi)
+    record = {"acquired": acquired, "grid": footprint.grid, "analysis": analysis, "raster_path": None, "change": None}
+    if analysis is None:
+        return record
+    # Stored as float16 (ample for NDVI); diffs are computed in float32
+    raster = ndvi.astype(np.float16)
+    # Rasters on a different grid (project moved or resized) are not comparable
+    if baseline is not None and baseline["grid"] == footprint.grid and os.path.exists(baseline["raster_path"]):
+        record["change"] = {
+            "previous_acquired": baseline["acquired"],
+            "days": (acquired_date - date.fromisoformat(baseline["acquired"])).days,
+            **diff_epochs(np.load(baseline["raster_path"], mmap_mode="r"), raster),
+        }
+    path = epoch_raster_path(project_id, acquired_date)
+    _save_raster(path, raster)
+    record["raster_path"] = path
+    return record
+
+
+def change_detection(epoch: SatelliteEpoch) -> Dict[str, Any]:
+    """The `change_detection` block of a satellite result"""
+    if not epoch.change:
+        return {"vegetation_increase": None, "period": None, "baseline_epoch": epoch.acquired.isoformat()}
+    change = epoch.change
+    return {
+        **change,
+        "period": f"{change['previous_acquired']} to {epoch.acquired.isoformat()}",
+    }
+
+
+def _baseline(epoch: Optional[SatelliteEpoch]) -> Optional[Dict[str, Any]]:
+    if epoch is None:
+        return None
+    return {"acquired": epoch.acquired.isoformat(), "raster_path": epoch.raster_path, "grid": epoch.grid}
+
+
+async def update_project_epochs(
+    db: AsyncSession,
+    project: Project,
+    report: Optional[Callable[[float, str], Awaitable[None]]] = None,
+    since: Optional[datetime] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Add epochs for acquisitions newer than the project's history and return
+    the satellite result of the newest clear epoch, or None when there is
+    no imagery at all
+
+    Each acquisition is a separate executor task. With `report` (the job's
+    progress callback, which commits) every epoch is committed as soon as
+    it is analyzed, so a timeout or crash keeps the epochs already done and
+    the retry resumes after them; otherwise the caller commits. Epochs
+    created since `since` (default: now) count as new, so a retry still
+    reports the epochs an earlier attempt committed.
+    """
+    since = since or datetime.utcnow()
+    latest = (await db.execute(
+        select(SatelliteEpoch)
+        .where(SatelliteEpoch.project_id == project.id)
+        .order_by(SatelliteEpoch.acquired.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+    baseline = (await db.execute(
+        select(SatelliteEpoch)
+        .where(SatelliteEpoch.project_id == project.id, SatelliteEpoch.raster_path.isnot(None))
+        .order_by(SatelliteEpoch.acquired.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+
+    executor = get_analysis_executor()
+    acquisitions = (await executor.run(
+        new_acquisitions_task,
+        project.latitude,
+        project.longitude,
+        project.area,
+        latest.acquired.isoformat() if latest else None,
+    )).value
+    for index, acquired in enumerate(acquisitions):
+        record = (await executor.run(
+            epoch_task,
+            project.id,
+            project.latitude,
+            project.longitude,
+            project.area,
+            acquired,
+            _baseline(baseline),
+        )).value
+        analysis = record["analysis"] or {}
+        epoch = SatelliteEpoch(
+            project_id=project.id,
+            acquired=date.fromisoformat(record["acquired"]),
+            grid=record["grid"],
+            raster_path=record["raster_path"],
+            ndvi=analysis.get("ndvi"),
+            evi=analysis.get("evi"),
+            canopy_cover=analysis.get("canopy_cover"),
+            cloud_coverage=analysis.get("cloud_coverage", 1.0),
+            clear_pixels=analysis.get("pixels_analyzed", 0),
+            vegetation_increase=(record["change"] or {}).get("vegetation_increase"),
+            analysis=record["analysis"],
+            change=record["change"],
+        )
+        db.add(epoch)
+        await db.flush()
+        if record["analysis"] is not None:
+            baseline = epoch
+        if report is not None:
+            await report(0.2 + 0.6 * (index + 1) / len(acquisitions), f"analyzed epoch {index + 1} of {len(acquisitions)}")
+
+    if baseline is None:
+        return None
+    added = (await db.execute(
+        select(SatelliteEpoch)
+        .where(SatelliteEpoch.project_id == project.id, SatelliteEpoch.created_at >= since)
+        .order_by(SatelliteEpoch.acquired)
+    )).scalars().all()
+    satellite_result = dict(baseline.analysis)
+    satellite_result["change_detection"] = change_detection(baseline)
+    satellite_result["epochs_added"] = len(added)
+    # Clear epochs analyzed now, for the metrics time series
+    satellite_result["new_epochs"] = [
+        {"acquired": epoch.acquired.isoformat(), **{metric: epoch.analysis.get(metric) for metric in EPOCH_METRICS}}
+        for epoch in added if epoch.analysis is not None
+    ]
+    return satellite_result
+
+
+async def list_project_epochs(db: AsyncSession, project_id: int) -> List[SatelliteEpoch]:
+    return (await db.execute(
+        select(SatelliteEpoch)
+        .where(SatelliteEpoch.project_id == project_id)
+        .order_by(SatelliteEpoch.acquired)
+    )).scalars().all()
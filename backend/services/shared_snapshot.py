@@ -0,0 +1,119 @@
+"""
+Cross-process market snapshot sharing for multi-worker deployments
+One worker holds a file lock and fetches prices; it publishes each snapshot
+into a memory-mapped file that every other worker reads without locking
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, Any, Optional, Tuple
+
+MAGIC = b"CCMS"
+# magic, sequence number, payload length
+HEADER = struct.Struct("<4sQI")
+DEFAULT_SEGMENT_SIZE = 64 * 1024
+MAX_READ_RETRIES = 100
+
+
+def shared_dir() -> str:
+    """Directory holding the snapshot segment and leader lock"""
+    path = os.getenv("PRICE_SHARED_DIR", os.path.join(tempfile.gettempdir(), "carbon_registry_prices"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class SharedSnapshotSegment:
+    """
+    Memory-mapped, single-writer snapshot slot guarded by a sequence lock
+
+    The writer makes the sequence number odd, writes the payload and makes it
+    even again. Readers retry whenever they observe an odd number or the number
+    changed while they were copying, so they never block the writer.
+    """
+
+    def __init__(self, path: str, size: int = DEFAULT_SEGMENT_SIZE):
+        self.path = path
+        self.size = size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def _header(self) -> Tuple[bytes, int, int]:
+        return HEADER.unpack_from(self._map, 0)
+
+    def write(self, payload: Dict[str, Any]):
+        """Publish a payload (leader only)"""
+        data = json.dumps(payload).encode()
+        if HEADER.size + len(data) > self.size:
+            raise ValueError(f"Snapshot of {len(data)} bytes exceeds shared segment size")
+        magic, seq, _ = self._header()
+        if magic != MAGIC:
+            seq = 0
+        # Odd sequence marks the write in progress
+        HEADER.pack_into(self._map, 0, MAGIC, seq + 1, 0)
+        self._map[HEADER.size:HEADER.size + len(data)] = data
+        HEADER.pack_into(self._map, 0, MAGIC, seq + 2, len(data))
+
+    def read(self) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Return (sequence, payload); payload is None if nothing was published yet"""
+        for _ in range(MAX_READ_RETRIES):
+            magic, seq, length = self._header()
+            if magic != MAGIC or seq == 0:
+                return 0, None
+            if seq % 2:
+                continue
+            data = self._map[HEADER.size:HEADER.size + length]
+            if self._header()[1] == seq:
+                return seq, json.loads(data)
+        return 0, None
+
+    def sequence(self) -> int:
+        magic, seq, _ = self._header()
+        return seq if magic == MAGIC else 0
+
+    def close(self):
+        self._map.close()
+
+
+class LeaderLock:
+    """
+    Non-blocking exclusive file lock used for leader election
+
+    The kernel drops the lock when the holding process exits, so a follower
+    that keeps calling try_acquire() takes over after the leader dies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
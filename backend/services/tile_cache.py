@@ -0,0 +1,319 @@
+"""
+Satellite tile cache
+Imagery is fetched as square tiles of a geographic (CRS84 quad) grid, keyed
+by (x, y, zoom, band, acquisition date). Each process keeps a bounded LRU of
+recent tiles in memory; behind it, a disk tier shared by every process holds
+tiles as memory-mapped .npy files and evicts the least recently used ones
+once it outgrows its size budget. Concurrent fetches of the same tile, from
+any thread or process, reach the upstream provider only once.
+
+Tiles are TILE_SIZE x TILE_SIZE uint16 arrays; reflectance bands are scaled
+by TILE_REFLECTANCE_SCALE and the cloud band is non-zero where cloudy.
+"""
+import hashlib
+import importlib
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Protocol, Tuple
+
+import numpy as np
+
+from database import BACKEND_DIR
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking (Windows): duplicate fetches are harmless, only wasteful
+    fcntl = None
+
+TILE_SIZE = 256
+TILE_REFLECTANCE_SCALE = 10000
+TILE_CACHE_MEMORY_BYTES = int(os.getenv("TILE_CACHE_MEMORY_BYTES", str(256 * 1024 ** 2)))
+TILE_CACHE_DISK_BYTES = int(os.getenv("TILE_CACHE_DISK_BYTES", str(2 * 1024 ** 3)))
+# Disk eviction trims down to this fraction of the budget, so it runs rarely
+DISK_EVICTION_TARGET = 0.9
+LOCK_STRIPES = 256
+# "Provider has no such tile" is cached only this long: new scenes may cover it later
+TILE_CACHE_NEGATIVE_TTL = float(os.getenv("TILE_CACHE_NEGATIVE_TTL", "3600"))
+NEGATIVE_ENTRY_BYTES = 64  # memory charged per cached miss, so misses stay bounded too
+
+
+class TileKey(NamedTuple):
+    x: int
+    y: int
+    zoom: int
+    band: str
+    acquired: date
+
+
+def tile_degrees(zoom: int) -> float:
+    """Width and height of one tile: the world is 2^(zoom+1) x 2^zoom tiles"""
+    return 180.0 / 2 ** zoom
+
+
+def tile_origin(x: int, y: int, zoom: int) -> Tuple[float, float]:
+    """(west, north) corner of a tile"""
+    size = tile_degrees(zoom)
+    return -180.0 + x * size, 90.0 - y * size
+
+
+def tile_pixel_centers(x: int, y: int, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitudes of the tile's pixel rows and longitudes of its columns"""
+    west, north = tile_origin(x, y, zoom)
+    pixel = tile_degrees(zoom) / TILE_SIZE
+    offsets = (np.arange(TILE_SIZE) + 0.5) * pixel
+    return north - offsets, west + offsets
+
+
+def tiles_covering(west: float, south: float, east: float, north: float, zoom: int) -> List[Tuple[int, int]]:
+    size = tile_degrees(zoom)
+    last_x, last_y = 2 ** (zoom + 1) - 1, 2 ** zoom - 1
+    x0 = min(max(int(math.floor((west + 180.0) / size)), 0), last_x)
+    x1 = min(max(int(math.floor((east + 180.0) / size)), 0), last_x)
+    y0 = min(max(int(math.floor((90.0 - north) / size)), 0), last_y)
+    y1 = min(max(int(math.floor((90.0 - south) / size)), 0), last_y)
+    return [(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+
+
+class TileProvider(Protocol):
+    """Upstream imagery source"""
+
+    name: str
+
+    def acquisitions(self, west: float, south: float, east: float, north: float) -> List[date]:
+        """Dates with imagery over the area, most recent first"""
+        ...
+
+    def fetch(self, key: TileKey) -> Optional[np.ndarray]:
+        """The tile, or None when the provider has no such band or coverage"""
+        ...
+
+
+def _build_provider() -> TileProvider:
+    """
+    Select the provider: SATELLITE_TILE_PROVIDER=local (default) serves tiles
+    cut from the local scene directory; "package.module:factory" plugs in any
+    other source (resolved in every worker process)
+    """
+    spec = os.getenv("SATELLITE_TILE_PROVIDER", "local")
+    if spec == "local":
+        from .local_tile_provider import LocalSceneTileProvider
+        return LocalSceneTileProvider()
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+def tile_cache_dir() -> str:
+    return os.getenv("TILE_CACHE_DIR", os.path.join(BACKEND_DIR, "satellite_tile_cache"))
+
+
+_MISSING = object()
+
+
+class TileCache:
+    """Two-tier read-through cache in front of a TileProvider"""
+
+    def __init__(
+        self,
+        provider: TileProvider,
+        directory: Optional[str] = None,
+        memory_bytes: int = TILE_CACHE_MEMORY_BYTES,
+        disk_bytes: int = TILE_CACHE_DISK_BYTES
+    ):
+        self.provider = provider
+        self.directory = directory or tile_cache_dir()
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[TileKey, Optional[np.ndarray]]" = OrderedDict()
+        self._memory_used = 0
+        self._negative_expiry: Dict[TileKey, float] = {}
+        self._memory_lock = threading.Lock()
+        self._disk_used: Optional[int] = None  # estimate; recounted by every eviction pass
+        self.counters = {
+            "memory_hits": 0, "disk_hits": 0, "fetched": 0, "deduplicated": 0,
+            "memory_evictions": 0, "disk_evictions": 0,
+        }
+
+    def get(self, key: TileKey) -> Optional[np.ndarray]:
+        """The tile (read-only), or None when the provider has none"""
+        tile = self._memory_get(key)
+        if tile is not _MISSING:
+            self.counters["memory_hits"] += 1
+            return tile
+        tile = self._disk_get(key)
+        if tile is not _MISSING:
+            self.counters["disk_hits"] += 1
+        else:
+            with self._single_flight(key):
+                # Whoever held the lock before us may have fetched it already
+                tile = self._disk_get(key)
+                if tile is not _MISSING:
+                    self.counters["deduplicated"] += 1
+                else:
+                    tile = self.provider.fetch(key)
+                    self.counters["fetched"] += 1
+                    self._disk_put(key, tile)
+        self._memory_put(key, tile)
+        return tile
+
+    # ---------- memory tier ----------
+
+    def _memory_get(self, key: TileKey):
+        with self._memory_lock:
+            if key not in self._memory:
+                return _MISSING
+            if key in self._negative_expiry and self._negative_expiry[key] <= time.monotonic():
+                self._memory_remove(key)
+                return _MISSING
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+    def _memory_put(self, key: TileKey, tile: Optional[np.ndarray]):
+        size = tile.nbytes if tile is not None else NEGATIVE_ENTRY_BYTES
+        if size > self.memory_bytes:
+            return
+        with self._memory_lock:
+            if key in self._memory:
+                return
+            self._memory[key] = tile
+            self._memory_used += size
+            if tile is None:
+                self._negative_expiry[key] = time.monotonic() + TILE_CACHE_NEGATIVE_TTL
+            while self._memory_used > self.memory_bytes:
+                self._memory_remove(next(iter(self._memory)))
+                self.counters["memory_evictions"] += 1
+
+    def _memory_remove(self, key: TileKey):
+        tile = self._memory.pop(key)
+        self._memory_used -= tile.nbytes if tile is not None else NEGATIVE_ENTRY_BYTES
+        self._negative_expiry.pop(key, None)
+
+    # ---------- disk tier ----------
+
+    def _path(self, key: TileKey) -> str:
+        return os.path.join(self.directory, key.acquired.isoformat(), key.band, str(key.zoom), str(key.x), f"{key.y}.npy")
+
+    def _disk_get(self, key: TileKey):
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            if stat.st_size == 0:
+                # Provider had nothing for this key when the file was written
+                if time.time() - stat.st_mtime > TILE_CACHE_NEGATIVE_TTL:
+                    os.remove(path)
+                    return _MISSING
+                return None
+            # Copy out of the mapping so eviction can delete the file
+            tile = np.array(np.load(path, mmap_mode="r"))
+            tile.setflags(write=False)
+            os.utime(path)  # recency for disk eviction
+        except FileNotFoundError:
+            return _MISSING
+        return tile
+
+    def _disk_put(self, key: TileKey, tile: Optional[np.ndarray]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                if tile is not None:
+                    np.save(f, tile)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        if tile is not None:
+            tile.setflags(write=False)
+        if self._disk_used is None:
+            self._disk_used = self._disk_usage()[0]
+        else:
+            self._disk_used += os.path.getsize(path)
+        if self._disk_used > self.disk_bytes:
+            self.evict_disk()
+
+    def _disk_files(self) -> Iterator[os.DirEntry]:
+        stack = [self.directory]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".npy"):
+                    yield entry
+
+    def _disk_usage(self) -> Tuple[int, int]:
+        files = list(self._disk_files())
+        return sum(entry.stat().st_size for entry in files), len(files)
+
+    def evict_disk(self, target_bytes: Optional[int] = None) -> int:
+        """
+        Delete least recently used tiles until the disk tier fits, and
+        expired misses (which take no space but would pile up); returns
+        bytes freed
+        """
+        target = int(self.disk_bytes * DISK_EVICTION_TARGET) if target_bytes is None else target_bytes
+        expired = time.time() - TILE_CACHE_NEGATIVE_TTL
+        files = []
+        for entry in self._disk_files():
+            try:
+                stat = entry.stat()
+                if stat.st_size == 0 and stat.st_mtime < expired:
+                    os.remove(entry.path)
+                    continue
+            except FileNotFoundError:
+                continue  # evicted by another process meanwhile
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        used = sum(size for _, size, _ in files)
+        freed = 0
+        for _, size, path in sorted(files):
+            if used - freed <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            freed += size
+            self.counters["disk_evictions"] += 1
+        self._disk_used = used - freed
+        return freed
+
+    @contextmanager
+    def _single_flight(self, key: TileKey):
+        if fcntl is None:
+            yield
+            return
+        # A fixed set of lock files: unrelated keys rarely share a stripe
+        stripe = int(hashlib.blake2b(repr(key).encode(), digest_size=4).hexdigest(), 16) % LOCK_STRIPES
+        lock_dir = os.path.join(self.directory, ".locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(os.path.join(lock_dir, f"{stripe}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._memory_lock:
+            memory = {"memory_tiles": len(self._memory), "memory_bytes": self._memory_used}
+        return {"provider": getattr(self.provider, "name", type(self.provider).__name__), **memory, **self.counters}
+
+
+_tile_cache = None
+
+def get_tile_cache() -> TileCache:
+    """Get or create this process's tile cache (the disk tier is shared)"""
+    global _tile_cache
+    if _tile_cache is None:
+        _tile_cache = TileCache(_build_provider())
+    return _tile_cache
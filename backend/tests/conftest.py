@@ -0,0 +1,20 @@
+"""
+Test configuration: point every store at a throwaway directory before the
+application modules read their settings at import time
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_TEST_DIR = tempfile.mkdtemp(prefix="blue_carbon_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DIR, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["MIGRATION_LOCK_PATH"] = os.path.join(_TEST_DIR, "migrations.lock")
+for _name in ("ANALYTICS_SNAPSHOT_DIR", "IMAGE_STORE_DIR", "METRICS_STORE_DIR", "PRICE_SHARED_DIR",
+              "SATELLITE_EPOCH_DIR", "SATELLITE_SCENE_DIR", "TILE_CACHE_DIR"):
+    os.environ[_name] = os.path.join(_TEST_DIR, _name.lower())
+# No pooled aiosqlite connections: their threads would outlive the test client's event loops
+os.environ["DB_PROFILE"] = "default"
@@ -0,0 +1,119 @@
+"""Bounded process pool: rejection, timeouts, cancellation, shared memory and pool recovery"""
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from services.analysis_executor import (
+    AnalysisExecutor, AnalysisQueueFull, AnalysisTimeout, raise_if_cancelled
+)
+
+
+# Tasks live at module level so spawned workers can import them
+
+def spin(seconds: float) -> str:
+    """Busy work that checks for cancellation, like the analysis code"""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        raise_if_cancelled()
+        time.sleep(0.01)
+    return "finished"
+
+
+def ping() -> int:
+    return os.getpid()
+
+
+def arrays_task(size: int):
+    return {"size": size}, {"values": np.arange(size, dtype=np.float64)}
+
+
+def crash():
+    os._exit(1)
+
+
+@pytest.fixture
+def executor():
+    executor = AnalysisExecutor(workers=1, queue_depth=0, timeout=30)
+    yield executor
+    executor.shutdown()
+
+
+async def _wait_for_free_slots(executor, deadline=10.0):
+    started = time.monotonic()
+    while len(executor._free_slots) < executor.capacity and time.monotonic() - started < deadline:
+        await asyncio.sleep(0.02)
+    return len(executor._free_slots)
+
+
+def test_full_queue_rejects_instead_of_waiting(executor):
+    async def run():
+        busy = asyncio.create_task(executor.run(spin, 0.5))
+        await asyncio.sleep(0)  # let it take the only slot
+        with pytest.raises(AnalysisQueueFull):
+            await executor.run(ping)
+        return (await busy).value
+
+    assert asyncio.run(run()) == "finished"
+    assert executor.counters.rejected == 1
+    assert executor.counters.completed == 1
+
+
+def test_timeout_cancels_the_task_and_frees_its_slot(executor):
+    async def run():
+        started = time.monotonic()
+        with pytest.raises(AnalysisTimeout):
+            await executor.run(spin, 60, timeout=1)
+        free = await _wait_for_free_slots(executor)
+        # The only worker is usable again well before the spin would have ended
+        await executor.run(ping)
+        return free, time.monotonic() - started
+
+    free, elapsed = asyncio.run(run())
+    assert free == executor.capacity
+    assert elapsed < 30
+    assert executor.counters.timed_out == 1
+
+
+def test_cancelling_the_caller_stops_the_task(executor):
+    async def run():
+        task = asyncio.create_task(executor.run(spin, 60))
+        await asyncio.sleep(1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        free = await _wait_for_free_slots(executor)
+        await executor.run(ping)
+        return free
+
+    assert asyncio.run(run()) == executor.capacity
+    assert executor.counters.cancelled == 1
+
+
+def test_result_arrays_come_back_through_shared_memory(executor):
+    async def run():
+        return await executor.run(arrays_task, 1000)
+
+    result = asyncio.run(run())
+    name = result.arrays._block.name
+    assert result.value == {"size": 1000}
+    assert np.array_equal(result.arrays["values"], np.arange(1000, dtype=np.float64))
+    result.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_broken_pool_is_restarted(executor):
+    async def run():
+        with pytest.raises(BrokenProcessPool):
+            await executor.run(crash)
+        return await executor.run(ping)
+
+    result = asyncio.run(run())
+    assert result.value == result.worker_pid
+    assert executor.counters.pool_restarts == 1
+    assert executor.counters.failed == 1
@@ -0,0 +1,161 @@
+"""Job runner claiming, retries, deferral, orphan recovery and atomic completion"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete
+
+from database import AsyncSessionLocal, SessionLocal, run_migrations
+from models import AnalysisJob, Project
+from services import analysis_jobs
+from services.analysis_executor import AnalysisQueueFull
+from services.analysis_jobs import AnalysisJobRunner, enqueue_job
+
+
+@pytest.fixture
+def project_id():
+    run_migrations()
+    with SessionLocal() as session:
+        session.execute(delete(AnalysisJob))
+        project = Project(
+            project_type="mangrove", location="Test", area=10.0,
+            start_date=datetime(2024, 1, 1), end_date=datetime(2034, 1, 1),
+        )
+        session.add(project)
+        session.commit()
+        return project.id
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    """Install a fake site_image handler"""
+    def install(fn):
+        monkeypatch.setitem(analysis_jobs.JOB_HANDLERS, "site_image", fn)
+    return install
+
+
+async def _enqueue(project_id, **values):
+    async with AsyncSessionLocal() as db:
+        job = await enqueue_job(db, project_id, "site_image")
+        for name, value in values.items():
+            setattr(job, name, value)
+        await db.commit()
+        return job.id
+
+
+async def _job(job_id):
+    async with AsyncSessionLocal() as db:
+        return await db.get(AnalysisJob, job_id)
+
+
+def test_only_one_runner_claims_a_job(project_id):
+    async def run():
+        job_id = await _enqueue(project_id)
+        claims = await asyncio.gather(AnalysisJobRunner(workers=1)._claim(), AnalysisJobRunner(workers=1)._claim())
+        return job_id, claims, await _job(job_id)
+
+    job_id, claims, job = asyncio.run(run())
+    assert sorted(claims, key=lambda claim: claim is None) == [job_id, None]
+    assert job.status == "running"
+    assert job.attempts == 1
+
+
+def test_failures_back_off_then_fail(project_id, handler):
+    async def flaky(db, job, report):
+        raise RuntimeError("boom")
+    handler(flaky)
+
+    async def run():
+        runner = AnalysisJobRunner(workers=1)
+        job_id = await _enqueue(project_id, max_attempts=2)
+        states = []
+        for _ in range(2):
+            assert await runner._claim() == job_id
+            before = datetime.utcnow()
+            await runner._run(job_id)
+            job = await _job(job_id)
+            states.append((job.status, job.attempts, job.run_after - before, job.error))
+            # Make the retry due now
+            async with AsyncSessionLocal() as db:
+                (await db.get(AnalysisJob, job_id)).run_after = datetime.utcnow()
+                await db.commit()
+        return runner, states
+
+    runner, states = asyncio.run(run())
+    status, attempts, delay, error = states[0]
+    assert (status, attempts, error) == ("queued", 1, "boom")
+    assert abs(delay.total_seconds() - analysis_jobs.JOB_RETRY_BACKOFF) < 1
+    assert states[1][:2] == ("failed", 2)
+    assert runner.counters["retried"] == 1
+    assert runner.counters["failed"] == 1
+
+
+def test_full_executor_defers_without_spending_an_attempt(project_id, handler):
+    async def busy(db, job, report):
+        raise AnalysisQueueFull("all analysis workers are busy")
+    handler(busy)
+
+    async def run():
+        runner = AnalysisJobRunner(workers=1)
+        job_id = await _enqueue(project_id)
+        await runner._claim()
+        await runner._run(job_id)
+        return runner, await _job(job_id)
+
+    runner, job = asyncio.run(run())
+    assert job.status == "queued"
+    assert job.attempts == 0
+    assert job.stage == "waiting for a worker"
+    assert runner.counters["deferred"] == 1
+
+
+def test_orphaned_jobs_are_requeued_after_the_lease(project_id):
+    stale = datetime.utcnow() - timedelta(seconds=analysis_jobs.JOB_LEASE_SECONDS + 60)
+
+    async def run():
+        orphan = await _enqueue(project_id, status="running", attempts=1)
+        exhausted = await _enqueue(project_id, status="running", attempts=3, max_attempts=3)
+        live = await _enqueue(project_id, status="running", attempts=1)
+        async with AsyncSessionLocal() as db:
+            for job_id in (orphan, exhausted):
+                (await db.get(AnalysisJob, job_id)).updated_at = stale
+            await db.commit()
+        runner = AnalysisJobRunner(workers=1)
+        await runner.requeue_orphaned()
+        return runner, [await _job(job_id) for job_id in (orphan, exhausted, live)]
+
+    runner, (orphan, exhausted, live) = asyncio.run(run())
+    assert orphan.status == "queued"
+    assert exhausted.status == "failed"
+    assert live.status == "running"
+    assert runner.counters["requeued_orphans"] == 1
+
+
+def test_project_update_commits_with_the_job(project_id, handler):
+    async def succeed(db, job, report):
+        project = await db.get(Project, job.project_id)
+        project.vegetation_health = "Recovering"
+        return {"analysis": {"health_score": 0.5}}
+
+    async def fail(db, job, report):
+        project = await db.get(Project, job.project_id)
+        project.vegetation_health = "Lost"
+        raise analysis_jobs.PermanentJobError("unreadable image")
+
+    async def run(fn):
+        handler(fn)
+        runner = AnalysisJobRunner(workers=1)
+        job_id = await _enqueue(project_id)
+        await runner._claim()
+        await runner._run(job_id)
+        async with AsyncSessionLocal() as db:
+            return await db.get(AnalysisJob, job_id), await db.get(Project, project_id)
+
+    job, project = asyncio.run(run(succeed))
+    assert job.status == "succeeded"
+    assert job.result == {"analysis": {"health_score": 0.5}}
+    assert project.vegetation_health == "Recovering"
+
+    job, project = asyncio.run(run(fail))
+    assert job.status == "failed"
+    assert project.vegetation_health == "Recovering"
@@ -0,0 +1,80 @@
+"""Incremental snapshots never skip late-committed rows; compaction keeps every row"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from database import SessionLocal, run_migrations
+from models import Project
+from services import analytics_snapshot
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANALYTICS_SNAPSHOT_DIR", str(tmp_path))
+    run_migrations()
+
+
+def _add_project(location: str, stamped: datetime) -> int:
+    with SessionLocal() as session:
+        project = Project(
+            project_type="mangrove", location=location, area=10.0,
+            start_date=datetime(2024, 1, 1), end_date=datetime(2034, 1, 1),
+            created_at=stamped, updated_at=stamped,
+        )
+        session.add(project)
+        session.commit()
+        return project.id
+
+
+def _snapshot_ids():
+    return set(analytics_snapshot.read_table("projects")["id"].to_pylist())
+
+
+def _database_ids():
+    with SessionLocal() as session:
+        return set(session.execute(select(Project.id)).scalars())
+
+
+def test_rows_committed_late_are_not_skipped(monkeypatch):
+    now = datetime.utcnow()
+    settled = _add_project("Settled", now - timedelta(minutes=10))
+    # Stamped within the settle window, so its transaction may still be open
+    recent = _add_project("Recent", now - timedelta(seconds=30))
+    monkeypatch.setattr(analytics_snapshot, "SETTLE_SECONDS", 60)
+    analytics_snapshot.snapshot_table("projects")
+    assert settled in _snapshot_ids()
+    assert recent not in _snapshot_ids()
+
+    # A transaction stamped before `recent` commits only now
+    late = _add_project("Late", now - timedelta(seconds=40))
+    monkeypatch.setattr(analytics_snapshot, "SETTLE_SECONDS", 0)
+    analytics_snapshot.snapshot_table("projects")
+    assert {recent, late} <= _snapshot_ids()
+    assert _snapshot_ids() == _database_ids()
+
+
+def test_compaction_keeps_the_newest_version_of_every_row(monkeypatch):
+    # Only this test's rows (stamped hours ago) are old enough to be snapshotted
+    monkeypatch.setattr(analytics_snapshot, "SETTLE_SECONDS", 3600)
+    now = datetime.utcnow()
+    updated = _add_project("Before", now - timedelta(hours=5))
+    analytics_snapshot.snapshot_table("projects")
+    other = _add_project("Other", now - timedelta(hours=4))
+    with SessionLocal() as session:
+        project = session.get(Project, updated)
+        project.location = "After"
+        project.updated_at = now - timedelta(hours=3, minutes=30)
+        session.commit()
+    analytics_snapshot.snapshot_table("projects")
+    third = _add_project("Third", now - timedelta(hours=3))
+    analytics_snapshot.snapshot_table("projects")
+
+    before = analytics_snapshot.read_table("projects").sort_by("id").to_pylist()
+    result = analytics_snapshot.compact_table("projects")
+    after = analytics_snapshot.read_table("projects").sort_by("id").to_pylist()
+
+    assert result["parts"] == 1
+    assert after == before
+    assert {row["id"] for row in after} >= {updated, other, third}
+    assert [row["location"] for row in after if row["id"] == updated] == ["After"]
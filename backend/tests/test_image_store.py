@@ -0,0 +1,119 @@
+"""Releasing an image never deletes a file a concurrent upload is about to reference"""
+import asyncio
+import io
+import os
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+from database import AsyncSessionLocal, SessionLocal, run_migrations
+from models import ImageBlob, Project
+from services.image_store import (
+    STALE_TEMP_SECONDS, add_project_reference, blob_path, collect_garbage, list_project_images,
+    release_project_image, save_upload
+)
+
+
+
+@pytest.fixture
+def project_ids(tmp_path, monkeypatch):
+    monkeypatch.setenv("IMAGE_STORE_DIR", str(tmp_path))
+    run_migrations()
+    with SessionLocal() as session:
+        projects = [
+            Project(project_type="mangrove", location="Test", area=10.0,
+                    start_date=datetime(2024, 1, 1), end_date=datetime(2034, 1, 1))
+            for _ in range(2)
+        ]
+        session.add_all(projects)
+        session.commit()
+        return [project.id for project in projects]
+
+
+def _upload(content: bytes):
+    return UploadFile(file=io.BytesIO(content), filename="site.jpg")
+
+
+def test_dedup_upload_survives_concurrent_release(project_ids):
+    import main
+
+    first, second = project_ids
+    image = b"shared image " * 1000
+
+    async def first_upload():
+        async with AsyncSessionLocal() as db:
+            await add_project_reference(db, first, await save_upload(_upload(image)), "site.jpg")
+            await db.commit()
+
+    async def reference(stored):
+        async with AsyncSessionLocal() as db:
+            await add_project_reference(db, second, stored, "site.jpg")
+            await db.commit()
+            return await db.get(ImageBlob, stored.sha256)
+
+    asyncio.run(first_upload())
+    # Second upload of the same content is stored before it is referenced...
+    stored = asyncio.run(save_upload(_upload(image)))
+    # ...while the only existing reference is released through the API
+    response = TestClient(main.app).delete(f"/api/analysis/site-image/{first}/{stored.sha256}")
+    assert response.status_code == 200
+
+    blob = asyncio.run(reference(stored))
+    assert blob.ref_count == 1
+    with open(blob.path, "rb") as f:
+        assert f.read() == image
+
+
+def test_gc_removes_unreferenced_file_after_grace_period(project_ids):
+    async def run():
+        stored = await save_upload(_upload(b"released image " * 1000))
+        async with AsyncSessionLocal() as db:
+            await add_project_reference(db, project_ids[0], stored, "site.jpg")
+            await db.commit()
+        async with AsyncSessionLocal() as db:
+            await release_project_image(db, project_ids[0], stored.sha256)
+            await db.commit()
+        return stored
+
+    stored = asyncio.run(run())
+    path = blob_path(stored.sha256)
+    with SessionLocal() as session:
+        assert collect_garbage(session)["orphan_files"] == 0  # within the grace period
+        assert os.path.exists(path)
+        old = time.time() - STALE_TEMP_SECONDS - 1
+        os.utime(path, (old, old))
+        assert collect_garbage(session)["orphan_files"] == 1
+    assert not os.path.exists(path)
+
+
+def test_reference_recreates_blob_released_after_it_was_read(project_ids):
+    first, second = project_ids
+    image = b"released between read and update " * 1000
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            stored = await save_upload(_upload(image))
+            await add_project_reference(db, first, stored, "site.jpg")
+            await db.commit()
+
+        async with AsyncSessionLocal() as db:
+            # This session has already seen the blob...
+            seen = await db.get(ImageBlob, stored.sha256)
+            assert seen.ref_count == 1
+            # ...when its only reference is released (and the row deleted) elsewhere
+            async with AsyncSessionLocal() as other:
+                assert await release_project_image(other, first, stored.sha256)
+                await other.commit()
+            await add_project_reference(db, second, await save_upload(_upload(image)), "site.jpg")
+            await db.commit()
+
+        async with AsyncSessionLocal() as db:
+            return await db.get(ImageBlob, stored.sha256), await list_project_images(db, second)
+
+    blob, images = asyncio.run(run())
+    assert blob is not None
+    assert blob.ref_count == 1
+    assert [image["sha256"] for image in images] == [blob.sha256]
@@ -0,0 +1,108 @@
+"""Listing state transitions keep the running statistics consistent under concurrency"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from database import AsyncSessionLocal, SessionLocal, run_migrations
+from models import CarbonCredit, MarketListing, MarketStatistics, Project
+from services.change_tracking import on_commit, remove_listener
+from services.marketplace_service import (
+    STATS_ROW_ID, cancel_market_listing, complete_listing_sale, create_market_listing
+)
+
+
+@pytest.fixture
+def carbon_credit_id():
+    run_migrations()
+    with SessionLocal() as session:
+        project = Project(
+            project_type="mangrove", location="Test", area=10.0,
+            start_date=datetime(2024, 1, 1), end_date=datetime(2034, 1, 1),
+        )
+        session.add(project)
+        session.flush()
+        credit = CarbonCredit(
+            project_id=project.id, total_credits=100.0, available_credits=100.0,
+            unit_price=25.0, total_value=2500.0,
+        )
+        session.add(credit)
+        session.commit()
+        return credit.id
+
+
+async def _statistics():
+    async with AsyncSessionLocal() as db:
+        stats = await db.get(MarketStatistics, STATS_ROW_ID)
+        return stats.active_listings, stats.total_transactions, stats.total_volume
+
+
+async def _race(operation, listing_id):
+    async def attempt():
+        async with AsyncSessionLocal() as db:
+            try:
+                return await operation(db, listing_id)
+            except ValueError:
+                await db.rollback()  # as the API handlers do
+                raise
+    return await asyncio.gather(attempt(), attempt(), return_exceptions=True)
+
+
+def test_concurrent_sales_apply_once(carbon_credit_id):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            listing = await create_market_listing(db, carbon_credit_id, asking_price=30.0)
+        before = await _statistics()
+        results = await _race(complete_listing_sale, listing.id)
+        after = await _statistics()
+        async with AsyncSessionLocal() as db:
+            credit = await db.get(CarbonCredit, carbon_credit_id)
+        return results, before, after, credit.available_credits
+
+    results, before, after, available = asyncio.run(run())
+    assert sum(isinstance(result, MarketListing) for result in results) == 1
+    assert [str(result) for result in results if isinstance(result, Exception)] == ["Listing is already sold"]
+    assert (after[0] - before[0], after[1] - before[1], after[2] - before[2]) == (-1, 1, 3000.0)
+    assert available == 0.0
+
+
+def test_concurrent_cancels_apply_once(carbon_credit_id):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            listing = await create_market_listing(db, carbon_credit_id, asking_price=30.0)
+        before = await _statistics()
+        results = await _race(cancel_market_listing, listing.id)
+        return results, before, await _statistics()
+
+    results, before, after = asyncio.run(run())
+    assert sum(isinstance(result, MarketListing) for result in results) == 1
+    assert after[0] - before[0] == -1
+
+
+def test_missing_listing_is_rejected():
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await cancel_market_listing(db, 987654)
+
+    run_migrations()
+    with pytest.raises(ValueError, match="Listing not found"):
+        asyncio.run(run())
+
+
+def test_sale_reports_changed_rows_to_commit_listeners(carbon_credit_id):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            listing = await create_market_listing(db, carbon_credit_id, asking_price=30.0)
+        async with AsyncSessionLocal() as db:
+            await complete_listing_sale(db, listing.id)
+        return listing.id
+
+    changes = []
+    listener = on_commit(changes.extend)
+    try:
+        listing_id = asyncio.run(run())
+    finally:
+        remove_listener(listener)
+    updated = {(change.table, change.values["id"]): change.values for change in changes if change.action == "update"}
+    assert updated[("market_listings", listing_id)]["status"] == "sold"
+    assert updated[("carbon_credits", carbon_credit_id)]["available_credits"] == 0.0
@@ -0,0 +1,104 @@
+"""Metric time series: rollups and the dashboard range endpoint"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from database import SessionLocal, run_migrations
+from models import Project
+from services.metrics_store import MetricsStore, get_metrics_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MetricsStore(str(tmp_path))
+
+
+def test_rollups_match_raw_points(store):
+    start = datetime(2024, 1, 1)
+    points = [(start + timedelta(hours=i), "ndvi", i % 24 / 10) for i in range(24 * 60)]
+    store.append(1, points)
+    end = start + timedelta(days=60)
+
+    raw = store.query(1, ["ndvi"], start, end, "raw")["series"]["ndvi"]
+    daily = store.query(1, ["ndvi"], start, end, "day")["series"]["ndvi"]
+    weekly = store.query(1, ["ndvi"], start, end, "week")["series"]["ndvi"]
+    assert len(raw) == len(points)
+    assert len(daily) == 60
+    assert sum(day["count"] for day in daily) == sum(week["count"] for week in weekly) == len(points)
+    assert daily[0] == {"t": "2024-01-01", "count": 24, "mean": 1.15, "min": 0.0, "max": 2.3, "last": 2.3}
+    assert all(datetime.fromisoformat(week["t"]).weekday() == 0 for week in weekly)
+
+
+def test_rebuild_rollups_reproduces_queries(store):
+    start = datetime(2023, 12, 20)
+    store.append(1, [(start + timedelta(hours=6 * i), "canopy_cover", i / 100) for i in range(200)])
+    end = start + timedelta(days=60)
+    before = store.query(1, ["canopy_cover"], start, end, "week")
+    assert store.rebuild_rollups(1) == 200
+    assert store.query(1, ["canopy_cover"], start, end, "week") == before
+
+
+def test_aware_and_naive_bounds_agree(store):
+    store.append(1, [(datetime(2024, 3, 1, 12, tzinfo=timezone.utc), "ndvi", 0.7)])
+    naive = store.query(1, ["ndvi"], datetime(2024, 3, 1), datetime(2024, 3, 2))
+    aware = store.query(
+        1, ["ndvi"],
+        datetime(2024, 3, 1, 5, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+        datetime(2024, 3, 2, tzinfo=timezone.utc),
+    )
+    assert naive["series"] == aware["series"] == {"ndvi": [{"t": "2024-03-01T12:00:00", "value": 0.7}]}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import main
+
+    run_migrations()
+    with SessionLocal() as session:
+        project = Project(
+            project_type="mangrove", location="Test", area=10.0,
+            start_date=datetime(2024, 1, 1), end_date=datetime(2034, 1, 1),
+        )
+        session.add(project)
+        session.commit()
+        project_id = project.id
+    monkeypatch.setattr(get_metrics_store(), "directory", str(tmp_path))
+    get_metrics_store().append(project_id, [(datetime(2024, 6, 1), "ndvi", 0.8)])
+    # Without the context manager no startup hooks (price feed, job runner) run
+    return TestClient(main.app), project_id
+
+
+@pytest.mark.parametrize("query", [
+    "start=2024-01-01T00:00:00Z",
+    "start=2024-01-01T00:00:00Z&end=2024-12-31T00:00:00",
+    "start=2024-01-01T00:00:00&end=2024-12-31T00:00:00%2B02:00",
+    "start=2024-01-01T00:00:00%2B05:30&end=2024-12-31T23:00:00Z",
+])
+def test_metrics_endpoint_accepts_aware_and_mixed_bounds(client, query):
+    client, project_id = client
+    response = client.get(f"/api/dashboard/{project_id}/metrics?metrics=ndvi&{query}")
+    assert response.status_code == 200, response.text
+    assert [point["last"] for point in response.json()["series"]["ndvi"]] == [0.8]
+
+
+def test_metrics_endpoint_rejects_inverted_range(client):
+    client, project_id = client
+    response = client.get(f"/api/dashboard/{project_id}/metrics?start=2024-06-01T00:00:00Z&end=2024-06-01T01:00:00%2B02:00")
+    assert response.status_code == 400
+
+
+def test_open_ended_window_is_not_served_from_cache(client):
+    client, project_id = client
+    url = f"/api/dashboard/{project_id}/metrics?metrics=ndvi&resolution=raw&start=2024-01-01T00:00:00"
+    assert len(client.get(url).json()["series"]["ndvi"]) == 1
+    # Recorded after the first response was built
+    get_metrics_store().append(project_id, [(datetime.utcnow(), "ndvi", 0.9)])
+    response = client.get(url)
+    assert "X-Cache" not in response.headers
+    assert [point["value"] for point in response.json()["series"]["ndvi"]] == [0.8, 0.9]
+
+    # An explicit end fixes the window: that response is cached
+    bounded = url + "&end=2024-12-31T00:00:00"
+    client.get(bounded)
+    assert client.get(bounded).headers["X-Cache"] == "HIT"
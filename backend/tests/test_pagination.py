@@ -0,0 +1,84 @@
+"""Keyset cursors: paging through every row once and rejecting foreign or malformed cursors"""
+import base64
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from database import SessionLocal, run_migrations
+from models import Project
+from services.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+
+def _token(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("projects", id=42), "projects") == {"id": 42}
+
+
+@pytest.mark.parametrize("token", [
+    "not a cursor!",
+    _token([1, 2]),
+    _token({"k": "projects"}),
+    _token({"k": "projects", "id": "5"}),
+    _token({"k": "projects", "id": 5.5}),
+    _token({"k": "projects", "id": True}),
+    _token({"k": "projects", "id": None}),
+])
+def test_malformed_cursors_are_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, "projects")
+
+
+def test_cursor_of_another_listing_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor("listings", id=1), "projects")
+
+
+@pytest.fixture
+def status():
+    """A status only this test's projects have"""
+    status = f"paging-{uuid.uuid4().hex[:8]}"
+    run_migrations()
+    with SessionLocal() as session:
+        session.add_all(
+            Project(project_type="mangrove", location="Test", area=10.0, description="Paging", status=status,
+                    start_date=datetime(2024, 1, 1), end_date=datetime(2034, 1, 1))
+            for _ in range(5)
+        )
+        session.commit()
+        return status
+
+
+def test_pages_cover_every_project_once(status):
+    client = TestClient(main.app)
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"status": status, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/projects", params=params)
+        assert response.status_code == 200
+        seen.extend(project["id"] for project in response.json())
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert pages == 3
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+
+@pytest.mark.parametrize("url,token", [
+    ("/api/projects", "garbage"),
+    ("/api/projects", _token({"k": "projects", "id": "1 OR 1=1"})),
+    ("/api/projects", encode_cursor("listings", id=1)),
+    ("/api/marketplace/listings", encode_cursor("projects", id=1)),
+    ("/api/marketplace/listings", _token({"k": "listings"})),
+])
+def test_invalid_cursor_is_a_bad_request(url, token):
+    response = TestClient(main.app).get(url, params={"cursor": token})
+    assert response.status_code == 400
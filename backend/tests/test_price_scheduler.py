@@ -0,0 +1,15 @@
+"""Backoff stays bounded however long the upstream is down"""
+from services.price_scheduler import PriceFeedScheduler
+
+
+def test_backoff_is_capped_after_many_failures():
+    scheduler = PriceFeedScheduler(service=None, interval=1.0, max_backoff=60.0)
+    scheduler.metrics.consecutive_failures = 5000
+    assert 1.0 <= scheduler.next_delay() <= 60.0
+    assert scheduler.status()["max_delay"] == 60.0
+
+
+def test_healthy_feed_polls_at_interval():
+    scheduler = PriceFeedScheduler(service=None, interval=2.0)
+    assert scheduler.next_delay() == 2.0
+    assert scheduler.status()["max_delay"] == 2.0
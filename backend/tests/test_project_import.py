@@ -0,0 +1,36 @@
+"""Bulk import isolates rows the database rejects and inserts the rest of the batch"""
+import json
+
+from sqlalchemy import select
+
+from database import SessionLocal, run_migrations
+from models import Project
+from services.project_import import import_projects
+
+
+def _row(location: str, area) -> str:
+    # json.dumps writes float("nan") as NaN, which json.loads reads back
+    return json.dumps({
+        "project_type": "mangrove", "location": location, "area": area,
+        "start_date": "2024-01-01", "end_date": "2034-01-01", "description": "Import test",
+    })
+
+
+def test_rejected_row_is_reported_and_the_rest_of_the_batch_inserted():
+    run_migrations()
+    location = "Import fallback"
+    # Passes validation, but SQLite stores NaN as NULL and area is NOT NULL
+    lines = [_row(location, 10.0), _row(location, 12.5), _row(location, float("nan")), _row(location, 8.0)]
+
+    events = list(import_projects(lines, "ndjson", batch_size=10))
+
+    errors = [event for event in events if "error" in event]
+    assert len(errors) == 1
+    assert errors[0]["row"] == 3
+    assert "NOT NULL" in errors[0]["error"]
+    assert {"batch": 1, "inserted": 3} in events
+    summary = events[-1]["summary"]
+    assert (summary["rows"], summary["inserted"], summary["failed"], summary["batches"]) == (4, 3, 1, 1)
+    with SessionLocal() as session:
+        areas = session.execute(select(Project.area).where(Project.location == location)).scalars().all()
+    assert sorted(areas) == [8.0, 10.0, 12.5]
@@ -0,0 +1,18 @@
+"""Hot queries must keep using their indexes once the migrations have run"""
+import pytest
+
+from database import engine, run_migrations
+from manage import HOT_QUERIES, explain
+
+
+@pytest.fixture(scope="module")
+def connection():
+    run_migrations()
+    with engine.connect() as connection:
+        yield connection
+
+
+@pytest.mark.parametrize("name, statement, index_name", HOT_QUERIES, ids=[query[0] for query in HOT_QUERIES])
+def test_hot_query_uses_index(connection, name, statement, index_name):
+    plan = explain(connection, statement)
+    assert index_name in plan, f"{name}: expected {index_name}, got:\n{plan}"
@@ -0,0 +1,77 @@
+"""Streamed vegetation indices match a naive whole-array computation"""
+import numpy as np
+import pytest
+
+from services.raster_engine import (
+    BIOMASS_BARE_NDVI, BIOMASS_FULL_NDVI, BIOMASS_MAX_TONS_PER_HECTARE, CANOPY_NDVI,
+    _VegetationSums, analyze_scene, footprint_mask, footprint_radius_m, footprint_window,
+    load_scene, write_synthetic_scene,
+)
+
+LATITUDE, LONGITUDE, AREA = -3.0, 40.02, 500.0
+
+
+@pytest.fixture(scope="module")
+def scene(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("scenes"))
+    return load_scene(write_synthetic_scene(
+        directory, "regression", west=40.0, north=-2.98, width=400, height=400, cloud_fraction=0.3, seed=7,
+    ))
+
+
+def _naive(scene):
+    """Every index over the whole footprint window at once, in float64"""
+    radius_m = footprint_radius_m(AREA)
+    top, bottom, left, right = footprint_window(scene, LATITUDE, LONGITUDE, radius_m)
+    latitudes = scene.north - (np.arange(top, bottom) + 0.5) * scene.pixel_height
+    longitudes = scene.west + (np.arange(left, right) + 0.5) * scene.pixel_width
+    inside = footprint_mask(latitudes, longitudes, LATITUDE, LONGITUDE, radius_m)
+    red, nir, blue = (scene.band(name)[top:bottom, left:right] / scene.reflectance_scale for name in ("red", "nir", "blue"))
+    clear = inside & (scene.band("cloud")[top:bottom, left:right] == 0) & (nir + red > 0)
+    red, nir, blue = red[clear], nir[clear], blue[clear]
+    ndvi = (nir - red) / (nir + red)
+    evi = np.clip(2.5 * (nir - red) / np.maximum(nir + 6 * red - 7.5 * blue + 1, 1e-6), -1, 1)
+    biomass = np.clip((ndvi - BIOMASS_BARE_NDVI) / (BIOMASS_FULL_NDVI - BIOMASS_BARE_NDVI), 0, 1)
+    return {
+        "ndvi": ndvi.mean(),
+        "ndvi_std": ndvi.std(),
+        "evi": evi.mean(),
+        "canopy_cover": (ndvi >= CANOPY_NDVI).mean(),
+        "biomass_per_hectare": BIOMASS_MAX_TONS_PER_HECTARE * biomass.mean(),
+        "cloud_coverage": 1 - clear.sum() / inside.sum(),
+        "pixels_analyzed": int(clear.sum()),
+    }
+
+
+@pytest.mark.parametrize("tile_pixels", [1000, 256 * 1024])
+def test_analyze_scene_matches_naive_computation(scene, tile_pixels):
+    result = analyze_scene(scene, LATITUDE, LONGITUDE, AREA, tile_pixels=tile_pixels)
+    expected = _naive(scene)
+    assert 0 < expected["cloud_coverage"] < 1  # both clear and clouded pixels are exercised
+    assert result["pixels_analyzed"] == expected["pixels_analyzed"]
+    for metric in ("ndvi", "ndvi_std", "evi", "canopy_cover", "cloud_coverage"):
+        assert result[metric] == pytest.approx(expected[metric], abs=2e-4), metric
+    assert result["biomass_per_hectare"] == pytest.approx(expected["biomass_per_hectare"], abs=0.02)
+    assert result["biomass_estimate"] == pytest.approx(result["biomass_per_hectare"] * AREA, rel=1e-3)
+
+
+def test_ndvi_out_receives_only_clear_pixels():
+    rng = np.random.default_rng(1)
+    red = rng.integers(0, 3000, (64, 64), dtype=np.uint16)
+    nir = rng.integers(0, 6000, (64, 64), dtype=np.uint16)
+    blue = rng.integers(0, 2000, (64, 64), dtype=np.uint16)
+    inside = rng.random((64, 64)) < 0.8
+    cloud = (rng.random((64, 64)) < 0.2).astype(np.uint8)
+    red[0, 0] = nir[0, 0] = 0  # no data
+    out = np.full((64, 64), np.nan, dtype=np.float32)
+
+    sums = _VegetationSums(10000)
+    sums.add(red, nir, blue, inside, cloud, ndvi_out=out)
+
+    total = nir.astype(np.float64) + red
+    clear = inside & (cloud == 0) & (total > 0)
+    expected = np.where(clear, (nir.astype(np.float64) - red) / np.where(total > 0, total, 1), np.nan)
+    assert np.array_equal(np.isnan(out), ~clear)
+    np.testing.assert_allclose(out[clear], expected[clear], atol=1e-6)
+    assert sums.clear == int(clear.sum())
+    assert sums.ndvi_sum / sums.clear == pytest.approx(expected[clear].mean(), abs=1e-6)
@@ -0,0 +1,83 @@
+"""Cached reads are invalidated by committed writes and honour If-None-Match"""
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from database import SessionLocal, run_migrations
+from models import CarbonCredit, Project
+
+
+@pytest.fixture
+def client():
+    # No context manager: startup (price updater, job runner) is not needed here
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def project_id():
+    run_migrations()
+    with SessionLocal() as session:
+        project = Project(
+            project_type="mangrove", location="Test", area=10.0, description="Cache test", estimated_carbon_credits=50.0,
+            start_date=datetime(2024, 1, 1), end_date=datetime(2034, 1, 1),
+        )
+        session.add(project)
+        session.flush()
+        session.add(CarbonCredit(
+            project_id=project.id, total_credits=100.0, available_credits=100.0,
+            unit_price=25.0, total_value=2500.0,
+        ))
+        session.commit()
+        return project.id
+
+
+def test_unchanged_response_is_not_modified(client, project_id):
+    url = f"/api/verification/project/{project_id}"
+    first = client.get(url)
+    assert first.headers["X-Cache"] == "MISS"
+    second = client.get(url)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+    not_modified = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert client.get(url, headers={"If-None-Match": '"something-else"'}).status_code == 200
+
+
+def test_orm_writes_invalidate_cached_reads(client, project_id):
+    verifications_url = f"/api/verification/project/{project_id}"
+    dashboard_url = f"/api/dashboard/{project_id}"
+    etag = client.get(verifications_url).headers["ETag"]
+    client.get(dashboard_url)
+    assert client.get(dashboard_url).headers["X-Cache"] == "HIT"
+
+    created = client.post(f"/api/verification/{project_id}", data={"verification_type": "legal", "verifier_name": "Registry"})
+    assert created.status_code == 200
+    response = client.get(verifications_url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+    assert [verification["verifier_name"] for verification in response.json()] == ["Registry"]
+
+    project_url = f"/api/projects/{project_id}"
+    client.get(project_url)
+    assert client.put(f"/api/verification/{created.json()['id']}/approve").status_code == 200
+    project = client.get(project_url)
+    assert project.headers["X-Cache"] == "MISS"
+    assert project.json()["status"] == "verified"
+    assert client.get(dashboard_url).headers["X-Cache"] == "MISS"
+
+
+def test_core_updates_invalidate_cached_reads(client, project_id):
+    # The sale is a conditional Core UPDATE, not an ORM flush
+    url = f"/api/tokenization/{project_id}"
+    assert client.get(url).json()["available_credits"] == 100.0
+    assert client.get(url).headers["X-Cache"] == "HIT"
+
+    listing = client.post(f"/api/marketplace/list/{project_id}").json()["listing"]
+    assert client.put(f"/api/marketplace/listings/{listing['id']}/sell").status_code == 200
+    response = client.get(url)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["available_credits"] < 100.0
@@ -0,0 +1,138 @@
+"""Epoch change detection and incremental epoch analysis"""
+import asyncio
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from database import AsyncSessionLocal, SessionLocal, run_migrations
+from models import Project, SatelliteEpoch
+from services.analysis_executor import shutdown_analysis_executor
+from services.raster_engine import scene_dir, write_synthetic_scene
+from services.satellite_epochs import diff_epochs, update_project_epochs
+
+LATITUDE, LONGITUDE = -8.25, 115.35
+
+
+def test_diff_epochs_compares_pixels_clear_in_both():
+    before = np.array([0.2, 0.5, 0.5, 0.5, np.nan, 0.4], dtype=np.float16)
+    after = np.array([0.35, 0.5, 0.3, np.nan, 0.9, 0.45], dtype=np.float16)
+    change = diff_epochs(before, after, threshold=0.1)
+    # The two NaN pixels (clouded in either epoch) are left out
+    assert change["compared_pixels"] == 4
+    assert change["gained_fraction"] == 0.25  # +0.15
+    assert change["lost_fraction"] == 0.25  # -0.2; +0.05 is below the threshold
+    assert change["vegetation_increase"] == 0.0
+    assert change["mean_ndvi_change"] == pytest.approx((0.15 + 0.0 - 0.2 + 0.05) / 4, abs=2e-3)
+
+
+def test_diff_epochs_without_common_clear_pixels():
+    change = diff_epochs(np.array([np.nan, 0.5]), np.array([0.5, np.nan]))
+    assert change["compared_pixels"] == 0
+    assert change["vegetation_increase"] is None
+
+
+@pytest.fixture
+def project_id():
+    run_migrations()
+    with SessionLocal() as session:
+        project = Project(
+            project_type="mangrove", location="Test", area=10.0, latitude=LATITUDE, longitude=LONGITUDE,
+            start_date=datetime(2024, 1, 1), end_date=datetime(2034, 1, 1),
+        )
+        session.add(project)
+        session.commit()
+        yield project.id
+    shutdown_analysis_executor()
+
+
+def _add_scene(acquired: date, seed: int):
+    write_synthetic_scene(
+        scene_dir(), f"epochs-{acquired.isoformat()}", west=LONGITUDE - 0.01, north=LATITUDE + 0.01,
+        width=200, height=200, acquired=acquired, cloud_fraction=0.0, seed=seed,
+    )
+
+
+async def _update(project_id, area=None):
+    async with AsyncSessionLocal() as db:
+        project = await db.get(Project, project_id)
+        if area is not None:
+            project.area = area
+        result = await update_project_epochs(db, project)
+        await db.commit()
+        epochs = (await db.execute(
+            select(SatelliteEpoch).where(SatelliteEpoch.project_id == project_id).order_by(SatelliteEpoch.acquired)
+        )).scalars().all()
+        return result, epochs
+
+
+def test_only_newer_acquisitions_are_analyzed(project_id):
+    _add_scene(date(2025, 3, 1), seed=1)
+    _add_scene(date(2025, 4, 1), seed=2)
+    result, epochs = asyncio.run(_update(project_id))
+    assert [epoch.acquired for epoch in epochs] == [date(2025, 3, 1), date(2025, 4, 1)]
+    assert epochs[0].change is None
+    assert epochs[1].change["previous_acquired"] == "2025-03-01"
+    assert result["epochs_added"] == 2
+
+    _add_scene(date(2025, 5, 1), seed=3)
+    result, epochs = asyncio.run(_update(project_id))
+    # Stored epochs are not analyzed again (the unique index would reject them)
+    assert [epoch["acquired"] for epoch in result["new_epochs"]] == ["2025-05-01"]
+    assert result["epochs_added"] == 1
+    assert len(epochs) == 3
+    assert result["change_detection"]["period"] == "2025-04-01 to 2025-05-01"
+
+    # A resized project has a new grid: its rasters are not comparable with the old ones
+    _add_scene(date(2025, 6, 1), seed=4)
+    result, epochs = asyncio.run(_update(project_id, area=400.0))
+    assert epochs[-1].grid != epochs[-2].grid
+    assert epochs[-1].change is None
+    assert result["change_detection"]["vegetation_increase"] is None
+
+
+def test_epochs_are_committed_as_they_complete():
+    run_migrations()
+    with SessionLocal() as session:
+        project = Project(
+            project_type="mangrove", location="Test", area=10.0, latitude=LATITUDE + 1, longitude=LONGITUDE,
+            start_date=datetime(2024, 1, 1), end_date=datetime(2034, 1, 1),
+        )
+        session.add(project)
+        session.commit()
+        project_id = project.id
+    for month, seed in ((3, 5), (4, 6)):
+        write_synthetic_scene(
+            scene_dir(), f"epochs-commit-{month}", west=LONGITUDE - 0.01, north=LATITUDE + 1.01,
+            width=200, height=200, acquired=date(2025, month, 1), cloud_fraction=0.0, seed=seed,
+        )
+    job_created = datetime.utcnow()
+
+    async def attempt(fail_after):
+        progress = []
+        async with AsyncSessionLocal() as db:
+            async def report(value, stage):
+                await db.commit()
+                progress.append(value)
+                if len(progress) == fail_after:
+                    raise RuntimeError("worker lost")
+            try:
+                result = await update_project_epochs(db, await db.get(Project, project_id), report=report, since=job_created)
+            except RuntimeError:
+                result = None
+        async with AsyncSessionLocal() as db:
+            stored = (await db.execute(select(SatelliteEpoch.acquired).where(SatelliteEpoch.project_id == project_id))).scalars().all()
+        return result, progress, sorted(stored)
+
+    try:
+        result, progress, stored = asyncio.run(attempt(fail_after=1))
+        assert result is None
+        assert stored == [date(2025, 3, 1)]
+        # The retry resumes after the committed epoch but still reports it as new
+        result, progress, stored = asyncio.run(attempt(fail_after=None))
+        assert progress == [0.8]
+        assert stored == [date(2025, 3, 1), date(2025, 4, 1)]
+        assert [epoch["acquired"] for epoch in result["new_epochs"]] == ["2025-03-01", "2025-04-01"]
+    finally:
+        shutdown_analysis_executor()
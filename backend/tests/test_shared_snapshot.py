@@ -0,0 +1,87 @@
+"""Seqlock snapshot segment and leader election lock"""
+import pytest
+
+from services.shared_snapshot import HEADER, MAGIC, LeaderLock, SharedSnapshotSegment
+
+
+@pytest.fixture
+def segments(tmp_path):
+    path = str(tmp_path / "snapshot.seg")
+    writer, reader = SharedSnapshotSegment(path, size=4096), SharedSnapshotSegment(path, size=4096)
+    yield writer, reader
+    writer.close()
+    reader.close()
+
+
+def test_write_read_round_trip(segments):
+    writer, reader = segments
+    assert reader.read() == (0, None)
+    writer.write({"price": 25.5})
+    writer.write({"price": 26.0, "symbol": "CO2"})
+    assert reader.read() == (4, {"price": 26.0, "symbol": "CO2"})
+    assert reader.sequence() == 4
+
+
+def test_oversized_payload_is_rejected(segments):
+    writer, reader = segments
+    writer.write({"price": 1})
+    with pytest.raises(ValueError):
+        writer.write({"blob": "x" * 5000})
+    assert reader.read() == (2, {"price": 1})
+
+
+def _finish_write(segment, payload: bytes, sequence: int):
+    segment._map[HEADER.size:HEADER.size + len(payload)] = payload
+    HEADER.pack_into(segment._map, 0, MAGIC, sequence, len(payload))
+
+
+def test_reader_retries_while_a_write_is_in_progress(segments, monkeypatch):
+    writer, reader = segments
+    writer.write({"price": 1})
+    # The writer has made the sequence odd and is part way through the payload
+    HEADER.pack_into(writer._map, 0, MAGIC, 3, 0)
+    writer._map[HEADER.size:HEADER.size + 4] = b"{\"pr"
+    header, calls = reader._header, []
+
+    def observed_header():
+        calls.append(None)
+        if len(calls) == 3:
+            _finish_write(writer, b'{"price": 2}', 4)
+        return header()
+
+    monkeypatch.setattr(reader, "_header", observed_header)
+    assert reader.read() == (4, {"price": 2})
+    assert len(calls) > 3
+
+
+def test_reader_discards_a_copy_overwritten_meanwhile(segments, monkeypatch):
+    writer, reader = segments
+    writer.write({"price": 1})
+    header, calls = reader._header, []
+
+    def observed_header():
+        calls.append(None)
+        result = header()
+        if len(calls) == 1:
+            # A whole write lands between reading the header and re-checking it
+            _finish_write(writer, b'{"price": 2.0}', 4)
+        return result
+
+    monkeypatch.setattr(reader, "_header", observed_header)
+    assert reader.read() == (4, {"price": 2.0})
+    assert len(calls) == 4
+
+
+def test_leader_lock_is_exclusive_until_released(tmp_path):
+    path = str(tmp_path / "leader.lock")
+    leader, follower = LeaderLock(path), LeaderLock(path)
+    assert leader.try_acquire()
+    assert leader.try_acquire()  # re-entrant for the holder
+    assert not follower.try_acquire()
+    assert not follower.is_leader
+
+    leader.release()
+    assert not leader.is_leader
+    assert follower.try_acquire()
+    assert not leader.try_acquire()
+    follower.release()
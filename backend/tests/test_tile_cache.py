@@ -0,0 +1,136 @@
+"""Tile cache tiers, eviction, single-flight fetches, cached misses and local resampling"""
+import os
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+from services import tile_cache
+from services.local_tile_provider import LocalSceneTileProvider
+from services.raster_engine import load_scene, write_synthetic_scene
+from services.tile_cache import DISK_EVICTION_TARGET, TILE_SIZE, TileCache, TileKey, tile_pixel_centers, tiles_covering
+
+ACQUIRED = date(2025, 1, 1)
+TILE_BYTES = TILE_SIZE * TILE_SIZE * 2
+
+
+class CountingProvider:
+    """Constant tiles; band "missing" has none"""
+
+    name = "counting"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.fetches = 0
+        self._lock = threading.Lock()
+
+    def acquisitions(self, west, south, east, north):
+        return [ACQUIRED]
+
+    def fetch(self, key):
+        with self._lock:
+            self.fetches += 1
+        time.sleep(self.delay)
+        if key.band == "missing":
+            return None
+        return np.full((TILE_SIZE, TILE_SIZE), key.x, dtype=np.uint16)
+
+
+def _key(x: int, band: str = "red") -> TileKey:
+    return TileKey(x, 0, 13, band, ACQUIRED)
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes(tmp_path):
+    provider = CountingProvider()
+    cache = TileCache(provider, directory=str(tmp_path), memory_bytes=int(2.5 * TILE_BYTES))
+    for x in range(3):
+        assert cache.get(_key(x))[0, 0] == x
+    assert cache.counters["memory_evictions"] == 1
+    assert cache.stats()["memory_bytes"] <= cache.memory_bytes
+
+    cache.get(_key(2))
+    assert cache.counters["memory_hits"] == 1
+    # Evicted from memory, still on disk
+    cache.get(_key(0))
+    assert cache.counters["disk_hits"] == 1
+    assert provider.fetches == 3
+
+
+def test_disk_tier_trims_to_the_eviction_target(tmp_path):
+    cache = TileCache(CountingProvider(), directory=str(tmp_path), memory_bytes=0)
+    cache.get(_key(0))
+    file_bytes = os.path.getsize(cache._path(_key(0)))
+    cache.disk_bytes = int(3.5 * file_bytes)
+    for x in range(1, 4):
+        cache.get(_key(x))
+        time.sleep(0.01)  # distinct mtimes
+
+    used, files = cache._disk_usage()
+    assert used <= cache.disk_bytes * DISK_EVICTION_TARGET
+    assert files == 3
+    assert not os.path.exists(cache._path(_key(0)))
+    assert cache.counters["disk_evictions"] == 1
+
+
+def test_concurrent_gets_fetch_once(tmp_path):
+    provider = CountingProvider(delay=0.2)
+    # One cache per thread, as in separate worker processes sharing the disk tier
+    caches = [TileCache(provider, directory=str(tmp_path)) for _ in range(6)]
+    tiles = []
+    threads = [threading.Thread(target=lambda cache=cache: tiles.append(cache.get(_key(7)))) for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert provider.fetches == 1
+    assert all(np.array_equal(tile, tiles[0]) for tile in tiles)
+    assert sum(cache.counters["fetched"] for cache in caches) == 1
+
+
+def test_misses_are_cached_only_for_the_negative_ttl(tmp_path):
+    provider = CountingProvider()
+    assert TileCache(provider, directory=str(tmp_path)).get(_key(1, "missing")) is None
+    assert TileCache(provider, directory=str(tmp_path)).get(_key(1, "missing")) is None
+    assert provider.fetches == 1
+
+    expired = time.time() - tile_cache.TILE_CACHE_NEGATIVE_TTL - 1
+    os.utime(TileCache(provider, directory=str(tmp_path))._path(_key(1, "missing")), (expired, expired))
+    assert TileCache(provider, directory=str(tmp_path)).get(_key(1, "missing")) is None
+    assert provider.fetches == 2
+
+
+def test_memory_misses_expire(tmp_path, monkeypatch):
+    monkeypatch.setattr(tile_cache, "TILE_CACHE_NEGATIVE_TTL", 0)
+    provider = CountingProvider()
+    cache = TileCache(provider, directory=str(tmp_path))
+    cache.get(_key(1, "missing"))
+    time.sleep(0.01)
+    cache.get(_key(1, "missing"))
+    assert provider.fetches == 2
+    assert cache.counters["memory_hits"] == 0
+
+
+def test_local_provider_resamples_nearest_neighbour(tmp_path):
+    scene = load_scene(write_synthetic_scene(
+        str(tmp_path), "resample", west=30.0, north=-10.0, width=300, height=200, acquired=ACQUIRED, seed=3,
+    ))
+    provider = LocalSceneTileProvider(directory=str(tmp_path))
+    zoom = 13
+    x, y = tiles_covering(scene.west, scene.south, scene.east, scene.north, zoom)[0]
+    tile = provider.fetch(TileKey(x, y, zoom, "nir", ACQUIRED))
+
+    latitudes, longitudes = tile_pixel_centers(x, y, zoom)
+    rows = np.floor((scene.north - latitudes) / scene.pixel_height).astype(int)
+    columns = np.floor((longitudes - scene.west) / scene.pixel_width).astype(int)
+    band = scene.band("nir")
+    expected = np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.uint16)
+    for i, row in enumerate(rows):
+        for j, column in enumerate(columns):
+            if 0 <= row < scene.height and 0 <= column < scene.width:
+                expected[i, j] = band[row, column]
+    assert expected.any()
+    assert np.array_equal(tile, expected)
+    # No scene there
+    assert provider.fetch(TileKey(0, 0, zoom, "nir", ACQUIRED)) is None
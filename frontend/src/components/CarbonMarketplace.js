@@ -9,6 +9,17 @@ const CarbonMarketplace = ({ projectData, onComplete }) => {
 
   useEffect(() => {
     fetchMarketData();
+    fetchLivePrice();
+
+    // Prefer server push; fall back to polling where EventSource is unavailable
+    if (typeof window.EventSource === 'function') {
+      const source = new window.EventSource('/api/marketplace/stream');
+      source.addEventListener('price', (event) => {
+        setLivePrice(JSON.parse(event.data));
+      });
+      return () => source.close();
+    }
+
     const interval = setInterval(fetchLivePrice, 2000); // Update every 2 seconds
     return () => clearInterval(interval);
   }, []);
@@ -1,6 +1,30 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import axios from 'axios';
 
+const TREND_LABELS = {
+  ndvi: 'NDVI',
+  canopy_cover: 'Canopy Cover',
+  soil_moisture: 'Soil Moisture',
+  health_score: 'Vegetation Health Score',
+  estimated_carbon_credits: 'Estimated Credits (t)'
+};
+
+const Sparkline = ({ values, width = 120, height = 32 }) => {
+  if (values.length < 2) {
+    return null;
+  }
+  const min = Math.min(...values);
+  const range = Math.max(...values) - min || 1;
+  const points = values
+    .map((value, i) => `${(i / (values.length - 1)) * width},${height - ((value - min) / range) * height}`)
+    .join(' ');
+  return (
+    <svg className="sparkline" width={width} height={height} viewBox={`0 0 ${width} ${height}`}>
+      <polyline points={points} fill="none" stroke="#2e7d32" strokeWidth="2" />
+    </svg>
+  );
+};
+
 const ImpactDashboard = ({ projectData }) => {
   const [dashboardData, setDashboardData] = useState(null);
   const [portfolioValue, setPortfolioValue] = useState(null);
@@ -245,6 +269,26 @@ const ImpactDashboard = ({ projectData }) => {
         </div>
       </div>
 
+      {dashboardData?.trends && Object.keys(dashboardData.trends).length > 0 && (
+        <div className="metric-trends">
+          <h3>📉 Monitoring Trends (last 12 months)</h3>
+          <div className="metrics-grid">
+            {Object.entries(dashboardData.trends).map(([metric, trend]) => (
+              <div className="impact-metric" key={metric}>
+                <div className="metric-info">
+                  <div className="metric-number">{trend.latest}</div>
+                  <div className="metric-text">{TREND_LABELS[metric] || metric}</div>
+                  <div className={`portfolio-change ${trend.change >= 0 ? 'positive' : 'negative'}`}>
+                    {trend.change >= 0 ? '+' : ''}{trend.change} since {new Date(trend.since).toLocaleDateString()}
+                  </div>
+                </div>
+                <Sparkline values={trend.weekly_means} />
+              </div>
+            ))}
+          </div>
+        </div>
+      )}
+
       <div className="community-benefits">
         <h3>👥 Community Benefits</h3>
         <div className="benefits-summary">
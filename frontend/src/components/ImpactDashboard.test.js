@@ -78,6 +78,25 @@ describe('ImpactDashboard Component', () => {
     });
   });
 
+  it('displays monitoring trends when available', async () => {
+    axios.get.mockResolvedValue({
+      data: {
+        ...mockDashboardData,
+        trends: {
+          ndvi: { latest: 0.81, change: 0.1, since: '2025-10-20', weekly_means: [0.7, 0.66, 0.8] }
+        }
+      }
+    });
+
+    render(<ImpactDashboard projectData={mockProjectData} />);
+
+    await waitFor(() => {
+      expect(screen.getByText(/Monitoring Trends/i)).toBeInTheDocument();
+      expect(screen.getByText('NDVI')).toBeInTheDocument();
+      expect(screen.getByText('0.81')).toBeInTheDocument();
+    });
+  });
+
   it('shows message when no project data provided', () => {
     render(<ImpactDashboard projectData={null} />);
     expect(screen.getByText(/Please select a project/i)).toBeInTheDocument();
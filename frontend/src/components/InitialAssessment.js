@@ -1,6 +1,22 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 
+const JOB_POLL_INTERVAL_MS = 1000;
+
+// Analysis endpoints answer 202 with a job; poll it until it finishes
+const waitForAnalysisJob = async (job) => {
+  let current = job;
+  while (current.status === 'queued' || current.status === 'running') {
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    const response = await axios.get(`/api/analysis/jobs/${current.id}`);
+    current = response.data;
+  }
+  if (current.status !== 'succeeded') {
+    throw new Error(current.error || 'Analysis failed');
+  }
+  return current.result;
+};
+
 const InitialAssessment = ({ onComplete }) => {
   const [formData, setFormData] = useState({
     project_type: 'Mangrove Restoration',
@@ -46,18 +62,20 @@ const InitialAssessment = ({ onComplete }) => {
         const imageFormData = new FormData();
         imageFormData.append('image', selectedFile);
 
+        // Queued; the result is saved on the project when the job finishes
         await axios.post(`/api/analysis/site-image/${newProjectId}`, imageFormData);
       }
 
       // Perform satellite analysis
       const satelliteResponse = await axios.post(`/api/analysis/satellite/${newProjectId}`);
-      setAnalysis(satelliteResponse.data);
+      const satelliteAnalysis = await waitForAnalysisJob(satelliteResponse.data);
+      setAnalysis(satelliteAnalysis);
 
       // Complete the step
       onComplete({
         projectId: newProjectId,
         projectData: projectResponse.data,
-        analysis: satelliteResponse.data
+        analysis: satelliteAnalysis
       });
 
     } catch (error) {
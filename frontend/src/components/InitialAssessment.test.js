@@ -66,7 +66,7 @@ describe('InitialAssessment Component', () => {
         return Promise.resolve({ data: mockProjectData });
       }
       if (url.includes('/api/analysis/satellite')) {
-        return Promise.resolve({ data: mockAnalysisData });
+        return Promise.resolve({ data: { id: 7, status: 'succeeded', result: mockAnalysisData } });
       }
       return Promise.resolve({ data: {} });
     });